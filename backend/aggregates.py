@@ -0,0 +1,179 @@
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from models import db, Player, Game, PlayerAggregate
+from stats import compute_player_stats, empty_stats
+
+def new_aggregate(player_id):
+    return PlayerAggregate(
+        player_id=player_id,
+        games_played=0,
+        wins=0,
+        losses=0,
+        draws=0,
+        points_for=0,
+        points_against=0,
+        current_streak_length=0,
+        longest_win_streak=0
+    )
+
+def get_or_create_aggregate(player_id):
+    aggregate = db.session.get(PlayerAggregate, player_id)
+    if aggregate is None:
+        aggregate = new_aggregate(player_id)
+        db.session.add(aggregate)
+    return aggregate
+
+# Fold one side of a newly added game into that player's running totals
+def apply_result(aggregate, game, points_for, points_against):
+    aggregate.games_played += 1
+    aggregate.points_for += points_for
+    aggregate.points_against += points_against
+    aggregate.last_game_at = game.timestamp
+
+    if points_for > points_against:
+        aggregate.wins += 1
+        outcome = 'W'
+    elif points_for < points_against:
+        aggregate.losses += 1
+        outcome = 'L'
+    else:
+        aggregate.draws += 1
+        outcome = 'D'
+
+    if aggregate.current_streak_type == outcome:
+        aggregate.current_streak_length += 1
+    else:
+        aggregate.current_streak_type = outcome
+        aggregate.current_streak_length = 1
+    if outcome == 'W':
+        aggregate.longest_win_streak = max(aggregate.longest_win_streak, aggregate.current_streak_length)
+
+    # Ties go to the newer game, matching compute_player_stats
+    margin = points_for - points_against
+    if margin > 0 and (aggregate.biggest_win_margin is None or margin >= aggregate.biggest_win_margin):
+        aggregate.biggest_win_game_id = game.id
+        aggregate.biggest_win_margin = margin
+    if margin < 0 and (aggregate.biggest_loss_margin is None or -margin >= aggregate.biggest_loss_margin):
+        aggregate.biggest_loss_game_id = game.id
+        aggregate.biggest_loss_margin = -margin
+
+# Incremental update for a game appended to the end of the history
+def apply_game(game):
+    if game.id is None or game.timestamp is None:
+        db.session.flush()
+    apply_result(get_or_create_aggregate(game.player1_id), game, game.player1_score, game.player2_score)
+    apply_result(get_or_create_aggregate(game.player2_id), game, game.player2_score, game.player1_score)
+
+def aggregate_from_stats(player_id, player_stats):
+    aggregate = new_aggregate(player_id)
+    for column in ('games_played', 'wins', 'losses', 'draws', 'points_for', 'points_against',
+                   'last_game_at', 'longest_win_streak'):
+        setattr(aggregate, column, player_stats[column])
+    if player_stats["current_streak"]:
+        aggregate.current_streak_type = player_stats["current_streak"]["type"]
+        aggregate.current_streak_length = player_stats["current_streak"]["length"]
+    if player_stats["biggest_win"]:
+        aggregate.biggest_win_game_id = player_stats["biggest_win"]["game_id"]
+        aggregate.biggest_win_margin = player_stats["biggest_win"]["margin"]
+    if player_stats["biggest_loss"]:
+        aggregate.biggest_loss_game_id = player_stats["biggest_loss"]["game_id"]
+        aggregate.biggest_loss_margin = player_stats["biggest_loss"]["margin"]
+    return aggregate
+
+# Recompute aggregates from the game table for the given players (or everyone).
+# Used after edits and deletes, where a running total can't simply be adjusted.
+def rebuild_aggregates(player_ids=None):
+    db.session.flush()
+    query = PlayerAggregate.query
+    if player_ids is not None:
+        query = query.filter(PlayerAggregate.player_id.in_(player_ids))
+    query.delete()
+
+    computed = compute_player_stats(player_ids)
+    db.session.add_all([
+        aggregate_from_stats(player_id, player_stats)
+        for player_id, player_stats in computed.items()
+        if player_stats["games_played"] > 0
+    ])
+    db.session.flush()
+    return len(computed)
+
+def margin_details(game_rows, player_id, game_id, margin):
+    game, player1_name, player2_name = game_rows[game_id]
+    as_player1 = game.player1_id == player_id
+    return {
+        "game_id": game.id,
+        "margin": margin,
+        "player_score": game.player1_score if as_player1 else game.player2_score,
+        "opponent_score": game.player2_score if as_player1 else game.player1_score,
+        "opponent_id": game.player2_id if as_player1 else game.player1_id,
+        "opponent": player2_name if as_player1 else player1_name
+    }
+
+# Stats for the given players (or everyone in a league, or everyone) read
+# from the aggregate table, in the same shape as compute_player_stats
+def load_player_stats(player_ids=None, session=None, league_id=None):
+    session = session or db.session
+    query = session.query(PlayerAggregate)
+    if player_ids is not None:
+        query = query.filter(PlayerAggregate.player_id.in_(player_ids))
+    if league_id is not None:
+        query = query.join(Player, Player.id == PlayerAggregate.player_id).filter(Player.league_id == league_id)
+    aggregates = query.all()
+
+    # Resolve every biggest win/loss game in one joined query
+    game_ids = {game_id for aggregate in aggregates
+                for game_id in (aggregate.biggest_win_game_id, aggregate.biggest_loss_game_id)
+                if game_id is not None}
+    game_rows = {}
+    if game_ids:
+        player1 = aliased(Player)
+        player2 = aliased(Player)
+        rows = session.execute(
+            select(Game, player1.name, player2.name)
+            .join(player1, Game.player1_id == player1.id)
+            .join(player2, Game.player2_id == player2.id)
+            .where(Game.id.in_(game_ids))
+        )
+        game_rows = {game.id: (game, player1_name, player2_name) for game, player1_name, player2_name in rows}
+
+    stats = {player_id: empty_stats() for player_id in (player_ids or [])}
+    for aggregate in aggregates:
+        player_stats = stats[aggregate.player_id] = empty_stats()
+        if not aggregate.games_played:
+            continue
+        player_stats.update({
+            "games_played": aggregate.games_played,
+            "wins": aggregate.wins,
+            "losses": aggregate.losses,
+            "draws": aggregate.draws,
+            "points_for": aggregate.points_for,
+            "points_against": aggregate.points_against,
+            "last_game_at": aggregate.last_game_at,
+            "avg_points_for": round(aggregate.points_for / aggregate.games_played, 2),
+            "avg_points_against": round(aggregate.points_against / aggregate.games_played, 2),
+            "longest_win_streak": aggregate.longest_win_streak
+        })
+        if aggregate.current_streak_type:
+            player_stats["current_streak"] = {
+                "type": aggregate.current_streak_type,
+                "length": aggregate.current_streak_length
+            }
+        if aggregate.biggest_win_game_id in game_rows:
+            player_stats["biggest_win"] = margin_details(
+                game_rows, aggregate.player_id, aggregate.biggest_win_game_id, aggregate.biggest_win_margin)
+        if aggregate.biggest_loss_game_id in game_rows:
+            player_stats["biggest_loss"] = margin_details(
+                game_rows, aggregate.player_id, aggregate.biggest_loss_game_id, aggregate.biggest_loss_margin)
+    return stats
+
+# Compare the aggregate table against a fresh computation; returns the
+# ids of players whose stored aggregates have drifted
+def verify_aggregates():
+    stored = load_player_stats()
+    computed = compute_player_stats()
+    player_ids = set(stored) | set(computed)
+    return sorted(
+        player_id for player_id in player_ids
+        if stored.get(player_id, empty_stats()) != computed.get(player_id, empty_stats())
+    )
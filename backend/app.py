@@ -1,16 +1,42 @@
 import os
 import sys
-from flask import Flask, jsonify, request, abort, session
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import or_
-from datetime import datetime
+from flask import Flask, jsonify, request, abort, session, g, Response, stream_with_context, after_this_request, \
+    send_file
+from sqlalchemy import select, or_, func, inspect
 from flask_cors import CORS
 import logging
 from sqlalchemy.exc import SQLAlchemyError
-from flask_migrate import Migrate
+from flask_migrate import Migrate, stamp
+from alembic.script import ScriptDirectory
+from alembic.runtime.migration import MigrationContext
 from config import DevelopmentConfig, ProductionConfig
+from models import db, League, Player, Game, Job, DEFAULT_LEAGUE_ID
+from replay import replay_ratings, lock_players, game_result, rating_system, load_game_arrays
+from ratings import RATING_SYSTEMS, get_rating_system, evaluate
+from imports import import_stream, text_stream, format_for, GameImportError, IMPORT_FORMATS
+from exports import export_games, EXPORT_FORMATS
+from cache import ResponseCache
+from snapshots import invalidate_snapshots, update_snapshots
+from serialization import GAME_FIELDS, player_json, game_json, job_json, response_format, formatted, json_provider, \
+    negotiate_encoding, compress, COMPRESS_MIN_BYTES, COMPRESSIBLE_MIMETYPES, parse_timestamp
+from events import EventBroker
+from matchmaking import RatingIndexCache, UnknownPlayersError, pair_round, player_ids_arg
+from db_pool import pool_status
+from metrics import Metrics, current_trace
+from reads import players_data, rankings_data, games_page_args, games_page, player_stats_data, all_stats_data, \
+    rating_history_args, rating_history_data, head_to_head_data, player_head_to_head_data, game_row, \
+    league_exists, leagues_data, league_player, bootstrap_data, player_bootstrap_data, DEFAULT_GAMES_LIMIT, \
+    MAX_GAMES_LIMIT
+from aggregates import apply_game, rebuild_aggregates, verify_aggregates
+from static_json import StaticPublisher
+from jobs import enqueue, run_inline, replay_is_small, claim_job, run_job, requeue_stale_jobs, job_files_dir, JobError
 from dotenv import load_dotenv
 from functools import wraps
+import click
+import time
+import itertools
+import signal
+from flask.cli import AppGroup
 
 load_dotenv()
 
@@ -22,6 +48,9 @@ if os.getenv('FLASK_ENV') == 'development':
 else:
     app.config.from_object(ProductionConfig)
 
+# Serialize JSON with orjson when it is installed
+app.json = json_provider(app)
+
 # Set the secret key for session management
 app.secret_key = os.environ.get('SECRET_KEY', 'your_default_secret_key')
 
@@ -31,13 +60,10 @@ if not ADMIN_PASSWORD:
     raise ValueError("No ADMIN_PASSWORD set for Flask application. Please set it in the environment variables.")
 
 # Set up CORS based on environment
-if os.getenv('FLASK_ENV') == 'development':
-    CORS(app, origins=["http://localhost:5173"], supports_credentials=True)
-else:
-    CORS(app, origins=["https://slamueljohnston.github.io"], supports_credentials=True)
+CORS(app, origins=app.config['CORS_ORIGINS'], supports_credentials=True)
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging (LOG_LEVEL=DEBUG for SQLAlchemy/driver chatter)
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'))
 
 # Configure session type
 app.config['SESSION_TYPE'] = 'filesystem'
@@ -46,30 +72,127 @@ app.config['SESSION_TYPE'] = 'filesystem'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Initialize the database
-db = SQLAlchemy(app)
+db.init_app(app)
 
 # Initialize Flask-Migrate
-migrate = Migrate(app, db)
-
-# Define models (Player, Game, etc.)
-class Player(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(80), nullable=False)
-    rating = db.Column(db.Integer, default=1000)
-    is_active = db.Column(db.Boolean, default=True)
-
-class Game(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    player1_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
-    player2_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
-    player1_score = db.Column(db.Integer, nullable=False)
-    player2_score = db.Column(db.Integer, nullable=False)
-    result = db.Column(db.String(50), nullable=False)
-    timestamp = db.Column(db.DateTime, default = datetime.now, nullable=False)
-    prior_rating_player1 = db.Column(db.Integer, nullable=False, default = 1000)
-    prior_rating_player2 = db.Column(db.Integer, nullable=False, default = 1000)
-    rating_change_player1 = db.Column(db.Integer, nullable=False, default = 0)
-    rating_change_player2 = db.Column(db.Integer, nullable=False, default =0)
+migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'))
+
+# Cache for serialized read-mostly responses, invalidated on every write
+response_cache = ResponseCache(app.config.get('CACHE_VERSION_FILE'), app.config.get('CACHE_REDIS_URL'))
+
+# A league's cached body for `key` at `version`, built and stored on a miss
+def cached_body(league_id, key, version, build):
+    body = response_cache.get(league_id, key, version)
+    if body is None:
+        body = build()
+        response_cache.set(league_id, key, version, body)
+    return body
+
+# Serve a JSON body from the cache, building it only when the data changed;
+# clients holding the current ETag get a 304 without the body being touched.
+# Compressed bodies are cached per encoding alongside the plain one.
+def cached_response(key, build):
+    version = response_cache.version(g.league_id)
+    etag = f"{key}-{version}"
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        body = cached_body(g.league_id, key, version, lambda: app.json.dumps(build()))
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        response = app.response_class(mimetype='application/json')
+        if encoding is not None and len(body) >= COMPRESS_MIN_BYTES:
+            body = cached_body(g.league_id, f"{key}.{encoding}", version, lambda: compress(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+        response.set_data(body)
+        response.vary.add('Accept-Encoding')
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Change events pushed to /events subscribers, shared by every worker
+event_broker = EventBroker(app.config.get('EVENTS_LOG_FILE'), app.config.get('CACHE_REDIS_URL'), app.json.dumps,
+                           app.config.get('MAX_EVENT_STREAMS'))
+
+# Publish a change event to the request's league once the response is
+# ready, so it goes out after the cache bump and clients that refetch on it
+# see the new data
+def publish_event(event_type, data=None):
+    league_id = g.league_id
+
+    @after_this_request
+    def publish(response):
+        try:
+            event_broker.publish(event_type, data, league_id)
+        except Exception as e:
+            logging.error(f"Event publish failed: {e}")
+        return response
+
+# Run a maintenance job in the request when its replay is small, else queue
+# it for `flask worker`: 200 once done, or 202 with the job to poll
+def run_or_queue(kind, small, message, **params):
+    if not small:
+        job = enqueue(kind, g.league_id, **params)
+        db.session.commit()
+        return jsonify({"message": "Queued", "job": job_json(job)}), 202
+    try:
+        _, event = run_inline(kind, g.league_id, **params)
+    except JobError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), e.status_code
+    db.session.commit()
+    publish_event(*event)
+    return jsonify({"message": message}), 200
+
+# Read-only data published as static JSON for the frontend's static host,
+# kept current by `flask worker` (disabled unless STATIC_JSON_DIR is set)
+static_publisher = StaticPublisher(
+    app.config['STATIC_JSON_DIR'], app.config.get('STATIC_JSON_SYNC_COMMAND'), app.json.dumps
+) if app.config.get('STATIC_JSON_DIR') else None
+
+# Republish every league whose data changed since its last publish (every
+# league when `force`). Returns the number of files written.
+def publish_static_json(force=False):
+    written = 0
+    for league_id in db.session.scalars(select(League.id)).all():
+        version = response_cache.version(league_id)
+        if force:
+            written += static_publisher.publish(db.session, league_id, version)
+        else:
+            written += static_publisher.refresh(db.session, league_id, version)
+    db.session.rollback()
+    return written
+
+# Active players by rating for matchmaking, reloaded after writes
+rating_index = RatingIndexCache()
+
+# Bump the league's cache version after a successful write
+def invalidates_cache(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = f(*args, **kwargs)
+        status = response[1] if isinstance(response, tuple) else response.status_code
+        if status < 400:
+            response_cache.bump(g.league_id)
+        return response
+    return decorated_function
+
+# Every data route is served for the default league at its plain path and
+# for any league under /leagues/<league_id>, with the league in g.league_id
+def league_route(rule, **options):
+    def decorator(f):
+        app.add_url_rule(rule, view_func=f, **options)
+        app.add_url_rule(f'/leagues/<int:league_id>{rule}', view_func=f, **options)
+        return f
+    return decorator
+
+@app.url_value_preprocessor
+def pull_league_id(endpoint, values):
+    g.league_id = values.pop('league_id', DEFAULT_LEAGUE_ID) if values else DEFAULT_LEAGUE_ID
+
+@app.before_request
+def require_league():
+    if not league_exists(db.session, g.get('league_id', DEFAULT_LEAGUE_ID)):
+        return jsonify({"error": "League not found"}), 404
 
 def login_required(f):
     @wraps(f)
@@ -79,47 +202,165 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Create tables before handling the first request
-@app.before_request
-def create_tables():
-    db.create_all()
+# The schema is owned by Flask-Migrate: deploys run `flask db upgrade` (or
+# `flask init-db` on an empty database) before the server starts
+_migration_heads = None
+
+def migration_revisions():
+    global _migration_heads
+    if _migration_heads is None:
+        _migration_heads = set(ScriptDirectory.from_config(migrate.get_config()).get_heads())
+    with db.engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    return current, _migration_heads
 
 # Ping endpoint
 @app.route('/ping', methods=['GET'])
 def get_ping():
     return jsonify({"status": "ok"}), 200
 
+# Readiness endpoint: the database is reachable and fully migrated
+@app.route('/ready', methods=['GET'])
+def get_ready():
+    try:
+        current, heads = migration_revisions()
+    except SQLAlchemyError as e:
+        logging.error(f"Database error: {e}")
+        return jsonify({"status": "database unavailable"}), 503
+    if current != heads:
+        return jsonify({
+            "status": "migrations pending",
+            "current": sorted(current),
+            "head": sorted(heads)
+        }), 503
+    return jsonify({"status": "ready"}), 200
+
+# Request latency and SQL metrics for this worker process
+metrics = Metrics(slow_request_ms=app.config.get('SLOW_REQUEST_MS'))
+
+@app.before_request
+def start_request_trace():
+    if request.endpoint not in ('get_metrics', 'get_events'):
+        metrics.start(request.url_rule.rule if request.url_rule else '<unmatched>', request.method)
+
+@app.after_request
+def finish_request_trace(response):
+    trace = current_trace.get()
+    if trace is not None:
+        metrics.finish(trace, response.status_code, request.path)
+    return response
+
+# Compress JSON and text bodies for clients that accept it. Registered after
+# the trace hook so it runs first and its time is counted.
+@app.after_request
+def compress_response(response):
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.status_code in (204, 304) or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is not None and (response.content_length or 0) >= COMPRESS_MIN_BYTES:
+        response.set_data(compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+@app.teardown_request
+def clear_request_trace(exception=None):
+    current_trace.set(None)
+
+# Prometheus scrape endpoint
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render({"database": db.engine.pool}), mimetype='text/plain; version=0.0.4')
+
+# Server-Sent Events: game and player changes as they happen, so clients
+# patch their state instead of refetching. Each stream holds a worker
+# thread (see gunicorn.conf.py), so a worker holds at most
+# MAX_EVENT_STREAMS and refuses more with a 503, leaving threads for other
+# requests; clients then poll instead. The ASGI app has no such limit.
+@league_route('/events', methods=['GET'])
+def get_events():
+    if not event_broker.acquire_stream():
+        response = jsonify({"error": "Too many open event streams"})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    response = Response(event_broker.stream(g.league_id), mimetype='text/event-stream')
+    # Released when the server closes the response, even if the stream never started
+    response.call_on_close(event_broker.release_stream)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+# Connection pool usage for this worker process
+def pool_report():
+    with app.app_context():
+        return {"pid": os.getpid(), "database": pool_status(db.engine.pool)}
+
+@app.route('/pool', methods=['GET'])
+def get_pool():
+    return jsonify(pool_report()), 200
+
 # Handle options
-@app.route('/games', methods=['OPTIONS'])
+@league_route('/games', methods=['OPTIONS'])
 def handle_options():
     response = app.make_response('')
     response.headers.add('Access-Control-Allow-Methods', 'GET,POST,OPTIONS')
     response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
     return response
 
+# List leagues
+@app.route('/leagues', methods=['GET'])
+def get_leagues():
+    return jsonify(leagues_data(db.session)), 200
+
+# Get a league (require_league has already checked it exists)
+@app.route('/leagues/<int:league_id>', methods=['GET'])
+def get_league():
+    league = db.session.get(League, g.league_id)
+    return jsonify({"id": league.id, "name": league.name}), 200
+
+# Add a league
+@app.route('/leagues', methods=['POST'])
+@login_required
+def add_league():
+    data = request.get_json()
+    if not data or not str(data.get('name', '')).strip():
+        return jsonify({"error": "Invalid input"}), 400
+    name = str(data['name']).strip()
+    if League.query.filter_by(name=name).first():
+        return jsonify({"error": "A league with this name already exists"}), 409
+    league = League(name=name)
+    db.session.add(league)
+    db.session.commit()
+    return jsonify({"id": league.id, "name": league.name}), 201
+
 # Get all players
-@app.route('/players', methods=['GET'])
+@league_route('/players', methods=['GET'])
 def get_players():
-    players = Player.query.all()
-    return jsonify([{"id": player.id, "name": player.name, "rating": player.rating, "is_active": player.is_active} for player in players]), 200
+    try:
+        format = response_format(request.args)
+    except ValueError:
+        return jsonify({"error": "format must be 'objects' or 'compact'"}), 400
+    return cached_response(f'players.{format}', lambda: players_data(db.session, g.league_id, format))
 
 # Get a specific player by ID
-@app.route('/players/<int:player_id>', methods=['GET'])
+@league_route('/players/<int:player_id>', methods=['GET'])
 def get_player(player_id):
-    player = Player.query.get(player_id)
+    player = league_player(db.session, g.league_id, player_id)
     if player is None:
         return jsonify({"error": "Player not found"}), 404
-    return jsonify({"id": player.id, "name": player.name, "rating": player.rating}), 200
+    return jsonify(player_json(player)), 200
 
 # Add a new player
-@app.route('/players', methods=['POST'])
+@league_route('/players', methods=['POST'])
 @login_required
+@invalidates_cache
 def add_player():
     data = request.get_json()
     if not data or 'name' not in data:
         return jsonify({"error": "Invalid input"}), 400
     
-    existing_inactive_player = Player.query.filter_by(name=data['name'], is_active=False).first()
+    existing_inactive_player = Player.query.filter_by(league_id=g.league_id, name=data['name'], is_active=False).first()
 
     if existing_inactive_player:
         return jsonify({
@@ -127,58 +368,72 @@ def add_player():
             "player_id": existing_inactive_player.id
         }), 409
 
-    new_player = Player(name=data['name'], is_active=True)
+    new_player = Player(league_id=g.league_id, name=data['name'], is_active=True)
     db.session.add(new_player)
     db.session.commit()
-    return jsonify({"id": new_player.id, "name": new_player.name, "rating": new_player.rating}), 201
+    publish_event('player_added', {"player": player_json(new_player)})
+    return jsonify(player_json(new_player)), 201
 
 # Reactivate an inactive player
-@app.route('/players/reactivate/<int:player_id>', methods=['POST'])
+@league_route('/players/reactivate/<int:player_id>', methods=['POST'])
 @login_required
+@invalidates_cache
 def reactivate_player(player_id):
-    player = Player.query.get(player_id)
+    player = league_player(db.session, g.league_id, player_id)
     if not player or player.is_active:
         return jsonify({"error": "Player not found or already active"}), 404
     
     player.is_active = True
     db.session.commit()
+    publish_event('player_updated', {"player": player_json(player)})
     return jsonify({"message": "Player reactivated successfully", "id": player.id}), 200
 
 # Remove a player
-@app.route('/players/<int:player_id>', methods=['DELETE'])
+@league_route('/players/<int:player_id>', methods=['DELETE'])
 @login_required
+@invalidates_cache
 def remove_player(player_id):
-    player = Player.query.get(player_id)
+    player = league_player(db.session, g.league_id, player_id)
     if not player:
         return jsonify({"error": "Player not found"}), 404
     player.is_active = False
     db.session.commit()
+    publish_event('player_updated', {"player": player_json(player)})
     return jsonify({"message": "Player removed successfully"}), 200
 
-# Delete a player permanently
-@app.route('/players/<int:player_id>/delete', methods=['DELETE'])
+# Delete a player permanently, with all their games; queued for the worker
+# when it means replaying a large part of the league's history
+@league_route('/players/<int:player_id>/delete', methods=['DELETE'])
 @login_required
+@invalidates_cache
 def delete_player(player_id):
-    player = Player.query.get(player_id)
-    if not player:
+    if not league_player(db.session, g.league_id, player_id):
         return jsonify({"error": "Player not found"}), 404
-    
-    # Remove all related games
-    Game.query.filter(or_(Game.player1_id == player_id, Game.player2_id == player_id)).delete()
-    
-    db.session.delete(player)
-    db.session.commit()
-    return jsonify({"message": "Player and all related games deleted successfully"}), 200
+    first_game_at = db.session.scalar(
+        select(func.min(Game.timestamp)).where(or_(Game.player1_id == player_id, Game.player2_id == player_id)))
+    return run_or_queue('delete_player', replay_is_small(g.league_id, first_game_at),
+                        "Player and all related games deleted successfully", player_id=player_id)
 
 # Get rankings
-@app.route('/rankings', methods=['GET'])
+@league_route('/rankings', methods=['GET'])
 def get_rankings():
-    players = Player.query.filter_by(is_active=True).order_by(Player.rating.desc()).all()  # Sort by rating in descending order
-    return jsonify([{"id": player.id, "name": player.name, "rating": player.rating} for player in players]), 200
+    try:
+        format = response_format(request.args)
+    except ValueError:
+        return jsonify({"error": "format must be 'objects' or 'compact'"}), 400
+    as_of = request.args.get('as_of')
+    if as_of is None:
+        return cached_response(f'rankings.{format}', lambda: rankings_data(db.session, g.league_id, format=format))
+    try:
+        as_of = parse_timestamp(as_of)
+    except ValueError:
+        return jsonify({"error": "as_of must be an ISO 8601 timestamp"}), 400
+    return jsonify(rankings_data(db.session, g.league_id, as_of, format)), 200
 
 # Submit game results
-@app.route('/games', methods=['POST'])
+@league_route('/games', methods=['POST'])
 @login_required
+@invalidates_cache
 def add_game():
     try:
         data = request.get_json()
@@ -187,47 +442,38 @@ def add_game():
         if not data or 'player1_id' not in data or 'player2_id' not in data or 'player1_score' not in data or 'player2_score' not in data:
             return jsonify({"error": "Invalid input: player IDs and scores are required"}), 400
 
-        player1 = Player.query.get(data['player1_id'])
-        player2 = Player.query.get(data['player2_id'])
+        # The frontend sends ids as strings
+        try:
+            player1_id = int(data['player1_id'])
+            player2_id = int(data['player2_id'])
+            player1_score = int(data['player1_score'])
+            player2_score = int(data['player2_score'])
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid input: player IDs and scores must be integers"}), 400
+
+        # Lock both players before reading their ratings; concurrent games
+        # for either player wait here and then rate against our result
+        players = {player.id: player for player in lock_players({player1_id, player2_id}, g.league_id)}
+        player1 = players.get(player1_id)
+        player2 = players.get(player2_id)
         if not player1 or not player2:
             return jsonify({"error": "Player not found"}), 404
 
-        player1_score = int(data['player1_score'])
-        player2_score = int(data['player2_score'])
-
         # Ensure new game record is created
         prior_rating_player1 = player1.rating
         prior_rating_player2 = player2.rating
 
         # Calculate the result and rating changes
-        if player1_score > player2_score:
-            result = 'player1win'
-            score1 = 1
-            score2 = 0
-        elif player2_score > player1_score:
-            result = 'player2win'
-            score1 = 0
-            score2 = 1
-        else:
-            result = 'draw'
-            score1 = score2 = 0.5
-
-        K = 32
-        rating_diff = player2.rating - player1.rating
-        expected_score1 = 1 / (1 + 10 ** (rating_diff / 400))
-        expected_score2 = 1 - expected_score1
-
-        score_diff = abs(player1_score - player2_score)
-        margin_multiplier = (score_diff + 1) / 20
-
-        rating_change_player1 = int(K * margin_multiplier * (score1 - expected_score1))
-        rating_change_player2 = int(K * margin_multiplier * (score2 - expected_score2))
+        result = game_result(player1_score, player2_score)
+        rating_change_player1, rating_change_player2 = rating_system.rating_changes(
+            player1.rating, player2.rating, player1_score, player2_score)
 
         player1.rating += rating_change_player1
         player2.rating += rating_change_player2
 
         # Create a new game record with unique values for each game
         new_game = Game(
+            league_id=g.league_id,
             player1_id=player1.id,
             player2_id=player2.id,
             player1_score=player1_score,
@@ -241,16 +487,16 @@ def add_game():
 
         # Add the new game to the database and commit
         db.session.add(new_game)
+        apply_game(new_game)
+        update_snapshots(g.league_id)
         db.session.commit()
 
+        publish_event('game_added', {
+            "game": game_row(new_game, player1.name, player1.rating, player2.name, player2.rating),
+            "ratings": {player1.id: player1.rating, player2.id: player2.rating}
+        })
         return jsonify({
-            "id": new_game.id,
-            "player1_id": new_game.player1_id,
-            "player2_id": new_game.player2_id,
-            "player1_score": new_game.player1_score,
-            "player2_score": new_game.player2_score,
-            "result": new_game.result,
-            "timestamp": new_game.timestamp,
+            **game_json(new_game),
             "new_ratings": {
                 "player1": player1.rating,
                 "player2": player2.rating
@@ -262,146 +508,256 @@ def add_game():
         db.session.rollback()
         return jsonify({"error": "Internal server error"}), 500
 
-# Get all games
-@app.route('/games', methods=['GET'])
-def get_games():
-    games = Game.query.order_by(Game.timestamp.desc()).all()
-    game_data = []
-
-    for game in games:
-        player1 = Player.query.get(game.player1_id)
-        player2 = Player.query.get(game.player2_id)
-        game_data.append({
-            "id": game.id,
-            "player1_name": player1.name,
-            "player2_name": player2.name,
-            "player1_score": game.player1_score,
-            "player2_score": game.player2_score,
-            "result": game.result,
-            "timestamp": game.timestamp,
-            "prior_rating_player1": game.prior_rating_player1,
-            "prior_rating_player2": game.prior_rating_player2,
-            "rating_change_player1": game.rating_change_player1,
-            "rating_change_player2": game.rating_change_player2,
-            "new_rating_player1": player1.rating,
-            "new_rating_player2": player2.rating
-        })
+# Import many game results at once (JSON array, NDJSON or CSV body)
+@league_route('/games/bulk', methods=['POST'])
+@login_required
+@invalidates_cache
+def add_games_bulk():
+    try:
+        count = import_stream(text_stream(request.stream), format_for(request.content_type), g.league_id)
+        db.session.commit()
+        # Too many changes to push one by one
+        publish_event('resync')
+    except GameImportError as e:
+        db.session.rollback()
+        return jsonify({"error": "Invalid games, nothing was imported", "details": e.errors}), 400
+    except SQLAlchemyError as e:
+        logging.error(f"Database error: {e}")
+        db.session.rollback()
+        return jsonify({"error": "Internal server error"}), 500
+    return jsonify({"imported": count}), 201
 
-    return jsonify(game_data), 200
+# Get a page of games, newest first, with player names joined in
+@league_route('/games', methods=['GET'])
+def get_games():
+    try:
+        args = games_page_args(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid limit, cursor, date filter or format"}), 400
+    if args["limit"] < 1:
+        return jsonify({"error": "Limit must be positive"}), 400
+    return jsonify(games_page(db.session, g.league_id, **args)), 200
+
+# Everything the home and players pages need for first paint in one
+# response: players, rankings, the first page of games and auth status.
+# Not served from the response cache, as auth status is per session.
+@league_route('/bootstrap', methods=['GET'])
+def get_bootstrap():
+    try:
+        format = response_format(request.args)
+        limit = min(int(request.args.get('limit', DEFAULT_GAMES_LIMIT)), MAX_GAMES_LIMIT)
+    except ValueError:
+        return jsonify({"error": "Invalid limit or format"}), 400
+    if limit < 1:
+        return jsonify({"error": "Limit must be positive"}), 400
+    data = bootstrap_data(db.session, g.league_id, limit, format)
+    return jsonify({**data, "authenticated": session.get('authenticated', False)}), 200
+
+# Stream the full game history as NDJSON or CSV
+@league_route('/games/export', methods=['GET'])
+def export_games_route():
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        filters = {
+            "league_id": g.league_id,
+            "player_id": int(request.args['player_id']) if request.args.get('player_id') else None,
+            "start": parse_timestamp(request.args['start']) if request.args.get('start') else None,
+            "end": parse_timestamp(request.args['end']) if request.args.get('end') else None
+        }
+    except ValueError:
+        return jsonify({"error": "Invalid player or date filter"}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true')
+
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f"games.{export_format}" + ('.gz' if compress else '')
+    response = Response(
+        stream_with_context(export_games(export_format, compress, **filters)),
+        mimetype='application/gzip' if compress else mimetype
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 # Delete a game
-@app.route('/games/<int:game_id>', methods=['DELETE'])
+@league_route('/games/<int:game_id>', methods=['DELETE'])
 @login_required
+@invalidates_cache
 def delete_game(game_id):
-    game = Game.query.get(game_id)
+    game = Game.query.filter_by(id=game_id, league_id=g.league_id).first()
     if not game:
         return jsonify({"error": "Game not found"}), 404
-
-    # Fetch players
-    player1 = Player.query.get(game.player1_id)
-    player2 = Player.query.get(game.player2_id)
-
-    # Reverse the rating changes caused by this game
-    player1.rating -= game.rating_change_player1
-    player2.rating -= game.rating_change_player2
-
-    db.session.delete(game)
-    db.session.commit()
-    return jsonify({"message": "Game deleted successfully"}), 200
+    return run_or_queue('delete_game', replay_is_small(g.league_id, game.timestamp),
+                        "Game deleted successfully", game_id=game_id)
 
 # Edit a game
-@app.route('/games/<int:game_id>', methods=['PUT'])
+@league_route('/games/<int:game_id>', methods=['PUT'])
 @login_required
+@invalidates_cache
 def edit_game(game_id):
-    game = Game.query.get(game_id)
+    game = Game.query.filter_by(id=game_id, league_id=g.league_id).first()
     if not game:
         return jsonify({"error": "Game not found"}), 404
 
-    data = request.get_json()
-
-    # Fetch players
-    player1 = Player.query.get(game.player1_id)
-    player2 = Player.query.get(game.player2_id)
-
-    # Reverse the previous rating changes
-    player1.rating -= game.rating_change_player1
-    player2.rating -= game.rating_change_player2
-
-    # Update the scores
-    game.player1_score = data.get('player1_score', game.player1_score)
-    game.player2_score = data.get('player2_score', game.player2_score)
-
-    # Recalculate the result based on the new scores
-    if game.player1_score > game.player2_score:
-        game.result = 'player1win'
-        score1 = 1
-        score2 = 0
-    elif game.player2_score > game.player1_score:
-        game.result = 'player2win'
-        score1 = 0
-        score2 = 1
-    else:
-        game.result = 'draw'
-        score1 = score2 = 0.5
-
-    # Recalculate rating changes
-    K = 32
-    rating_diff = player2.rating - player1.rating
-    expected_score1 = 1 / (1 + 10 ** (rating_diff / 400))
-    expected_score2 = 1 - expected_score1
-
-    score_diff = abs(game.player1_score - game.player2_score)
-    margin_multiplier = (score_diff + 1) / 20
-
-    game.rating_change_player1 = int(K * margin_multiplier * (score1 - expected_score1))
-    game.rating_change_player2 = int(K * margin_multiplier * (score2 - expected_score2))
-
-    # Apply the new rating changes
-    player1.rating += game.rating_change_player1
-    player2.rating += game.rating_change_player2
+    # Same checks as imports.validate_games; omitted scores stay as they are
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid input: expected a JSON object"}), 400
+    try:
+        player1_score = int(data.get('player1_score', game.player1_score))
+        player2_score = int(data.get('player2_score', game.player2_score))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid input: scores must be integers"}), 400
+    if player1_score < 0 or player2_score < 0:
+        return jsonify({"error": "Invalid input: scores must not be negative"}), 400
 
-    db.session.commit()
-    return jsonify({"message": "Game updated successfully"}), 200
+    return run_or_queue('edit_game', replay_is_small(g.league_id, game.timestamp), "Game updated successfully",
+                        game_id=game_id, player1_score=player1_score, player2_score=player2_score)
 
 # Get game history for a specific player
-@app.route('/games/player/<int:player_id>', methods=['GET'])
+@league_route('/games/player/<int:player_id>', methods=['GET'])
 def get_player_games(player_id):
-    games = Game.query.filter((Game.player1_id == player_id) | (Game.player2_id == player_id)).all()
-    return jsonify([{
-        "player1_id": game.player1_id,
-        "player2_id": game.player2_id,
-        "player1_score": game.player1_score,
-        "player2_score": game.player2_score,
-        "result": game.result,
-        "timestamp": game.timestamp
-    } for game in games]), 200
+    try:
+        format = response_format(request.args)
+    except ValueError:
+        return jsonify({"error": "format must be 'objects' or 'compact'"}), 400
+    games = Game.query.filter(
+        Game.league_id == g.league_id, (Game.player1_id == player_id) | (Game.player2_id == player_id)).all()
+    return jsonify(formatted([game_json(game) for game in games], format, GAME_FIELDS)), 200
 
 # Get player profile and stats
-@app.route('/players/<int:player_id>/stats', methods=['GET'])
+@league_route('/players/<int:player_id>/stats', methods=['GET'])
 def get_player_stats(player_id):
-    player = Player.query.get(player_id)
-    if not player:
+    player_stats = player_stats_data(db.session, g.league_id, player_id)
+    if player_stats is None:
+        return jsonify({"error": "Player not found"}), 404
+    return jsonify(player_stats), 200
+
+# Get a player's rating over time, downsampled for charting
+@league_route('/players/<int:player_id>/rating-history', methods=['GET'])
+def get_rating_history(player_id):
+    try:
+        args = rating_history_args(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid date range, resolution or points"}), 400
+    history = rating_history_data(db.session, g.league_id, player_id, **args)
+    if history is None:
+        return jsonify({"error": "Player not found"}), 404
+    return jsonify(history), 200
+
+# Everything a player's profile needs for first paint in one response
+@league_route('/players/<int:player_id>/bootstrap', methods=['GET'])
+def get_player_bootstrap(player_id):
+    data = player_bootstrap_data(db.session, g.league_id, player_id)
+    if data is None:
         return jsonify({"error": "Player not found"}), 404
+    return jsonify({**data, "authenticated": session.get('authenticated', False)}), 200
 
-    # Count total games played
-    games_played = Game.query.filter(or_(Game.player1_id == player_id, Game.player2_id == player_id)).count()
+# Get a player's record against each opponent
+@league_route('/players/<int:player_id>/head-to-head', methods=['GET'])
+def get_player_head_to_head(player_id):
+    if league_player(db.session, g.league_id, player_id) is None:
+        return jsonify({"error": "Player not found"}), 404
+    return cached_response(f'head-to-head-{player_id}',
+                           lambda: player_head_to_head_data(db.session, g.league_id, player_id))
+
+# Get the head-to-head record of every pair that has played
+@league_route('/head-to-head', methods=['GET'])
+def get_head_to_head():
+    return cached_response('head-to-head', lambda: head_to_head_data(db.session, g.league_id))
+
+# Pair the players present (all active players by default) into balanced
+# matches: closest expected score, fewest recent meetings
+@league_route('/matchmaking', methods=['GET'])
+def get_matchmaking():
+    try:
+        player_ids = player_ids_arg(request.args.get('players'))
+    except ValueError:
+        return jsonify({"error": "players must be a comma-separated list of player ids"}), 400
+    index = rating_index.get(db.session, g.league_id, response_cache.version(g.league_id))
+    try:
+        return jsonify(pair_round(db.session, index, player_ids, g.league_id)), 200
+    except UnknownPlayersError as e:
+        return jsonify({"error": "Unknown or inactive players", "players": e.player_ids}), 404
 
-    # Count total wins (either as player1 or player2)
-    wins = Game.query.filter(or_(
-        (Game.player1_id == player_id) & (Game.result == 'player1win'),
-        (Game.player2_id == player_id) & (Game.result == 'player2win')
-    )).count()
+# Get stats for every player in one pass
+@league_route('/stats', methods=['GET'])
+def get_all_stats():
+    try:
+        format = response_format(request.args)
+    except ValueError:
+        return jsonify({"error": "format must be 'objects' or 'compact'"}), 400
+    return jsonify(all_stats_data(db.session, g.league_id, format)), 200
+
+# Maintenance jobs, run by `flask worker`; poll /jobs/<id> for progress
+def queued_job(kind, **params):
+    job = enqueue(kind, g.league_id, **params)
+    db.session.commit()
+    return jsonify(job_json(job)), 202
 
-    # Calculate losses
-    losses = games_played - wins
+# Queue a replay of the league's ratings from `since`, or its whole history
+@league_route('/ratings/replay', methods=['POST'])
+@login_required
+def queue_replay():
+    since = (request.get_json(silent=True) or {}).get('since')
+    try:
+        since and parse_timestamp(since)
+    except (TypeError, ValueError):
+        return jsonify({"error": "since must be an ISO 8601 timestamp"}), 400
+    return queued_job('replay_ratings', since=since)
+
+# Queue a rebuild of the league's player aggregates
+@league_route('/aggregates/rebuild', methods=['POST'])
+@login_required
+def queue_aggregates_rebuild():
+    return queued_job('rebuild_aggregates')
+
+# Queue an export of the league's games to a file, for /jobs/<id>/download
+@league_route('/games/export', methods=['POST'])
+@login_required
+def queue_export():
+    data = request.get_json(silent=True) or {}
+    export_format = data.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        player_id = int(data['player_id']) if data.get('player_id') is not None else None
+        for bound in ('start', 'end'):
+            if data.get(bound):
+                parse_timestamp(data[bound])
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid player or date filter"}), 400
+    return queued_job('export_games', format=export_format, compress=bool(data.get('gzip')),
+                      player_id=player_id, start=data.get('start'), end=data.get('end'))
+
+# The league's most recent jobs
+@league_route('/jobs', methods=['GET'])
+@login_required
+def get_jobs():
+    jobs = db.session.scalars(select(Job).where(Job.league_id == g.league_id).order_by(Job.id.desc()).limit(50))
+    return jsonify([job_json(job) for job in jobs]), 200
 
-    return jsonify({
-        "name": player.name,
-        "rating": player.rating,
-        "games_played": games_played,
-        "wins": wins,
-        "losses": losses
-    }), 200
+@league_route('/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    job = Job.query.filter_by(id=job_id, league_id=g.league_id).first()
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_json(job)), 200
+
+# Download the file written by a finished export job
+@league_route('/jobs/<int:job_id>/download', methods=['GET'])
+@login_required
+def download_job_file(job_id):
+    job = Job.query.filter_by(id=job_id, league_id=g.league_id).first()
+    if not job or job.kind != 'export_games':
+        return jsonify({"error": "Job not found"}), 404
+    if job.status != 'succeeded':
+        return jsonify({"error": f"Job is {job.status}"}), 409
+    path = os.path.join(job_files_dir(), job.result['file'])
+    if not os.path.exists(path):
+        return jsonify({"error": "Export file no longer available"}), 410
+    return send_file(path, as_attachment=True, download_name=job.result['filename'])
 
 @app.route('/login', methods=['POST'])
 def login():
@@ -422,6 +778,193 @@ def logout():
 def auth_status():
     return jsonify({'authenticated': session.get('authenticated', False)}), 200
 
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the schema on an empty database and mark it fully migrated."""
+    if inspect(db.engine).has_table('player'):
+        click.echo("Database already has tables; run `flask db upgrade` instead.", err=True)
+        sys.exit(1)
+    db.create_all()
+    db.session.add(League(id=DEFAULT_LEAGUE_ID, name='Default'))
+    db.session.commit()
+    stamp()
+    click.echo("Database created at the latest migration.")
+
+# Admin commands for the materialized player aggregates
+aggregates_cli = AppGroup('aggregates', help='Maintain the player aggregate table.')
+
+@aggregates_cli.command('rebuild')
+def rebuild_aggregates_command():
+    """Recompute every player's aggregates from the game table."""
+    count = rebuild_aggregates()
+    db.session.commit()
+    click.echo(f"Rebuilt aggregates for {count} players.")
+
+@aggregates_cli.command('verify')
+def verify_aggregates_command():
+    """Check the aggregate table against a fresh computation."""
+    drifted = verify_aggregates()
+    if drifted:
+        click.echo(f"Aggregates out of date for players: {', '.join(map(str, drifted))}")
+        sys.exit(1)
+    click.echo("Aggregates are consistent.")
+
+app.cli.add_command(aggregates_cli)
+
+# Admin commands for the rating history
+ratings_cli = AppGroup('ratings', help='Maintain player ratings.')
+
+@ratings_cli.command('replay')
+@click.option('--since', type=click.DateTime(), default=None,
+              help='Replay games from this timestamp onwards (default: the whole history).')
+def replay_ratings_command(since):
+    """Recompute ratings by replaying games in chronological order."""
+    started = time.perf_counter()
+    count = replay_ratings(since=since)
+    db.session.commit()
+    for league_id in db.session.scalars(select(League.id)):
+        response_cache.bump(league_id)
+    event_broker.publish('resync')
+    click.echo(f"Replayed {count} games in {time.perf_counter() - started:.2f}s.")
+
+@ratings_cli.command('snapshot')
+def snapshot_ratings_command():
+    """Rebuild the rating snapshots behind /rankings?as_of."""
+    invalidate_snapshots()
+    count = update_snapshots()
+    db.session.commit()
+    click.echo(f"Saved {count} rating snapshots.")
+
+def parse_param(ctx, param, values):
+    params = {}
+    for value in values:
+        name, _, options = value.partition('=')
+        try:
+            params[name] = [float(option) for option in options.split(',')]
+        except ValueError:
+            raise click.BadParameter(f"expected name=value[,value...], got {value!r}")
+    return params
+
+@ratings_cli.command('compare')
+def compare_ratings_command():
+    """Replay the full history under every rating system and compare predictive accuracy."""
+    games = load_game_arrays()
+    click.echo(f"{'system':<12}{'brier':>10}{'accuracy':>10}{'seconds':>10}")
+    for name, system in RATING_SYSTEMS.items():
+        started = time.perf_counter()
+        result = system().replay(games)
+        brier, accuracy = evaluate(result, games)
+        click.echo(f"{name:<12}{brier[0]:>10.4f}{accuracy[0]:>10.3f}{time.perf_counter() - started:>10.2f}")
+
+@ratings_cli.command('sweep')
+@click.argument('system', type=click.Choice(list(RATING_SYSTEMS)))
+@click.option('--param', 'params', multiple=True, callback=parse_param,
+              help='Parameter values to try, e.g. --param k=16,24,32 (repeatable).')
+@click.option('--top', default=10, show_default=True, help='Number of best parameter sets to show.')
+def sweep_ratings_command(system, params, top):
+    """Replay the full history once for every combination of parameter values."""
+    names = list(params)
+    grid = list(itertools.product(*params.values()))
+    try:
+        rating_system_under_test = get_rating_system(
+            system, **{name: [values[i] for values in grid] for i, name in enumerate(names)})
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    games = load_game_arrays()
+    started = time.perf_counter()
+    result = rating_system_under_test.replay(games)
+    brier, accuracy = evaluate(result, games)
+    click.echo(f"Replayed {len(games)} games x {len(result)} parameter sets in {time.perf_counter() - started:.2f}s.")
+
+    for index in brier.argsort()[:top]:
+        settings = ', '.join(f"{name}={result.params[name][index]:g}" for name in names) or 'defaults'
+        click.echo(f"brier={brier[index]:.4f} accuracy={accuracy[index]:.3f}  {settings}")
+
+app.cli.add_command(ratings_cli)
+
+@app.cli.command('import-games')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'import_format', type=click.Choice(IMPORT_FORMATS), default=None,
+              help='Input format (default: from the file extension, else JSON).')
+@click.option('--league-id', type=int, default=DEFAULT_LEAGUE_ID, show_default=True,
+              help='League the games and their players belong to.')
+def import_games_command(source, import_format, league_id):
+    """Import game results from a JSON, NDJSON or CSV file ('-' for stdin)."""
+    if db.session.get(League, league_id) is None:
+        raise click.BadParameter(f"no league {league_id}", param_hint='--league-id')
+    started = time.perf_counter()
+    try:
+        count = import_stream(source, import_format or format_for(filename=source.name), league_id)
+        db.session.commit()
+        response_cache.bump(league_id)
+        event_broker.publish('resync', league_id=league_id)
+    except GameImportError as e:
+        db.session.rollback()
+        for error in e.errors:
+            click.echo(f"row {error['row']}: {error['error']}" if error['row'] else error['error'], err=True)
+        sys.exit(1)
+    click.echo(f"Imported {count} games in {time.perf_counter() - started:.2f}s.")
+
+@app.cli.command('export-games')
+@click.option('--output', '-o', type=click.File('wb'), default='-', help='Output file (default: stdout).')
+@click.option('--format', 'export_format', type=click.Choice(EXPORT_FORMATS), default='ndjson', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip-compress the output.')
+@click.option('--start', type=click.DateTime(), default=None, help='Only games at or after this time.')
+@click.option('--end', type=click.DateTime(), default=None, help='Only games before this time.')
+@click.option('--player-id', type=int, default=None, help='Only games involving this player.')
+@click.option('--league-id', type=int, default=None, help='Only games in this league (default: every league).')
+def export_games_command(output, export_format, compress, start, end, player_id, league_id):
+    """Stream the game history with player names as NDJSON or CSV."""
+    for chunk in export_games(export_format, compress, start=start, end=end, player_id=player_id, league_id=league_id):
+        output.write(chunk)
+
+@app.cli.command('worker')
+@click.option('--poll-interval', type=float, default=1.0, show_default=True,
+              help='Seconds between checks for new jobs when the queue is empty.')
+@click.option('--once', is_flag=True, help='Exit once the queue is empty.')
+def worker_command(poll_interval, once):
+    """Run queued maintenance jobs (deletes, replays, rebuilds, exports) and keep the static JSON current."""
+    # Finish the current job on SIGTERM, then exit
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+
+    requeued = requeue_stale_jobs()
+    if requeued:
+        click.echo(f"Requeued {requeued} stale jobs.")
+    while not stopping:
+        if static_publisher is not None:
+            try:
+                publish_static_json()
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Static JSON publish failed: {e}")
+        job = claim_job()
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        job_id, kind, league_id = job.id, job.kind, job.league_id
+        started = time.perf_counter()
+        event = run_job(job)
+        if event is not None:
+            response_cache.bump(league_id)
+            event_broker.publish(*event, league_id)
+        click.echo(f"Job {job_id} ({kind}) {db.session.get(Job, job_id).status} in {time.perf_counter() - started:.2f}s.")
+        db.session.remove()
+
+@app.cli.command('publish-static')
+@click.option('--force', is_flag=True, help='Republish every league, changed or not.')
+def publish_static_command(force):
+    """Publish rankings, players, recent games and player stats as static JSON."""
+    if static_publisher is None:
+        click.echo("Set STATIC_JSON_DIR to publish static JSON.", err=True)
+        sys.exit(1)
+    started = time.perf_counter()
+    written = publish_static_json(force)
+    click.echo(f"Wrote {written} files in {time.perf_counter() - started:.2f}s.")
+
 # Define routes (e.g., /players, /games, etc.)
 @app.route('/')
 def home():
@@ -0,0 +1,243 @@
+import logging
+from functools import wraps
+from contextlib import asynccontextmanager
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route, Mount
+from werkzeug.http import parse_etags
+from app import app as flask_app, response_cache, cached_body, rating_index, event_broker, pool_report, metrics
+from config import DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_STATEMENT_TIMEOUT_MS
+from db_pool import InstrumentedAsyncQueuePool, pool_status
+from matchmaking import UnknownPlayersError, pair_round, player_ids_arg
+from metrics import MetricsMiddleware
+from serialization import CompressionMiddleware, response_format, negotiate_encoding, compress, COMPRESS_MIN_BYTES, \
+    parse_timestamp
+from models import DEFAULT_LEAGUE_ID
+from reads import players_data, rankings_data, games_page_args, games_page, player_stats_data, all_stats_data, \
+    rating_history_args, rating_history_data, head_to_head_data, player_head_to_head_data, league_exists, league_player
+
+# ASGI entry point (`gunicorn asgi:app -k uvicorn_worker.UvicornWorker`, or
+# ASYNC_READS=1 with gunicorn.conf.py): the read endpoints are served on an
+# async engine so slow database round trips don't tie up a worker, and every
+# other route falls through to the Flask app in a thread pool.
+
+# Keep aiosqlite's per-statement handoff logs out even when LOG_LEVEL is
+# DEBUG (app.py's default is INFO)
+logging.getLogger('aiosqlite').setLevel(logging.INFO)
+
+# Async drivers for the sync database URLs the Flask app is configured with
+ASYNC_DRIVERS = {
+    'postgres': 'postgresql+asyncpg',
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite'
+}
+
+def async_database_url(url):
+    url = make_url(url)
+    url = url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+    # asyncpg spells psycopg2's sslmode as ssl
+    if 'sslmode' in url.query:
+        url = url.difference_update_query(['sslmode']).update_query_dict({'ssl': url.query['sslmode']})
+    return url
+
+def async_engine_options(url):
+    options = {
+        # Explicit so SQLite (NullPool by default under aiosqlite) pools too
+        'poolclass': InstrumentedAsyncQueuePool,
+        'pool_size': flask_app.config['ASYNC_DB_POOL_SIZE'],
+        'max_overflow': flask_app.config['ASYNC_DB_MAX_OVERFLOW'],
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': True
+    }
+    if DB_STATEMENT_TIMEOUT_MS and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(int(DB_STATEMENT_TIMEOUT_MS))}}
+    return options
+
+database_url = async_database_url(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+engine = create_async_engine(database_url, **async_engine_options(database_url))
+async_session = async_sessionmaker(engine, expire_on_commit=False)
+metrics.pools['async_database'] = engine.sync_engine.pool
+
+# Run one of the sync payload builders from reads.py on an async session
+async def read(build, *args):
+    async with async_session() as session:
+        return await session.run_sync(build, *args)
+
+# Same JSON encoding as jsonify in the Flask routes (dates included)
+def json_response(data, status_code=200):
+    return Response(f"{flask_app.json.dumps(data, separators=(',', ':'))}\n", status_code=status_code, media_type='application/json')
+
+def error_response(message, status_code):
+    return json_response({"error": message}, status_code)
+
+# Resolve the request's league (/leagues/{league_id}/... or the default) and
+# pass it to the endpoint; unknown leagues are a 404
+def league_endpoint(endpoint):
+    @wraps(endpoint)
+    async def resolve(request):
+        league_id = request.path_params.get('league_id', DEFAULT_LEAGUE_ID)
+        if not await read(league_exists, league_id):
+            return error_response("League not found", 404)
+        return await endpoint(request, league_id)
+    return resolve
+
+# Async counterpart of app.cached_response, sharing its cache, ETags and
+# compressed bodies
+async def cached_response(request, league_id, key, build):
+    version = response_cache.version(league_id)
+    etag = f"{key}-{version}"
+    headers = {"ETag": f'W/"{etag}"', "Cache-Control": "no-cache"}
+    if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+        return Response(status_code=304, headers=headers)
+    body = response_cache.get(league_id, key, version)
+    if body is None:
+        body = flask_app.json.dumps(await read(build))
+        response_cache.set(league_id, key, version, body)
+    # Varies with Accept-Encoding whether or not this client gets it compressed
+    headers["Vary"] = "Accept-Encoding"
+    encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+    if encoding is not None and len(body) >= COMPRESS_MIN_BYTES:
+        body = cached_body(league_id, f"{key}.{encoding}", version, lambda: compress(body, encoding))
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type='application/json', headers=headers)
+
+@league_endpoint
+async def get_players(request, league_id):
+    try:
+        format = response_format(request.query_params)
+    except ValueError:
+        return error_response("format must be 'objects' or 'compact'", 400)
+    return await cached_response(request, league_id, f'players.{format}',
+                                 lambda session: players_data(session, league_id, format))
+
+@league_endpoint
+async def get_rankings(request, league_id):
+    try:
+        format = response_format(request.query_params)
+    except ValueError:
+        return error_response("format must be 'objects' or 'compact'", 400)
+    as_of = request.query_params.get('as_of')
+    if as_of is None:
+        return await cached_response(request, league_id, f'rankings.{format}',
+                                     lambda session: rankings_data(session, league_id, format=format))
+    try:
+        as_of = parse_timestamp(as_of)
+    except ValueError:
+        return error_response("as_of must be an ISO 8601 timestamp", 400)
+    return json_response(await read(rankings_data, league_id, as_of, format))
+
+@league_endpoint
+async def get_games(request, league_id):
+    try:
+        args = games_page_args(request.query_params)
+    except ValueError:
+        return error_response("Invalid limit, cursor, date filter or format", 400)
+    if args["limit"] < 1:
+        return error_response("Limit must be positive", 400)
+    return json_response(await read(lambda session: games_page(session, league_id, **args)))
+
+@league_endpoint
+async def get_player_stats(request, league_id):
+    player_stats = await read(player_stats_data, league_id, request.path_params['player_id'])
+    if player_stats is None:
+        return error_response("Player not found", 404)
+    return json_response(player_stats)
+
+@league_endpoint
+async def get_rating_history(request, league_id):
+    try:
+        args = rating_history_args(request.query_params)
+    except ValueError:
+        return error_response("Invalid date range, resolution or points", 400)
+    history = await read(
+        lambda session: rating_history_data(session, league_id, request.path_params['player_id'], **args))
+    if history is None:
+        return error_response("Player not found", 404)
+    return json_response(history)
+
+@league_endpoint
+async def get_player_head_to_head(request, league_id):
+    player_id = request.path_params['player_id']
+    if await read(league_player, league_id, player_id) is None:
+        return error_response("Player not found", 404)
+    return await cached_response(request, league_id, f'head-to-head-{player_id}',
+                                 lambda session: player_head_to_head_data(session, league_id, player_id))
+
+@league_endpoint
+async def get_head_to_head(request, league_id):
+    return await cached_response(request, league_id, 'head-to-head',
+                                 lambda session: head_to_head_data(session, league_id))
+
+@league_endpoint
+async def get_matchmaking(request, league_id):
+    try:
+        player_ids = player_ids_arg(request.query_params.get('players'))
+    except ValueError:
+        return error_response("players must be a comma-separated list of player ids", 400)
+    version = response_cache.version(league_id)
+    try:
+        return json_response(await read(
+            lambda session: pair_round(session, rating_index.get(session, league_id, version), player_ids, league_id)))
+    except UnknownPlayersError as e:
+        return json_response({"error": "Unknown or inactive players", "players": e.player_ids}, 404)
+
+@league_endpoint
+async def get_all_stats(request, league_id):
+    try:
+        format = response_format(request.query_params)
+    except ValueError:
+        return error_response("format must be 'objects' or 'compact'", 400)
+    return json_response(await read(all_stats_data, league_id, format))
+
+# Server-Sent Events, held open on the event loop rather than a thread
+@league_endpoint
+async def get_events(request, league_id):
+    return StreamingResponse(event_broker.async_stream(league_id), media_type='text/event-stream',
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Pool report for this worker, including the async engine's pool
+async def get_pool(request):
+    return json_response({**pool_report(), "async_database": pool_status(engine.sync_engine.pool)})
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await engine.dispose()
+
+# The Flask app sets CORS headers, records metrics and compresses responses
+# for its own routes
+tracked = [Middleware(MetricsMiddleware, metrics=metrics), Middleware(CompressionMiddleware)]
+cors = [Middleware(CORSMiddleware, allow_origins=flask_app.config['CORS_ORIGINS'], allow_credentials=True)]
+middleware = tracked + cors
+
+# Each endpoint for the default league and under /leagues/{league_id}
+def league_routes(path, endpoint, middleware):
+    return [
+        Route(path, endpoint, methods=['GET'], middleware=middleware),
+        Route(f'/leagues/{{league_id:int}}{path}', endpoint, methods=['GET'], middleware=middleware)
+    ]
+
+app = Starlette(
+    routes=[
+        *league_routes('/players', get_players, middleware),
+        *league_routes('/rankings', get_rankings, middleware),
+        *league_routes('/games', get_games, middleware),
+        *league_routes('/players/{player_id:int}/stats', get_player_stats, middleware),
+        *league_routes('/players/{player_id:int}/rating-history', get_rating_history, middleware),
+        *league_routes('/players/{player_id:int}/head-to-head', get_player_head_to_head, middleware),
+        *league_routes('/head-to-head', get_head_to_head, middleware),
+        *league_routes('/matchmaking', get_matchmaking, middleware),
+        *league_routes('/stats', get_all_stats, middleware),
+        # Long-lived, so neither timed nor buffered for compression
+        *league_routes('/events', get_events, cors),
+        Route('/pool', get_pool, methods=['GET'], middleware=tracked),
+        Mount('/', WSGIMiddleware(flask_app))
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,109 @@
+"""Fire parallel game submissions at a running server and check that the
+ratings it ends up with match a serial replay of the same games.
+
+Point it at a multi-worker deployment backed by PostgreSQL, e.g.
+
+    gunicorn -w 8 app:app
+    ADMIN_PASSWORD=... python -m benchmarks.concurrent_submissions --url http://localhost:8000
+
+Players are created fresh for each run; a small pool makes most submissions
+contend for the same rows. Exits non-zero if any rating diverges.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from ratings import Elo
+
+class Client:
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def request(self, method, path, data=None):
+        body = json.dumps(data).encode('utf-8') if data is not None else None
+        request = urllib.request.Request(self.url + path, data=body, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        with self.opener.open(request) as response:
+            return response.read()
+
+    def json(self, method, path, data=None):
+        return json.loads(self.request(method, path, data))
+
+# Replay the games serially, in the order the server stored them, and return
+# (games whose stored prior ratings disagree, final ratings)
+def serial_replay(games, initial_ratings):
+    system = Elo()
+    ratings = dict(initial_ratings)
+    mismatched = []
+    for game in games:
+        prior1 = ratings[game["player1_id"]]
+        prior2 = ratings[game["player2_id"]]
+        if not (math.isclose(prior1, game["prior_rating_player1"])
+                and math.isclose(prior2, game["prior_rating_player2"])):
+            mismatched.append(game["id"])
+        change1, change2 = system.rating_changes(prior1, prior2, game["player1_score"], game["player2_score"])
+        ratings[game["player1_id"]] = prior1 + change1
+        ratings[game["player2_id"]] = prior2 + change2
+    return mismatched, ratings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--password', default=os.environ.get('ADMIN_PASSWORD'))
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--games', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    client = Client(args.url)
+    client.json('POST', '/login', {"password": args.password})
+
+    run = time.strftime('%Y%m%d%H%M%S')
+    players = [client.json('POST', '/players', {"name": f"Load {run} {i}"}) for i in range(args.players)]
+    player_ids = {player["id"] for player in players}
+
+    rng = random.Random(args.seed)
+    submissions = []
+    for _ in range(args.games):
+        player1, player2 = rng.sample(players, 2)
+        submissions.append({
+            "player1_id": player1["id"], "player2_id": player2["id"],
+            "player1_score": rng.randint(0, 21), "player2_score": rng.randint(0, 21)
+        })
+
+    # The session cookie lives in the shared opener's (thread-safe) cookie jar
+    def submit(submission):
+        return client.request('POST', '/games', submission)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(submit, submissions))
+    elapsed = time.perf_counter() - started
+    print(f"Submitted {args.games} games with {args.concurrency} threads in {elapsed:.2f}s "
+          f"({args.games / elapsed:.0f} games/s)")
+
+    games = [
+        game for game in map(json.loads, client.request('GET', '/games/export?format=ndjson').splitlines())
+        if game["player1_id"] in player_ids
+    ]
+    mismatched, expected = serial_replay(games, {player["id"]: player["rating"] for player in players})
+    actual = {player["id"]: player["rating"] for player in client.json('GET', '/players') if player["id"] in player_ids}
+    diverged = [player_id for player_id in player_ids if not math.isclose(expected[player_id], actual[player_id])]
+
+    print(f"Stored games: {len(games)} of {args.games}")
+    print(f"Games with inconsistent prior ratings: {len(mismatched)}")
+    print(f"Players whose final rating differs from a serial replay: {len(diverged)}")
+    for player_id in diverged:
+        print(f"  player {player_id}: expected {expected[player_id]:.4f}, got {actual[player_id]:.4f}")
+    if len(games) != args.games or mismatched or diverged:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Query plans and timings for the hot game/player queries, with and
+without the indexes from migrations 8d2b6e41c0f7 and c7a3d5e8f1b2.
+
+    python -m benchmarks.index_benchmark --games 1000000
+    python -m benchmarks.index_benchmark --db postgresql://localhost/rallyrank_bench
+"""
+import argparse
+import time
+from sqlalchemy import create_engine, select, or_, func, text
+from sqlalchemy.orm import aliased
+from models import Player, Game, DEFAULT_LEAGUE_ID
+from stats import player_perspective
+from benchmarks.seed import seed_league
+
+def hot_queries(player_id, player_name, league_id=DEFAULT_LEAGUE_ID):
+    player1 = aliased(Player)
+    player2 = aliased(Player)
+    perspective = player_perspective([player_id])
+    return {
+        # GET /games, first page
+        "game feed page": (
+            select(Game.id, player1.name, player2.name)
+            .join(player1, Game.player1_id == player1.id)
+            .join(player2, Game.player2_id == player2.id)
+            .where(Game.league_id == league_id)
+            .order_by(Game.timestamp.desc(), Game.id.desc())
+            .limit(50)
+        ),
+        # GET /games?player_id=, GET /games/player/<id>, delete_player
+        "player games": (
+            select(Game.id)
+            .where(or_(Game.player1_id == player_id, Game.player2_id == player_id))
+            .order_by(Game.timestamp.desc())
+            .limit(50)
+        ),
+        # /players/<id>/stats rating history
+        "player rating history": (
+            select(perspective.c.timestamp, perspective.c.rating_after)
+            .order_by(perspective.c.timestamp)
+        ),
+        # Replay suffix read
+        "replay suffix": (
+            select(func.count()).select_from(
+                select(Game.id).where(
+                    Game.league_id == league_id,
+                    Game.timestamp >= select(func.max(Game.timestamp)).where(Game.league_id == league_id).scalar_subquery()
+                ).order_by(Game.timestamp, Game.id).subquery()
+            )
+        ),
+        # GET /rankings
+        "rankings": (
+            select(Player.id).where(Player.league_id == league_id, Player.is_active == True).order_by(Player.rating.desc())
+        ),
+        # POST /players inactive-name check
+        "player by name": (
+            select(Player.id).where(Player.league_id == league_id, Player.name == player_name, Player.is_active == False)
+        )
+    }
+
+def explain(connection, query):
+    sql = str(query.compile(connection, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == 'postgresql':
+        rows = connection.execute(text(f"EXPLAIN ANALYZE {sql}"))
+        return '\n'.join(row[0] for row in rows)
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+    return '\n'.join(row[-1] for row in rows)
+
+def time_query(connection, query, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        connection.execute(query).fetchall()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def run(engine, label, queries, repeat, show_plans):
+    results = {}
+    with engine.connect() as connection:
+        for name, query in queries.items():
+            results[name] = time_query(connection, query, repeat)
+            if show_plans:
+                print(f"--- {label}: {name}")
+                print(explain(connection, query))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='sqlite:///benchmarks/index_benchmark.db', help='Database URL (will be reset).')
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--games', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-plans', dest='show_plans', action='store_false')
+    args = parser.parse_args()
+
+    engine = create_engine(args.db)
+    started = time.perf_counter()
+    seed_league(engine, players=args.players, games=args.games)
+    print(f"Seeded {args.players} players / {args.games} games in {time.perf_counter() - started:.1f}s")
+
+    indexes = [index for table in (Game.__table__, Player.__table__) for index in table.indexes]
+    queries = hot_queries(player_id=1, player_name="Player 1")
+
+    for index in indexes:
+        index.drop(engine)
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    before = run(engine, "without indexes", queries, args.repeat, args.show_plans)
+
+    for index in indexes:
+        index.create(engine)
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    after = run(engine, "with indexes", queries, args.repeat, args.show_plans)
+
+    print(f"\n{'query':<24}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in queries:
+        print(f"{name:<24}{before[name] * 1000:>12.2f}{after[name] * 1000:>12.2f}"
+              f"{before[name] / max(after[name], 1e-9):>9.1f}x")
+
+if __name__ == '__main__':
+    main()
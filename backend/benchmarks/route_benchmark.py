@@ -0,0 +1,215 @@
+"""Latency percentiles, queries per request and memory for the app's routes
+against a seeded synthetic league. Results are written as JSON tagged with
+the commit, so runs can be compared across commits.
+
+    python -m benchmarks.route_benchmark --profile small
+    python -m benchmarks.route_benchmark --profile large --db postgresql://localhost/rallyrank_bench
+    python -m benchmarks.route_benchmark --profile small --reuse --compare benchmarks/results/small-sqlite-1a2b3c4d.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from sqlalchemy import create_engine, event, inspect, select, func
+from sqlalchemy.engine import Engine
+from benchmarks.seed import seed_league, LEAGUE_PROFILES
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Statements executed since the counter was last reset
+query_count = [0]
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_query(*args):
+    query_count[0] += 1
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+# Prepare the database the way a deploy would: schema at the migration head,
+# ratings replayed and aggregates built
+def prepare_league(app, engine, args):
+    from flask_migrate import stamp
+    from models import db, Player
+    from replay import replay_ratings
+    from aggregates import rebuild_aggregates
+
+    with app.app_context():
+        seeded = False
+        if args.reuse and inspect(engine).has_table('player'):
+            seeded = db.session.scalar(select(func.count(Player.id))) == args.players
+        if not seeded:
+            started = time.perf_counter()
+            seed_league(engine, players=args.players, games=args.games, seed=args.seed)
+            stamp()
+            replay_ratings()
+            rebuild_aggregates()
+            db.session.commit()
+            print(f"Seeded {args.players} players / {args.games} games in {time.perf_counter() - started:.1f}s")
+
+# The busiest player and a typical one, to exercise per-player routes at
+# both ends of the activity distribution
+def sample_players(app):
+    from models import db
+    from stats import player_perspective
+    with app.app_context():
+        perspective = player_perspective()
+        counts = db.session.execute(
+            select(perspective.c.player_id, func.count()).group_by(perspective.c.player_id).order_by(func.count().desc())
+        ).all()
+    return counts[0][0], counts[len(counts) // 2][0]
+
+def benchmark_routes(busiest, typical):
+    from app import response_cache
+    from models import DEFAULT_LEAGUE_ID
+    uncached = lambda: response_cache.bump(DEFAULT_LEAGUE_ID)
+    return [
+        # (name, method, path, body, setup run before each request, untimed)
+        ("GET /rankings", 'GET', '/rankings', None, None),
+        ("GET /rankings (uncached)", 'GET', '/rankings', None, uncached),
+        ("GET /players (uncached)", 'GET', '/players', None, uncached),
+        ("GET /games", 'GET', '/games', None, None),
+        ("GET /games?player_id (busiest)", 'GET', f'/games?player_id={busiest}', None, None),
+        ("GET /games/player/<id> (busiest)", 'GET', f'/games/player/{busiest}', None, None),
+        ("GET /games/player/<id> (typical)", 'GET', f'/games/player/{typical}', None, None),
+        ("GET /players/<id>/stats (busiest)", 'GET', f'/players/{busiest}/stats', None, None),
+        ("GET /players/<id>/stats (typical)", 'GET', f'/players/{typical}/stats', None, None),
+        ("GET /players/<id>/rating-history (busiest)", 'GET', f'/players/{busiest}/rating-history', None, None),
+        ("GET /players/<id>/head-to-head (busiest)", 'GET', f'/players/{busiest}/head-to-head', None, uncached),
+        ("GET /head-to-head (uncached)", 'GET', '/head-to-head', None, uncached),
+        ("GET /stats", 'GET', '/stats', None, None),
+        # Writes last: they change what the reads above would see
+        ("POST /games", 'POST', '/games',
+         {"player1_id": busiest, "player2_id": typical, "player1_score": 21, "player2_score": 17}, None)
+    ]
+
+def measure(client, method, path, body, setup, requests, warmup):
+    for _ in range(warmup):
+        if setup:
+            setup()
+        client.open(path, method=method, json=body)
+
+    timings = []
+    queries = []
+    size = 0
+    for _ in range(requests):
+        if setup:
+            setup()
+        query_count[0] = 0
+        started = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        timings.append(time.perf_counter() - started)
+        queries.append(query_count[0])
+        size = len(response.data)
+        if response.status_code >= 400:
+            raise SystemExit(f"{method} {path} returned {response.status_code}: {response.data[:200]!r}")
+
+    # One more request under tracemalloc for peak allocation (slow, untimed)
+    if setup:
+        setup()
+    tracemalloc.start()
+    client.open(path, method=method, json=body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "requests": requests,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "queries_per_request": statistics.fmean(queries),
+        "response_bytes": size,
+        "peak_alloc_kib": peak / 1024
+    }
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({(baseline.get('commit') or '?')[:8]})")
+    print(f"{'route':<44}{'p50 before':>12}{'p50 after':>11}{'change':>9}{'queries':>12}")
+    for name, result in results["routes"].items():
+        before = baseline["routes"].get(name)
+        if before is None:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0
+        print(f"{name:<44}{before['p50_ms']:>12.2f}{result['p50_ms']:>11.2f}{change:>+9.0%}"
+              f"{before['queries_per_request']:>6.1f} ->{result['queries_per_request']:>4.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=LEAGUE_PROFILES, default='small')
+    parser.add_argument('--players', type=int, help='Override the profile.')
+    parser.add_argument('--games', type=int, help='Override the profile.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help='Database URL (reset unless --reuse); defaults to a SQLite file per profile.')
+    parser.add_argument('--reuse', action='store_true', help='Keep an already seeded database of the same size.')
+    parser.add_argument('--requests', type=int, default=100, help='Timed requests per route.')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<profile>-<dialect>-<commit>.json).')
+    parser.add_argument('--compare', help='Earlier results file to compare against.')
+    args = parser.parse_args()
+
+    profile_players, profile_games = LEAGUE_PROFILES[args.profile]
+    args.players = args.players or profile_players
+    args.games = args.games or profile_games
+    db_url = args.db or f"sqlite:///{os.path.join(os.path.dirname(os.path.abspath(__file__)), f'route_benchmark_{args.profile}.db')}"
+
+    # The app reads its configuration at import time
+    os.environ.update(FLASK_ENV='development', LOCAL_DB_URI=db_url, LOG_LEVEL='WARNING')
+    os.environ.setdefault('ADMIN_PASSWORD', 'benchmark')
+    os.environ.pop('SLOW_REQUEST_MS', None)
+    from app import app, ADMIN_PASSWORD
+
+    engine = create_engine(db_url)
+    prepare_league(app, engine, args)
+    busiest, typical = sample_players(app)
+
+    client = app.test_client()
+    client.post('/login', json={"password": ADMIN_PASSWORD})
+
+    commit, dirty = git_commit()
+    results = {
+        "commit": commit,
+        "dirty": dirty,
+        "run_at": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "league": {"profile": args.profile, "players": args.players, "games": args.games, "seed": args.seed},
+        "routes": {}
+    }
+    print(f"\n{'route':<44}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KiB':>10}")
+    for name, method, path, body, setup in benchmark_routes(busiest, typical):
+        result = results["routes"][name] = measure(client, method, path, body, setup, args.requests, args.warmup)
+        print(f"{name:<44}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+              f"{result['queries_per_request']:>9.1f}{result['peak_alloc_kib']:>10.0f}")
+    results["max_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{args.profile}-{results['database']}-{(commit or 'unknown')[:8]}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nMax RSS {results['max_rss_kib'] / 1024:.0f} MiB; results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import bisect
+import itertools
+import math
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from models import db, League, Player, Game, DEFAULT_LEAGUE_ID
+
+# Named league sizes: (players, games)
+LEAGUE_PROFILES = {
+    'small': (100, 10000),
+    'medium': (1000, 100000),
+    'large': (10000, 1000000)
+}
+
+# Relative weights for when games get played: weekdays over weekends, and
+# lunchtime and after-work peaks within a day
+WEEKDAY_WEIGHTS = (1.0, 1.0, 1.0, 1.0, 0.9, 0.35, 0.3)
+HOUR_WEIGHTS = (0, 0, 0, 0, 0, 0, 0, 0.1, 0.3, 0.4, 0.5, 0.8, 2.0, 1.6, 0.6, 0.5, 0.7, 1.5, 1.8, 1.4, 0.9, 0.4, 0.1, 0)
+
+# Sorted timestamps spread over `days` from `start`, busier as the league
+# grows, following the weekday and hour-of-day weights
+def game_timestamps(rng, games, start, days):
+    day_weights = [
+        WEEKDAY_WEIGHTS[(start + timedelta(days=day)).weekday()] * (0.5 + day / max(days, 1))
+        for day in range(days)
+    ]
+    day_cumulative = list(itertools.accumulate(day_weights))
+    hour_cumulative = list(itertools.accumulate(HOUR_WEIGHTS))
+    timestamps = [
+        start + timedelta(
+            days=bisect.bisect(day_cumulative, rng.random() * day_cumulative[-1]),
+            hours=bisect.bisect(hour_cumulative, rng.random() * hour_cumulative[-1]),
+            seconds=rng.randrange(3600)
+        )
+        for _ in range(games)
+    ]
+    timestamps.sort()
+    return timestamps
+
+# Scores to 21 (win by two) where the better player usually wins and close
+# skill makes for closer games
+def game_scores(rng, skill1, skill2):
+    gap = skill1 - skill2
+    player1_wins = rng.random() < 1 / (1 + math.exp(-1.2 * gap))
+    loser = max(0, min(20, round(rng.gauss(16 - 3 * abs(gap), 3.5))))
+    if loser == 20:
+        # Deuce: play on until someone leads by two
+        extra = int(rng.expovariate(0.7))
+        winner, loser = 22 + extra, 20 + extra
+    else:
+        winner = 21
+    return (winner, loser) if player1_wins else (loser, winner)
+
+# Seed a synthetic league directly through an engine (no Flask app needed).
+# Players get a latent skill and a heavy-tailed activity level, so a few
+# regulars play most games; timestamps follow weekly and daily rhythms over
+# `days` (by default about a year at the league's size).
+# Ratings columns get plausible placeholder values; run a replay afterwards
+# if the benchmark depends on them being consistent.
+# The database is reset first unless `reset` is false, in which case the
+# league is added alongside those already there.
+def seed_league(engine, players=100, games=10000, start=datetime(2020, 1, 1), seed=0, batch_size=50000, days=None,
+                league_id=DEFAULT_LEAGUE_ID, reset=True):
+    rng = random.Random(seed)
+    if reset:
+        db.metadata.drop_all(engine)
+        db.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        connection.execute(insert(League), [{"id": league_id, "name": f"League {league_id}"}])
+        connection.execute(insert(Player), [
+            {"league_id": league_id, "name": f"Player {i}", "rating": 1000, "is_active": rng.random() > 0.1}
+            for i in range(players)
+        ])
+        player_ids = connection.scalars(
+            select(Player.id).where(Player.league_id == league_id).order_by(Player.id)).all()
+
+    skills = {player_id: rng.gauss(0, 1) for player_id in player_ids}
+    activity = list(itertools.accumulate(rng.lognormvariate(0, 1) for _ in player_ids))
+    days = days or max(1, round(games / max(players / 4, 10)))
+    timestamps = game_timestamps(rng, games, start, days)
+
+    for offset in range(0, games, batch_size):
+        rows = []
+        for timestamp in timestamps[offset:offset + batch_size]:
+            player1_id, player2_id = rng.choices(player_ids, cum_weights=activity, k=2)
+            while player2_id == player1_id:
+                player2_id = rng.choices(player_ids, cum_weights=activity)[0]
+            player1_score, player2_score = game_scores(rng, skills[player1_id], skills[player2_id])
+            rows.append({
+                "league_id": league_id,
+                "player1_id": player1_id,
+                "player2_id": player2_id,
+                "player1_score": player1_score,
+                "player2_score": player2_score,
+                "result": 'player1win' if player1_score > player2_score else 'player2win',
+                "timestamp": timestamp,
+                "prior_rating_player1": 1000,
+                "prior_rating_player2": 1000,
+                "rating_change_player1": 0,
+                "rating_change_player2": 0
+            })
+        with engine.begin() as connection:
+            connection.execute(insert(Game), rows)
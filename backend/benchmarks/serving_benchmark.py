@@ -0,0 +1,120 @@
+"""Throughput of the read endpoints under the sync Flask deployment and the
+async ASGI one (ASYNC_READS=1), with the same number of gunicorn workers.
+
+    python -m benchmarks.serving_benchmark --workers 2
+    python -m benchmarks.serving_benchmark --db postgresql://localhost/rallyrank_bench
+
+The async mode pays off once database round trips are slow, so compare on
+PostgreSQL (ideally over a network) rather than only on local SQLite.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine
+from benchmarks.seed import seed_league
+
+READ_PATHS = ('/rankings', '/players', '/games?limit=50', '/games?limit=50&player_id=1', '/players/1/stats', '/stats')
+
+def server_env(db_url, async_reads):
+    env = dict(os.environ, FLASK_APP='app', FLASK_ENV='development', LOCAL_DB_URI=db_url)
+    env.setdefault('ADMIN_PASSWORD', 'benchmark')
+    env.pop('ASYNC_READS', None)
+    if async_reads:
+        env['ASYNC_READS'] = '1'
+    return env
+
+def flask_command(db_url, *args):
+    subprocess.run([sys.executable, '-m', 'flask', *args], env=server_env(db_url, False),
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url + '/ping').read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise SystemExit(f"Server at {url} did not come up")
+
+# Hammer the read paths round-robin from `concurrency` threads for `duration`
+# seconds; returns (requests, errors, sorted latencies)
+def load(url, paths, concurrency, duration):
+    deadline = time.monotonic() + duration
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client(offset):
+        local = []
+        failed = 0
+        i = offset
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                urllib.request.urlopen(url + paths[i % len(paths)]).read()
+                local.append(time.perf_counter() - started)
+            except (urllib.error.URLError, ConnectionError):
+                failed += 1
+            i += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    latencies.sort()
+    return len(latencies), errors[0], latencies
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='sqlite:///benchmarks/serving_benchmark.db', help='Database URL (will be reset).')
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers for both modes.')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent client threads.')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--port', type=int, default=8642)
+    args = parser.parse_args()
+
+    db_url = args.db
+    if db_url.startswith('sqlite:///') and not db_url.startswith('sqlite:////'):
+        # The servers run in subprocesses; pin the file regardless of cwd
+        db_url = 'sqlite:///' + os.path.abspath(db_url[len('sqlite:///'):])
+
+    seed_league(create_engine(db_url), players=args.players, games=args.games)
+    flask_command(db_url, 'db', 'stamp', 'head')
+    flask_command(db_url, 'ratings', 'replay')
+    flask_command(db_url, 'aggregates', 'rebuild')
+    print(f"Seeded {args.players} players / {args.games} games")
+
+    url = f"http://127.0.0.1:{args.port}"
+    results = {}
+    for mode, async_reads in (('sync', False), ('async', True)):
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-b', f"127.0.0.1:{args.port}"],
+            env=server_env(db_url, async_reads), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(url)
+            load(url, READ_PATHS, args.concurrency, 1)  # Warm up pools and caches
+            results[mode] = load(url, READ_PATHS, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"\n{'mode':<8}{'req/s':>10}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for mode, (requests, errors, latencies) in results.items():
+        print(f"{mode:<8}{requests / args.duration:>10.0f}{errors:>8}"
+              f"{percentile(latencies, 0.5) * 1000:>10.1f}{percentile(latencies, 0.99) * 1000:>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Version token shared by every worker on this host: a tiny file rewritten
+# atomically on each bump, so a write in one gunicorn worker invalidates the
+# caches of all the others without a database round trip
+class FileVersion:
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path):
+            self.bump()
+
+    def get(self):
+        try:
+            with open(self.path) as f:
+                return f.read()
+        except FileNotFoundError:
+            self.bump()
+            return self.get()
+
+    def bump(self):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.')
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"{time.time_ns()}-{os.getpid()}")
+        os.replace(temp_path, self.path)
+
+# Serialized responses keyed by namespace (a league) and name, tagged with
+# the version they were built from. Each namespace has its own version, so a
+# write to one league leaves the others' cached bodies valid. Bodies live in
+# process memory, or in Redis when configured.
+class ResponseCache:
+    def __init__(self, version_file=None, redis_url=None, ttl=3600):
+        self.ttl = ttl
+        self.redis = redis.Redis.from_url(redis_url) if redis_url and redis is not None else None
+        self.version_file = version_file or os.path.join(tempfile.gettempdir(), 'rallyrank-cache-version')
+        self.file_versions = {}
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def file_version(self, namespace):
+        with self.lock:
+            if namespace not in self.file_versions:
+                self.file_versions[namespace] = FileVersion(f"{self.version_file}.{namespace}")
+            return self.file_versions[namespace]
+
+    def version(self, namespace):
+        if self.redis:
+            return (self.redis.get(f'rallyrank:cache:version:{namespace}') or b'0').decode()
+        return self.file_version(namespace).get()
+
+    def bump(self, namespace):
+        if self.redis:
+            self.redis.incr(f'rallyrank:cache:version:{namespace}')
+        else:
+            self.file_version(namespace).bump()
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == namespace]:
+                del self.entries[key]
+
+    def get(self, namespace, key, version):
+        if self.redis:
+            return self.redis.get(f'rallyrank:cache:{namespace}:{key}:{version}')
+        with self.lock:
+            entry = self.entries.get((namespace, key))
+        return entry[1] if entry and entry[0] == version else None
+
+    def set(self, namespace, key, version, body):
+        if self.redis:
+            self.redis.set(f'rallyrank:cache:{namespace}:{key}:{version}', body, ex=self.ttl)
+        else:
+            with self.lock:
+                self.entries[(namespace, key)] = (version, body)
@@ -1,21 +1,57 @@
 import os
 from dotenv import load_dotenv
+from db_pool import InstrumentedQueuePool
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Pool settings per worker process; size them so workers * (pool size +
+# overflow) stays under the database's connection limit
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # Seconds; keep under the server's idle timeout
+DB_STATEMENT_TIMEOUT_MS = os.environ.get('DB_STATEMENT_TIMEOUT_MS')  # Postgres only
+
+def engine_options(database_uri):
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': True  # Replace connections the server dropped while idle
+    }
+    if DB_STATEMENT_TIMEOUT_MS and (database_uri or '').startswith('postgres'):
+        options['connect_args'] = {'options': f"-c statement_timeout={int(DB_STATEMENT_TIMEOUT_MS)}"}
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'hard-to-guess-string'
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'  # Default value
     SESSION_COOKIE_SECURE = False # Default value
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')  # Share cached responses via Redis (optional)
+    CACHE_VERSION_FILE = os.environ.get('CACHE_VERSION_FILE')  # Cache version file shared by local workers
+    EVENTS_LOG_FILE = os.environ.get('EVENTS_LOG_FILE')  # Change event log shared by local workers
+    MAX_EVENT_STREAMS = int(os.environ.get('MAX_EVENT_STREAMS', max(1, int(os.environ.get('WEB_THREADS', 8)) // 2)))  # Open /events streams per sync worker; each holds a thread
+    JOB_FILES_DIR = os.environ.get('JOB_FILES_DIR')  # Where export jobs write their files (default: temp dir)
+    STATIC_JSON_DIR = os.environ.get('STATIC_JSON_DIR')  # Publish read-only data as static JSON here (optional)
+    STATIC_JSON_SYNC_COMMAND = os.environ.get('STATIC_JSON_SYNC_COMMAND')  # Run in that directory after each publish
+    SLOW_REQUEST_MS = float(os.environ['SLOW_REQUEST_MS']) if os.environ.get('SLOW_REQUEST_MS') else None  # Log slower requests with their SQL
+    ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 10))  # Connections kept open per async worker
+    ASYNC_DB_MAX_OVERFLOW = int(os.environ.get('ASYNC_DB_MAX_OVERFLOW', 10))  # Extra connections allowed under bursts
 
 class DevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('LOCAL_DB_URI')  # Local DB URI
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SESSION_COOKIE_SECURE = False  # Cookies can be sent over HTTP
     SESSION_COOKIE_SAMESITE = 'Lax'  # Adjust as needed
+    CORS_ORIGINS = ["http://localhost:5173"]
 
 class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('PROD_DB_URI')  # Production DB URI
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SESSION_COOKIE_SECURE = True  # Cookies are sent over HTTPS only
-    SESSION_COOKIE_SAMESITE = 'None'  # Required for cross-site cookies
\ No newline at end of file
+    SESSION_COOKIE_SAMESITE = 'None'  # Required for cross-site cookies
+    CORS_ORIGINS = ["https://slamueljohnston.github.io"]
\ No newline at end of file
@@ -0,0 +1,230 @@
+import asyncio
+import collections
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Seconds between checks of the shared event log for new lines
+POLL_INTERVAL = 0.2
+
+# The shared event log is swapped for an empty one past this size
+EVENT_LOG_MAX_BYTES = 1024 * 1024
+
+# Idle streams get a comment line this often so proxies keep them open and
+# disconnected clients are noticed
+KEEPALIVE_SECONDS = 15
+
+# Messages queued for a slow subscriber before it is told to resync instead
+SUBSCRIBER_BUFFER = 256
+
+REDIS_CHANNEL = 'rallyrank:events'
+
+# Log lines start with the league an event belongs to, or this for all
+EVERY_LEAGUE = '*'
+
+def sse_message(event_type, data):
+    return f"event: {event_type}\ndata: {data}\n\n"
+
+# Sent to a subscriber that fell behind (or when a bulk change makes deltas
+# pointless): refetch instead of patching
+RESYNC = sse_message('resync', '{}')
+
+# Append-only file of events shared by the workers on this host. Each worker
+# tails it, so an event published by one reaches the streams held by all.
+# Every file starts with a "#<generation>" line, numbering the rotations.
+class FileEventLog:
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        with self.locked():
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                self.replace(0)
+
+    def locked(self):
+        lock = open(self.lock_path, 'a')
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    # Swap in an empty file; readers hold the old one open and finish it
+    # before switching
+    def replace(self, generation):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.')
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"#{generation}\n")
+        os.replace(temp_path, self.path)
+
+    def append(self, line):
+        with self.locked():
+            with open(self.path, 'a+') as f:
+                f.write(line + '\n')
+                size = f.tell()
+                if size > EVENT_LOG_MAX_BYTES:
+                    f.seek(0)
+                    self.replace(generation(f.readline()) + 1)
+
+    # Lines appended from now on, as they arrive. If the file was rotated
+    # more than once between polls, the events in between are gone and
+    # subscribers are told to resync.
+    def follow(self):
+        f = open(self.path)
+        current = generation(f.readline())
+        f.seek(0, os.SEEK_END)
+        pending = ''
+        while True:
+            chunk = f.read()
+            if chunk:
+                *lines, pending = (pending + chunk).split('\n')
+                yield from (line for line in lines if not line.startswith('#'))
+                continue
+            try:
+                rotated = os.stat(self.path).st_ino != os.fstat(f.fileno()).st_ino
+            except FileNotFoundError:
+                rotated = False
+            if rotated:
+                # Nothing more is written to the old file once it is replaced
+                *lines, _ = (pending + f.read()).split('\n')
+                yield from (line for line in lines if not line.startswith('#'))
+                f.close()
+                f = open(self.path)
+                header = f.readline()
+                if generation(header) != current + 1:
+                    yield f"{EVERY_LEAGUE} resync {{}}"
+                current = generation(header)
+                pending = ''
+            else:
+                time.sleep(POLL_INTERVAL)
+
+def generation(header):
+    return int(header[1:]) if header.startswith('#') else 0
+
+# Redis pub/sub in place of the file, for workers spread over several hosts
+class RedisEventLog:
+    def __init__(self, url):
+        self.redis = redis.Redis.from_url(url)
+
+    def append(self, line):
+        self.redis.publish(REDIS_CHANNEL, line)
+
+    def follow(self):
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(REDIS_CHANNEL)
+        for message in pubsub.listen():
+            yield message['data'].decode()
+
+# One open event stream for a league. Messages are queued here by the
+# broker's listener thread and `notify` wakes whoever is writing the stream.
+class Subscription:
+    def __init__(self, notify, league_id):
+        self.notify = notify
+        self.league = str(league_id)
+        self.messages = collections.deque()
+
+    def deliver(self, message):
+        if len(self.messages) >= SUBSCRIBER_BUFFER:
+            self.messages.clear()
+            message = RESYNC
+        self.messages.append(message)
+        self.notify()
+
+    def drain(self):
+        while self.messages:
+            yield self.messages.popleft()
+
+# Per-process fan-out of change events to the event streams this worker
+# holds. Events go through the shared log (a local file, or Redis when
+# configured) so every worker sees every event, in one order.
+class EventBroker:
+    def __init__(self, log_file=None, redis_url=None, dumps=json.dumps, max_streams=None):
+        self.dumps = dumps
+        self.log = RedisEventLog(redis_url) if redis_url and redis is not None else FileEventLog(
+            log_file or os.path.join(tempfile.gettempdir(), 'rallyrank-events.log'))
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+        self.listener = None
+        self.max_streams = max_streams
+        self.open_streams = 0
+
+    # Reserve one of this worker's thread-held streams (see stream()); False
+    # when all max_streams are open
+    def acquire_stream(self):
+        with self.lock:
+            if self.max_streams is not None and self.open_streams >= self.max_streams:
+                return False
+            self.open_streams += 1
+            return True
+
+    def release_stream(self):
+        with self.lock:
+            self.open_streams -= 1
+
+    # Publish to one league's streams (every league's when None)
+    def publish(self, event_type, data=None, league_id=None):
+        league = EVERY_LEAGUE if league_id is None else league_id
+        self.log.append(f"{league} {event_type} {self.dumps(data or {})}")
+
+    def subscribe(self, notify, league_id):
+        subscription = Subscription(notify, league_id)
+        with self.lock:
+            self.subscriptions.add(subscription)
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen, name='event-listener', daemon=True)
+                self.listener.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def listen(self):
+        for line in self.log.follow():
+            league, event_type, data = line.split(' ', 2)
+            message = sse_message(event_type, data)
+            with self.lock:
+                subscriptions = list(self.subscriptions)
+            for subscription in subscriptions:
+                if league in (EVERY_LEAGUE, subscription.league):
+                    subscription.deliver(message)
+
+    # A league's Server-Sent Events for a WSGI response; ends when the
+    # client goes away (the next write fails and the server closes the
+    # generator)
+    def stream(self, league_id):
+        wake = threading.Event()
+        subscription = self.subscribe(wake.set, league_id)
+        try:
+            yield ": connected\n\n"
+            while True:
+                if not wake.wait(KEEPALIVE_SECONDS):
+                    yield ": keepalive\n\n"
+                    continue
+                wake.clear()
+                yield from subscription.drain()
+        finally:
+            self.unsubscribe(subscription)
+
+    # Same, for an ASGI streaming response
+    async def async_stream(self, league_id):
+        wake = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        subscription = self.subscribe(lambda: loop.call_soon_threadsafe(wake.set), league_id)
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(wake.wait(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                wake.clear()
+                for message in subscription.drain():
+                    yield message
+        finally:
+            self.unsubscribe(subscription)
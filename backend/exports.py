@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import zlib
+from sqlalchemy import select, or_
+from sqlalchemy.orm import aliased
+from models import db, Player, Game
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 2000
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+EXPORT_COLUMNS = (
+    'id', 'timestamp',
+    'player1_id', 'player1_name', 'player2_id', 'player2_name',
+    'player1_score', 'player2_score', 'result',
+    'prior_rating_player1', 'prior_rating_player2',
+    'rating_change_player1', 'rating_change_player2'
+)
+
+def export_query(start=None, end=None, player_id=None, league_id=None):
+    player1 = aliased(Player)
+    player2 = aliased(Player)
+    query = (
+        select(
+            Game.id, Game.timestamp,
+            Game.player1_id, player1.name.label('player1_name'),
+            Game.player2_id, player2.name.label('player2_name'),
+            Game.player1_score, Game.player2_score, Game.result,
+            Game.prior_rating_player1, Game.prior_rating_player2,
+            Game.rating_change_player1, Game.rating_change_player2
+        )
+        .join(player1, Game.player1_id == player1.id)
+        .join(player2, Game.player2_id == player2.id)
+        .order_by(Game.timestamp, Game.id)
+    )
+    if player_id is not None:
+        query = query.where(or_(Game.player1_id == player_id, Game.player2_id == player_id))
+    if league_id is not None:
+        query = query.where(Game.league_id == league_id)
+    if start is not None:
+        query = query.where(Game.timestamp >= start)
+    if end is not None:
+        query = query.where(Game.timestamp < end)
+    return query
+
+# Yield batches of rows from a server-side cursor so memory stays flat
+# however large the history is. `progress`, if given, is called with the
+# number of rows so far.
+def iter_batches(query, progress=None):
+    connection = db.session.connection().execution_options(yield_per=EXPORT_BATCH_SIZE)
+    result = connection.execute(query)
+    rows = 0
+    for batch in result.partitions():
+        yield batch
+        rows += len(batch)
+        if progress is not None:
+            progress(rows)
+
+def iter_ndjson(batches):
+    for batch in batches:
+        yield ''.join(
+            json.dumps({**row._asdict(), "timestamp": row.timestamp.isoformat()}) + '\n'
+            for row in batch
+        )
+
+def iter_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows((*row[:1], row.timestamp.isoformat(), *row[2:]) for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def iter_gzip(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+# Encoded export as a stream of bytes chunks
+def export_games(format='ndjson', compress=False, progress=None, **filters):
+    batches = iter_batches(export_query(**filters), progress)
+    chunks = (chunk.encode('utf-8') for chunk in (iter_csv(batches) if format == 'csv' else iter_ndjson(batches)))
+    return iter_gzip(chunks) if compress else chunks
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# ASYNC_READS=1 serves the read endpoints from the async ASGI app in asgi.py;
+# otherwise the plain Flask app runs on sync workers
+if os.environ.get('ASYNC_READS'):
+    wsgi_app = 'asgi:app'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'app:app'
+    # Threaded workers, so open /events streams (one thread each) don't
+    # block other requests; MAX_EVENT_STREAMS keeps them below this
+    threads = int(os.environ.get('WEB_THREADS', 8))
+
+# Refuse to boot workers against a database with pending migrations
+def on_starting(server):
+    from app import app, db, migration_revisions
+    with app.app_context():
+        current, heads = migration_revisions()
+        # Workers fork from here with this module loaded; they must not
+        # share the connection the check left in the pool
+        db.engine.dispose()
+    if current != heads:
+        server.log.error(f"Pending migrations (database at {sorted(current)}, head is {sorted(heads)}); "
+                         "run `flask db upgrade` first.")
+        sys.exit(1)
+
+# The job worker (`flask worker`) runs beside the web workers, supervised by
+# the master: it shares their filesystem, which holds the cache version
+# files, the event log and finished exports
+job_worker = None
+
+def supervise_job_worker(server):
+    global job_worker
+    while True:
+        job_worker = subprocess.Popen([sys.executable, '-m', 'flask', '--app', 'app', 'worker'])
+        code = job_worker.wait()
+        if code in (0, -15):
+            return
+        server.log.error(f"Job worker exited with {code}; restarting")
+        time.sleep(5)
+
+def when_ready(server):
+    threading.Thread(target=supervise_job_worker, args=(server,), daemon=True).start()
+
+def on_exit(server):
+    if job_worker is not None and job_worker.poll() is None:
+        # Let it finish the current job
+        job_worker.terminate()
+        job_worker.wait()
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+# Bucket sizes for rating history: one point per game, or the closing rating
+# of each day, week (starting Monday) or month
+RESOLUTIONS = ('game', 'day', 'week', 'month')
+
+def bucket_start(timestamp, resolution):
+    day = datetime(timestamp.year, timestamp.month, timestamp.day)
+    if resolution == 'day':
+        return day
+    if resolution == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+# Collapse a history ({"date", "rating"} points, oldest first) to the last
+# rating in each bucket, dated at the start of the bucket
+def bucket_history(history, resolution):
+    if resolution == 'game':
+        return history
+    buckets = {}
+    for point in history:
+        buckets[bucket_start(point["date"], resolution)] = point["rating"]
+    return [{"date": date, "rating": rating} for date, rating in buckets.items()]
+
+# Largest-Triangle-Three-Buckets: keep the first and last points and, from
+# each of `threshold - 2` equal slices in between, the point that forms the
+# largest triangle with the point kept before it and the average of the next
+# slice. Keeps the peaks and dips a line chart would show. `threshold` must
+# be at least 3.
+def lttb(history, threshold):
+    if threshold >= len(history):
+        return history
+
+    x = [point["date"].timestamp() for point in history]
+    y = [point["rating"] for point in history]
+    slice_size = (len(history) - 2) / (threshold - 2)
+    sampled = [history[0]]
+    kept = 0
+    for i in range(threshold - 2):
+        start = int(i * slice_size) + 1
+        end = int((i + 1) * slice_size) + 1
+        # The last slice looks ahead to the final point alone
+        next_start = end
+        next_end = int((i + 2) * slice_size) + 1 if i < threshold - 3 else len(history)
+        average_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        average_y = sum(y[next_start:next_end]) / (next_end - next_start)
+
+        best, best_area = start, -1
+        for j in range(start, end):
+            area = abs((x[kept] - average_x) * (y[j] - y[kept]) - (x[kept] - x[j]) * (average_y - y[kept]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(history[best])
+        kept = best
+    sampled.append(history[-1])
+    return sampled
@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import insert, update
+from models import db, Player, Game, DEFAULT_LEAGUE_ID
+from replay import replay_ratings, ratings_before, lock_players, rating_system, game_result, INITIAL_RATING
+from aggregates import rebuild_aggregates
+from snapshots import update_snapshots
+from serialization import parse_timestamp
+
+# Largest batch accepted in one request
+MAX_BULK_GAMES = 50000
+
+IMPORT_FORMATS = ('json', 'ndjson', 'csv')
+
+class GameImportError(Exception):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid games")
+        self.errors = errors
+
+# Parse raw records from a text stream; each record is a dict of strings/values
+def parse_games(stream, format):
+    if format == 'csv':
+        return list(csv.DictReader(stream))
+    if format == 'ndjson':
+        return [json.loads(line) for line in stream if line.strip()]
+    data = json.load(stream)
+    if isinstance(data, dict):
+        data = data.get('games')
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of games or {\"games\": [...]}")
+    return data
+
+def format_for(content_type=None, filename=None):
+    content_type = (content_type or '').split(';')[0].strip()
+    if content_type == 'text/csv' or (filename or '').endswith('.csv'):
+        return 'csv'
+    if content_type in ('application/x-ndjson', 'application/jsonl') or (filename or '').endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'json'
+
+# Resolve a player reference given either as an id or a name
+def resolve_player(record, side, players_by_id, players_by_name):
+    player_id = record.get(f'{side}_id')
+    if player_id not in (None, ''):
+        player = players_by_id.get(int(player_id))
+    else:
+        player = players_by_name.get(str(record.get(side, '')).strip())
+    if player is None:
+        raise ValueError(f"{side} not found")
+    return player
+
+# Check every record before anything is written; players are looked up in
+# `league_id` only. Returns the games as insert-ready dicts; raises
+# GameImportError listing every invalid row.
+def validate_games(records, league_id=DEFAULT_LEAGUE_ID):
+    if len(records) > MAX_BULK_GAMES:
+        raise GameImportError([{"row": None, "error": f"At most {MAX_BULK_GAMES} games can be imported at once"}])
+
+    players = Player.query.filter_by(league_id=league_id).all()
+    players_by_id = {player.id: player for player in players}
+    players_by_name = {player.name: player for player in players if player.is_active}
+
+    now = datetime.now()
+    games = []
+    errors = []
+    for row, record in enumerate(records, start=1):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError("expected an object")
+            player1 = resolve_player(record, 'player1', players_by_id, players_by_name)
+            player2 = resolve_player(record, 'player2', players_by_id, players_by_name)
+            if player1.id == player2.id:
+                raise ValueError("a player cannot play against themselves")
+            player1_score = int(record['player1_score'])
+            player2_score = int(record['player2_score'])
+            if player1_score < 0 or player2_score < 0:
+                raise ValueError("scores must not be negative")
+            timestamp = record.get('timestamp')
+            timestamp = parse_timestamp(timestamp) if timestamp else now
+            # Later live games would be stamped before it but rated after it
+            if timestamp > now:
+                raise ValueError("timestamp must not be in the future")
+            games.append({
+                "league_id": league_id,
+                "player1_id": player1.id,
+                "player2_id": player2.id,
+                "player1_score": player1_score,
+                "player2_score": player2_score,
+                "result": game_result(player1_score, player2_score),
+                "timestamp": timestamp
+            })
+        except KeyError as e:
+            errors.append({"row": row, "error": f"missing {e.args[0]}"})
+        except (TypeError, ValueError) as e:
+            errors.append({"row": row, "error": str(e)})
+
+    if errors:
+        raise GameImportError(errors)
+    return games
+
+# Insert validated games into a league in one transaction with their
+# ratings computed in timestamp order. Returns the number of games imported.
+def import_games(games, league_id=DEFAULT_LEAGUE_ID):
+    if not games:
+        return 0
+    games.sort(key=lambda game: game["timestamp"])
+    since = games[0]["timestamp"]
+    player_ids = {player_id for game in games for player_id in (game["player1_id"], game["player2_id"])}
+
+    backfill = db.session.query(Game.id).filter(Game.league_id == league_id, Game.timestamp >= since).first() is not None
+    if backfill:
+        # Existing games come after the import, so they need re-rating too
+        db.session.execute(insert(Game), games)
+        replay_ratings(since=since, league_id=league_id)
+    else:
+        # Appending to the end of the history: rate in memory, write once
+        lock_players(player_ids)
+        ratings = ratings_before(since, list(player_ids))
+        for game in games:
+            prior1 = ratings.get(game["player1_id"], INITIAL_RATING)
+            prior2 = ratings.get(game["player2_id"], INITIAL_RATING)
+            change1, change2 = rating_system.rating_changes(
+                prior1, prior2, game["player1_score"], game["player2_score"])
+            game.update(
+                prior_rating_player1=prior1,
+                prior_rating_player2=prior2,
+                rating_change_player1=change1,
+                rating_change_player2=change2
+            )
+            ratings[game["player1_id"]] = prior1 + change1
+            ratings[game["player2_id"]] = prior2 + change2
+        db.session.execute(insert(Game), games)
+        db.session.execute(update(Player), [
+            {"id": player_id, "rating": ratings[player_id]} for player_id in player_ids
+        ])
+        update_snapshots(league_id)
+        db.session.expire_all()
+
+    rebuild_aggregates(list(player_ids))
+    return len(games)
+
+def import_stream(stream, format, league_id=DEFAULT_LEAGUE_ID):
+    try:
+        records = parse_games(stream, format)
+    except (ValueError, csv.Error) as e:
+        raise GameImportError([{"row": None, "error": f"Could not parse {format}: {e}"}])
+    return import_games(validate_games(records, league_id), league_id)
+
+def text_stream(binary_stream):
+    return io.TextIOWrapper(binary_stream, encoding='utf-8', newline='')
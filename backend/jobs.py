@@ -0,0 +1,243 @@
+import logging
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update, func, or_
+from models import db, Player, Game, Job, PlayerAggregate
+from replay import replay_ratings
+from aggregates import rebuild_aggregates
+from exports import export_games, export_query
+from reads import league_player, game_row
+from serialization import parse_timestamp
+
+# Replays of more games than this are queued for the worker instead of
+# running inside the request
+INLINE_REPLAY_GAMES = 2000
+
+# Minimum seconds between progress writes from a running job
+PROGRESS_INTERVAL = 1.0
+
+# A job still marked running this long after it started lost its worker
+STALE_JOB_AFTER = timedelta(hours=6)
+
+# Job kinds by name. Each runs as fn(league_id, progress, **params) in the
+# caller's transaction and returns (result, event): a JSON-able result for
+# the job row, and the change event to publish once it commits (None if no
+# data changed).
+JOB_TYPES = {}
+
+def job_type(kind):
+    def decorator(f):
+        JOB_TYPES[kind] = f
+        return f
+    return decorator
+
+# The data a job was queued against is gone by the time it runs. Recorded on
+# the job as its error, or returned with status_code when run inline.
+class JobError(Exception):
+    status_code = 404
+
+def enqueue(kind, league_id, **params):
+    job = Job(kind=kind, league_id=league_id, params=params)
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+# Run a job now, in the request (for work known to be small)
+def run_inline(kind, league_id, **params):
+    return JOB_TYPES[kind](league_id, lambda done, total=None: None, **params)
+
+# Whether replaying a league from `since` is small enough to run inline
+def replay_is_small(league_id, since):
+    if since is None:
+        return True
+    later = select(Game.id).where(Game.league_id == league_id, Game.timestamp >= since).limit(INLINE_REPLAY_GAMES + 1)
+    return db.session.scalar(select(func.count()).select_from(later.subquery())) <= INLINE_REPLAY_GAMES
+
+# Every player's rating in a league, to diff around writes that replay history
+def league_ratings(league_id):
+    return dict(db.session.execute(select(Player.id, Player.rating).where(Player.league_id == league_id)).all())
+
+def changed_ratings(before, league_id):
+    return {player_id: rating for player_id, rating in league_ratings(league_id).items() if before.get(player_id) != rating}
+
+# Records a running job's progress on its row. The job's own transaction
+# only commits at the end, so progress goes over a separate connection;
+# SQLite allows one writer at a time, so there it is only written at the end.
+class JobProgress:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.done = 0
+        self.total = None
+        self.reported = 0
+
+    def __call__(self, done, total=None):
+        self.done = done
+        self.total = total if total is not None else self.total
+        now = time.monotonic()
+        if now - self.reported < PROGRESS_INTERVAL or db.engine.dialect.name == 'sqlite':
+            return
+        self.reported = now
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(update(Job).where(Job.id == self.job_id).values(progress=done, total=self.total))
+        except Exception as e:
+            logging.error(f"Job {self.job_id} progress update failed: {e}")
+
+# Take the oldest queued job, or None if there is none. Claiming is a
+# conditional update, so concurrent workers never run the same job.
+def claim_job():
+    while True:
+        job_id = db.session.scalar(select(Job.id).where(Job.status == 'queued').order_by(Job.id).limit(1))
+        if job_id is None:
+            return None
+        claimed = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', started_at=datetime.now())
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+
+# Put back jobs whose worker died mid-run; their work was rolled back with it
+def requeue_stale_jobs():
+    count = db.session.execute(
+        update(Job).where(Job.status == 'running', Job.started_at < datetime.now() - STALE_JOB_AFTER)
+        .values(status='queued', started_at=None, progress=0)
+    ).rowcount
+    db.session.commit()
+    return count
+
+# Run a claimed job and commit its work together with its final status.
+# Returns the change event to publish, or None.
+def run_job(job):
+    job_id, kind, league_id, params = job.id, job.kind, job.league_id, job.params
+    progress = JobProgress(job_id)
+    try:
+        result, event = JOB_TYPES[kind](league_id, progress, **params)
+        job.status = 'succeeded'
+        job.result = result
+        job.progress = progress.total if progress.total is not None else progress.done
+        job.total = progress.total
+        job.finished_at = datetime.now()
+        db.session.commit()
+        return event
+    except Exception as e:
+        db.session.rollback()
+        if not isinstance(e, JobError):
+            logging.exception(f"Job {job_id} ({kind}) failed")
+        db.session.execute(
+            update(Job).where(Job.id == job_id).values(status='failed', error=str(e), finished_at=datetime.now()))
+        db.session.commit()
+        return None
+
+# Delete a player with all their games, then replay everything after their
+# first game so opponents' ratings no longer count them
+@job_type('delete_player')
+def delete_player(league_id, progress, player_id):
+    player = league_player(db.session, league_id, player_id)
+    if player is None:
+        raise JobError("Player not found")
+
+    # Opponents' aggregates lose these games too
+    player_games = Game.query.filter(or_(Game.player1_id == player_id, Game.player2_id == player_id))
+    opponent_ids = {
+        game.player2_id if game.player1_id == player_id else game.player1_id
+        for game in player_games.with_entities(Game.player1_id, Game.player2_id)
+    }
+
+    first_game_at = player_games.with_entities(func.min(Game.timestamp)).scalar()
+    ratings_before = league_ratings(league_id)
+
+    # Remove all related games
+    deleted = player_games.delete()
+    PlayerAggregate.query.filter_by(player_id=player_id).delete()
+    if first_game_at is not None:
+        replay_ratings(since=first_game_at, player_ids=list(opponent_ids), league_id=league_id, progress=progress)
+    rebuild_aggregates(list(opponent_ids))
+
+    db.session.delete(player)
+    return {"games_deleted": deleted}, (
+        'player_deleted', {"player_id": player_id, "ratings": changed_ratings(ratings_before, league_id)})
+
+@job_type('delete_game')
+def delete_game(league_id, progress, game_id):
+    game = Game.query.filter_by(id=game_id, league_id=league_id).first()
+    if game is None:
+        raise JobError("Game not found")
+
+    player_ids = [game.player1_id, game.player2_id]
+    timestamp = game.timestamp
+    ratings_before = league_ratings(league_id)
+
+    # Every later game was rated against this one, so replay from here
+    db.session.delete(game)
+    replayed = replay_ratings(since=timestamp, player_ids=player_ids, league_id=league_id, progress=progress)
+    rebuild_aggregates(player_ids)
+    return {"games_replayed": replayed}, (
+        'game_deleted', {"game_id": game_id, "ratings": changed_ratings(ratings_before, league_id)})
+
+@job_type('edit_game')
+def edit_game(league_id, progress, game_id, player1_score, player2_score):
+    game = Game.query.filter_by(id=game_id, league_id=league_id).first()
+    if game is None:
+        raise JobError("Game not found")
+
+    # Update the scores
+    game.player1_score = player1_score
+    game.player2_score = player2_score
+    player_ids = [game.player1_id, game.player2_id]
+    ratings_before = league_ratings(league_id)
+
+    # Replay this game and everything after it so later ratings stay consistent
+    replayed = replay_ratings(since=game.timestamp, league_id=league_id, progress=progress)
+    rebuild_aggregates(player_ids)
+    player1, player2 = db.session.get(Player, player_ids[0]), db.session.get(Player, player_ids[1])
+    return {"games_replayed": replayed}, ('game_updated', {
+        "game": game_row(game, player1.name, player1.rating, player2.name, player2.rating),
+        "ratings": changed_ratings(ratings_before, league_id)
+    })
+
+# Replay a league's ratings from `since` (an ISO timestamp), or its whole
+# history
+@job_type('replay_ratings')
+def replay_league(league_id, progress, since=None):
+    replayed = replay_ratings(
+        since=parse_timestamp(since) if since else None, league_id=league_id, progress=progress)
+    return {"games_replayed": replayed}, ('resync', None)
+
+@job_type('rebuild_aggregates')
+def rebuild_league_aggregates(league_id, progress):
+    player_ids = db.session.scalars(select(Player.id).where(Player.league_id == league_id)).all()
+    progress(0, len(player_ids))
+    rebuilt = rebuild_aggregates(player_ids)
+    return {"players": rebuilt}, ('resync', None)
+
+# Write a league's game export to a file for download from /jobs/<id>/download.
+# The worker runs beside the web workers (gunicorn.conf.py starts it), which
+# serve the file.
+def job_files_dir():
+    path = current_app.config.get('JOB_FILES_DIR') or os.path.join(tempfile.gettempdir(), 'rallyrank-jobs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+@job_type('export_games')
+def export_league_games(league_id, progress, format='ndjson', compress=False, player_id=None, start=None, end=None):
+    filters = {
+        "league_id": league_id,
+        "player_id": player_id,
+        "start": parse_timestamp(start) if start else None,
+        "end": parse_timestamp(end) if end else None
+    }
+    progress(0, db.session.scalar(select(func.count()).select_from(export_query(**filters).subquery())))
+    filename = f"games.{format}" + ('.gz' if compress else '')
+    file = f"{uuid.uuid4().hex}-{filename}"
+    size = 0
+    with open(os.path.join(job_files_dir(), file), 'wb') as output:
+        for chunk in export_games(format, compress, progress=progress, **filters):
+            output.write(chunk)
+            size += len(chunk)
+    return {"file": file, "filename": filename, "bytes": size}, None
@@ -0,0 +1,169 @@
+import bisect
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from models import Player, Game, DEFAULT_LEAGUE_ID
+from replay import rating_system
+
+# Games within this window count as recent meetings
+RECENT_MEETINGS_WINDOW = timedelta(days=28)
+
+# Cost of each recent meeting, in units of expected-score imbalance: one
+# rematch weighs as much as a pairing 0.1 away from an even game (~70 Elo)
+REMATCH_PENALTY = 0.1
+
+# Nearest-rated opponents weighed for each pairing
+CANDIDATES = 8
+
+class UnknownPlayersError(Exception):
+    def __init__(self, player_ids):
+        super().__init__(f"Unknown or inactive players: {player_ids}")
+        self.player_ids = player_ids
+
+# Active players kept sorted by rating, so the players nearest a rating are
+# found by bisection and an ordered walk outwards. Removed players stay in
+# `entries` (deleting from the list is O(n), O(n^2) over a round); walks
+# step over them through skip links, compressed as they are followed.
+class RatingIndex:
+    def __init__(self, players):
+        self.players = {player_id: (name, rating) for player_id, name, rating in players}
+        self.entries = sorted((rating, player_id) for player_id, (_, rating) in self.players.items())
+        self.skip_up = {}
+        self.skip_down = {}
+
+    @classmethod
+    def load(cls, session, league_id):
+        return cls(session.execute(
+            select(Player.id, Player.name, Player.rating)
+            .where(Player.league_id == league_id, Player.is_active == True)
+        ))
+
+    def __len__(self):
+        return len(self.players)
+
+    def __contains__(self, player_id):
+        return player_id in self.players
+
+    def rating(self, player_id):
+        return self.players[player_id][1]
+
+    def name(self, player_id):
+        return self.players[player_id][0]
+
+    # A copy holding only `player_ids`; entries are already sorted, so no re-sort
+    def subset(self, player_ids):
+        player_ids = set(player_ids)
+        index = RatingIndex.__new__(RatingIndex)
+        index.players = {player_id: self.players[player_id] for player_id in player_ids}
+        index.entries = [entry for entry in self.entries if entry[1] in index.players]
+        index.skip_up = {}
+        index.skip_down = {}
+        return index
+
+    def remove(self, player_id):
+        rating = self.players.pop(player_id)[1]
+        position = bisect.bisect_left(self.entries, (rating, player_id))
+        self.skip_up[position] = position + 1
+        self.skip_down[position] = position - 1
+
+    # First position from `position` onwards in the direction of `skip`
+    # (skip_up or skip_down) that still holds a player
+    @staticmethod
+    def follow(skip, position):
+        if position not in skip:
+            return position
+        end = skip[position]
+        while end in skip:
+            end = skip[end]
+        while position in skip and skip[position] != end:
+            skip[position], position = end, skip[position]
+        return end
+
+    # Player ids ordered by distance from `rating`, nearest first
+    def nearest(self, rating):
+        start = bisect.bisect_left(self.entries, (rating, -1))
+        above = self.follow(self.skip_up, start)
+        below = self.follow(self.skip_down, start - 1)
+        while below >= 0 or above < len(self.entries):
+            if above >= len(self.entries) or (below >= 0 and rating - self.entries[below][0] <= self.entries[above][0] - rating):
+                yield self.entries[below][1]
+                below = self.follow(self.skip_down, below - 1)
+            else:
+                yield self.entries[above][1]
+                above = self.follow(self.skip_up, above + 1)
+
+# Index of each league's active players, reloaded when the league's
+# response cache version moves (every write bumps it)
+class RatingIndexCache:
+    def __init__(self):
+        self.current = {}
+
+    def get(self, session, league_id, version):
+        cached_version, index = self.current.get(league_id, (None, None))
+        if index is None or cached_version != version:
+            index = RatingIndex.load(session, league_id)
+            self.current[league_id] = (version, index)
+        return index
+
+# Player ids from a comma-separated query-string value (None when absent);
+# raises ValueError if malformed
+def player_ids_arg(value):
+    if value is None:
+        return None
+    return {int(player_id) for player_id in value.split(',') if player_id.strip()}
+
+# Games played between each pair of `player_ids` (everyone in the league
+# when None) since `since`, keyed by (lower id, higher id)
+def recent_meetings(session, player_ids, since, league_id=DEFAULT_LEAGUE_ID):
+    query = (
+        select(Game.player1_id, Game.player2_id, func.count())
+        .where(Game.league_id == league_id, Game.timestamp >= since)
+        .group_by(Game.player1_id, Game.player2_id)
+    )
+    if player_ids is not None:
+        query = query.where(Game.player1_id.in_(player_ids), Game.player2_id.in_(player_ids))
+    meetings = {}
+    for player1_id, player2_id, count in session.execute(query):
+        pair = (min(player1_id, player2_id), max(player1_id, player2_id))
+        meetings[pair] = meetings.get(pair, 0) + count
+    return meetings
+
+# Pair everyone in `player_ids` (all active players in the index's league
+# when None) for a round.
+# Highest rated first, each unpaired player takes whichever of their
+# CANDIDATES nearest-rated unpaired players gives the closest expected score
+# after the rematch penalty. With an odd count the last player left gets a bye.
+def pair_round(session, index, player_ids=None, league_id=DEFAULT_LEAGUE_ID):
+    unknown = sorted(player_id for player_id in player_ids or () if player_id not in index)
+    if unknown:
+        raise UnknownPlayersError(unknown)
+
+    meetings = recent_meetings(session, player_ids, datetime.now() - RECENT_MEETINGS_WINDOW, league_id)
+    unpaired = index.subset(index.players if player_ids is None else player_ids)
+    pairings = []
+    for _, player_id in reversed(unpaired.entries):
+        if player_id not in unpaired:
+            continue
+        rating = unpaired.rating(player_id)
+        unpaired.remove(player_id)
+        best = None
+        candidates = unpaired.nearest(rating)
+        for _, opponent_id in zip(range(CANDIDATES), candidates):
+            expected = rating_system.expected_score(rating, unpaired.rating(opponent_id))
+            rematches = meetings.get((min(player_id, opponent_id), max(player_id, opponent_id)), 0)
+            cost = abs(expected - 0.5) + REMATCH_PENALTY * rematches
+            if best is None or cost < best[0]:
+                best = (cost, opponent_id, expected, rematches)
+        if best is None:
+            return {"pairings": pairings, "bye": player_summary(index, player_id)}
+        _, opponent_id, expected, rematches = best
+        unpaired.remove(opponent_id)
+        pairings.append({
+            "player1": player_summary(index, player_id),
+            "player2": player_summary(index, opponent_id),
+            "expected_score": round(expected, 3),
+            "recent_meetings": rematches
+        })
+    return {"pairings": pairings, "bye": None}
+
+def player_summary(index, player_id):
+    return {"id": player_id, "name": index.name(player_id), "rating": index.rating(player_id)}
@@ -0,0 +1,185 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statements kept per request for the slow-request log
+MAX_CAPTURED_STATEMENTS = 100
+
+# The request being served in this thread/task, if it is being traced
+current_trace = ContextVar('current_trace', default=None)
+
+# Timing and SQL activity of one request
+class RequestTrace:
+    def __init__(self, route, method):
+        self.route = route
+        self.method = method
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.statements = []
+
+    def record_query(self, statement, seconds):
+        self.queries += 1
+        self.sql_seconds += seconds
+        if len(self.statements) < MAX_CAPTURED_STATEMENTS:
+            self.statements.append((seconds, statement))
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def labels(**values):
+    return ','.join(f'{name}="{escape_label(value)}"' for name, value in values.items())
+
+# Per-process registry of request metrics, rendered in the Prometheus text
+# format. Each gunicorn worker keeps its own; series carry a `worker` label
+# so they stay monotonic when scrapes land on different workers.
+class Metrics:
+    def __init__(self, slow_request_ms=None):
+        self.lock = threading.Lock()
+        self.latency = defaultdict(Histogram)
+        self.sql_queries = defaultdict(int)
+        self.sql_seconds = defaultdict(float)
+        self.pools = {}
+        self.slow_request_ms = slow_request_ms
+
+    def start(self, route, method):
+        trace = RequestTrace(route, method)
+        current_trace.set(trace)
+        return trace
+
+    def finish(self, trace, status, path=None):
+        current_trace.set(None)
+        elapsed = time.perf_counter() - trace.started
+        with self.lock:
+            self.latency[(trace.route, trace.method, status)].observe(elapsed)
+            self.sql_queries[(trace.route, trace.method)] += trace.queries
+            self.sql_seconds[(trace.route, trace.method)] += trace.sql_seconds
+        if self.slow_request_ms is not None and elapsed * 1000 >= self.slow_request_ms:
+            self.log_slow_request(trace, status, elapsed, path)
+
+    def log_slow_request(self, trace, status, elapsed, path):
+        statements = '\n'.join(f"  {seconds * 1000:.1f}ms  {' '.join(statement.split())}"
+                               for seconds, statement in trace.statements)
+        logging.warning(
+            f"Slow request: {trace.method} {path or trace.route} -> {status} in {elapsed * 1000:.1f}ms, "
+            f"{trace.queries} queries / {trace.sql_seconds * 1000:.1f}ms SQL\n{statements}"
+        )
+
+    def render(self, pools=None):
+        worker = os.getpid()
+        lines = [
+            "# HELP rallyrank_request_duration_seconds Request latency by route.",
+            "# TYPE rallyrank_request_duration_seconds histogram"
+        ]
+        with self.lock:
+            for (route, method, status), histogram in sorted(self.latency.items()):
+                series = labels(route=route, method=method, status=status, worker=worker)
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'rallyrank_request_duration_seconds_bucket{{{series},le="{bound}"}} {cumulative}')
+                lines.append(f'rallyrank_request_duration_seconds_bucket{{{series},le="+Inf"}} {histogram.count}')
+                lines.append(f'rallyrank_request_duration_seconds_sum{{{series}}} {histogram.sum}')
+                lines.append(f'rallyrank_request_duration_seconds_count{{{series}}} {histogram.count}')
+
+            lines += [
+                "# HELP rallyrank_sql_queries_total SQL statements executed by route.",
+                "# TYPE rallyrank_sql_queries_total counter"
+            ]
+            for (route, method), count in sorted(self.sql_queries.items()):
+                lines.append(f'rallyrank_sql_queries_total{{{labels(route=route, method=method, worker=worker)}}} {count}')
+
+            lines += [
+                "# HELP rallyrank_sql_seconds_total Time spent executing SQL by route.",
+                "# TYPE rallyrank_sql_seconds_total counter"
+            ]
+            for (route, method), seconds in sorted(self.sql_seconds.items()):
+                lines.append(f'rallyrank_sql_seconds_total{{{labels(route=route, method=method, worker=worker)}}} {seconds}')
+
+        pools = {**(pools or {}), **self.pools}
+        for metric, attribute, help_text in (
+            ('rallyrank_db_pool_size', 'size', 'Configured pool size.'),
+            ('rallyrank_db_pool_checked_out', 'checkedout', 'Connections currently in use.'),
+            ('rallyrank_db_pool_overflow', 'overflow', 'Connections open beyond the pool size.')
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            for name, pool in sorted(pools.items()):
+                value = max(getattr(pool, attribute)(), 0)
+                lines.append(f'{metric}{{{labels(pool=name, worker=worker)}}} {value}')
+
+        for metric, key, help_text in (
+            ('rallyrank_db_pool_checkouts_total', 'checkouts', 'Connection checkouts.'),
+            ('rallyrank_db_pool_saturated_checkouts_total', 'saturated_checkouts', 'Checkouts that had to wait for a free connection.'),
+            ('rallyrank_db_pool_timeouts_total', 'timeouts', 'Checkouts that timed out.')
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for name, pool in sorted(pools.items()):
+                if hasattr(pool, 'stats'):
+                    lines.append(f'{metric}{{{labels(pool=name, worker=worker)}}} {pool.stats.as_dict()[key]}')
+        return '\n'.join(lines) + '\n'
+
+# Attribute every statement executed on any engine to the traced request
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if current_trace.get() is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    trace = current_trace.get()
+    started = conn.info.get('query_started')
+    if trace is not None and started:
+        trace.record_query(statement, time.perf_counter() - started.pop())
+
+# Drop the start time of a statement that failed, so the next one pairs up
+@event.listens_for(Engine, 'handle_error')
+def discard_query_timer(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+# ASGI middleware recording the same metrics for routes served outside Flask
+class MetricsMiddleware:
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        route = scope['route'].path if 'route' in scope else scope['path']
+        trace = self.metrics.start(route, scope['method'])
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.finish(trace, status, scope['path'])
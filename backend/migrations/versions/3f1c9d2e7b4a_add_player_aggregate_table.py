@@ -0,0 +1,100 @@
+"""Add player_aggregate table
+
+Revision ID: 3f1c9d2e7b4a
+Revises: ca5da6b1d406
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9d2e7b4a'
+down_revision = 'ca5da6b1d406'
+branch_labels = None
+depends_on = None
+
+
+# The game columns the backfill reads, as they are at this revision
+game = sa.table(
+    'game',
+    sa.column('id', sa.Integer),
+    sa.column('player1_id', sa.Integer),
+    sa.column('player2_id', sa.Integer),
+    sa.column('player1_score', sa.Integer),
+    sa.column('player2_score', sa.Integer),
+    sa.column('timestamp', sa.DateTime)
+)
+
+
+# Every player's aggregate row from the full history, folded in game order
+# the same way aggregates.apply_result folds a new game (ties for biggest
+# win or loss go to the newer game). Self-contained, so it keeps working
+# whatever the models look like later.
+def backfill(player_aggregate):
+    aggregates = {}
+    games = op.get_bind().execute(
+        sa.select(game.c.id, game.c.player1_id, game.c.player2_id, game.c.player1_score, game.c.player2_score,
+                  game.c.timestamp)
+        .order_by(game.c.timestamp, game.c.id)
+    )
+    for game_id, player1_id, player2_id, player1_score, player2_score, timestamp in games:
+        for player_id, points_for, points_against in ((player1_id, player1_score, player2_score),
+                                                      (player2_id, player2_score, player1_score)):
+            aggregate = aggregates.setdefault(player_id, {
+                "player_id": player_id, "games_played": 0, "wins": 0, "losses": 0, "draws": 0,
+                "points_for": 0, "points_against": 0, "last_game_at": None, "current_streak_type": None,
+                "current_streak_length": 0, "longest_win_streak": 0, "biggest_win_game_id": None,
+                "biggest_win_margin": None, "biggest_loss_game_id": None, "biggest_loss_margin": None
+            })
+            aggregate["games_played"] += 1
+            aggregate["points_for"] += points_for
+            aggregate["points_against"] += points_against
+            aggregate["last_game_at"] = timestamp
+            outcome = 'W' if points_for > points_against else 'L' if points_for < points_against else 'D'
+            aggregate[{'W': "wins", 'L': "losses", 'D': "draws"}[outcome]] += 1
+            if aggregate["current_streak_type"] == outcome:
+                aggregate["current_streak_length"] += 1
+            else:
+                aggregate["current_streak_type"] = outcome
+                aggregate["current_streak_length"] = 1
+            if outcome == 'W':
+                aggregate["longest_win_streak"] = max(aggregate["longest_win_streak"],
+                                                      aggregate["current_streak_length"])
+            margin = points_for - points_against
+            if margin > 0 and (aggregate["biggest_win_margin"] is None or margin >= aggregate["biggest_win_margin"]):
+                aggregate["biggest_win_game_id"] = game_id
+                aggregate["biggest_win_margin"] = margin
+            if margin < 0 and (aggregate["biggest_loss_margin"] is None or -margin >= aggregate["biggest_loss_margin"]):
+                aggregate["biggest_loss_game_id"] = game_id
+                aggregate["biggest_loss_margin"] = -margin
+    if aggregates:
+        op.bulk_insert(player_aggregate, list(aggregates.values()))
+
+
+def upgrade():
+    player_aggregate = op.create_table('player_aggregate',
+        sa.Column('player_id', sa.Integer(), nullable=False),
+        sa.Column('games_played', sa.Integer(), nullable=False),
+        sa.Column('wins', sa.Integer(), nullable=False),
+        sa.Column('losses', sa.Integer(), nullable=False),
+        sa.Column('draws', sa.Integer(), nullable=False),
+        sa.Column('points_for', sa.Integer(), nullable=False),
+        sa.Column('points_against', sa.Integer(), nullable=False),
+        sa.Column('last_game_at', sa.DateTime(), nullable=True),
+        sa.Column('current_streak_type', sa.String(length=1), nullable=True),
+        sa.Column('current_streak_length', sa.Integer(), nullable=False),
+        sa.Column('longest_win_streak', sa.Integer(), nullable=False),
+        sa.Column('biggest_win_game_id', sa.Integer(), nullable=True),
+        sa.Column('biggest_win_margin', sa.Integer(), nullable=True),
+        sa.Column('biggest_loss_game_id', sa.Integer(), nullable=True),
+        sa.Column('biggest_loss_margin', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['player_id'], ['player.id'], ),
+        sa.PrimaryKeyConstraint('player_id')
+    )
+    backfill(player_aggregate)
+
+
+def downgrade():
+    op.drop_table('player_aggregate')
@@ -0,0 +1,37 @@
+"""Add rating_snapshot table
+
+Revision ID: b5e2f7a91c3d
+Revises: 8d2b6e41c0f7
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e2f7a91c3d'
+down_revision = '8d2b6e41c0f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Populate with `flask ratings snapshot` after upgrading
+    op.create_table('rating_snapshot',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('game_id', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('ratings', sa.JSON(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('game_id')
+    )
+    with op.batch_alter_table('rating_snapshot', schema=None) as batch_op:
+        batch_op.create_index('ix_rating_snapshot_timestamp_game_id', ['timestamp', 'game_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('rating_snapshot', schema=None) as batch_op:
+        batch_op.drop_index('ix_rating_snapshot_timestamp_game_id')
+
+    op.drop_table('rating_snapshot')
@@ -0,0 +1,79 @@
+"""Add league table and partition players, games and snapshots by league
+
+Revision ID: c7a3d5e8f1b2
+Revises: b5e2f7a91c3d
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a3d5e8f1b2'
+down_revision = 'b5e2f7a91c3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    league = op.create_table('league',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=80), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    # Existing players and games move into the default league
+    op.bulk_insert(league, [{'id': 1, 'name': 'Default'}])
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("SELECT setval(pg_get_serial_sequence('league', 'id'), 1)")
+
+    for table in ('player', 'game', 'rating_snapshot'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('league_id', sa.Integer(), nullable=False, server_default='1'))
+            batch_op.create_foreign_key(f'fk_{table}_league_id_league', 'league', ['league_id'], ['id'])
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('league_id', server_default=None)
+
+    with op.batch_alter_table('player', schema=None) as batch_op:
+        batch_op.drop_index('ix_player_is_active_rating')
+        batch_op.drop_index('ix_player_name')
+        batch_op.create_index('ix_player_league_id_is_active_rating', ['league_id', 'is_active', 'rating'], unique=False)
+        batch_op.create_index('ix_player_league_id_name', ['league_id', 'name'], unique=False)
+
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.drop_index('ix_game_timestamp_id')
+        batch_op.create_index('ix_game_league_id_timestamp_id', ['league_id', 'timestamp', 'id'], unique=False)
+
+    with op.batch_alter_table('rating_snapshot', schema=None) as batch_op:
+        batch_op.drop_index('ix_rating_snapshot_timestamp_game_id')
+        batch_op.create_index('ix_rating_snapshot_league_id_timestamp_game_id', ['league_id', 'timestamp', 'game_id'], unique=False)
+
+
+def downgrade():
+    # Only the default league's data fits the single-ladder schema
+    op.execute("DELETE FROM rating_snapshot WHERE league_id != 1")
+    op.execute("DELETE FROM player_aggregate WHERE player_id IN (SELECT id FROM player WHERE league_id != 1)")
+    op.execute("DELETE FROM game WHERE league_id != 1")
+    op.execute("DELETE FROM player WHERE league_id != 1")
+
+    with op.batch_alter_table('rating_snapshot', schema=None) as batch_op:
+        batch_op.drop_index('ix_rating_snapshot_league_id_timestamp_game_id')
+        batch_op.create_index('ix_rating_snapshot_timestamp_game_id', ['timestamp', 'game_id'], unique=False)
+
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.drop_index('ix_game_league_id_timestamp_id')
+        batch_op.create_index('ix_game_timestamp_id', ['timestamp', 'id'], unique=False)
+
+    with op.batch_alter_table('player', schema=None) as batch_op:
+        batch_op.drop_index('ix_player_league_id_name')
+        batch_op.drop_index('ix_player_league_id_is_active_rating')
+        batch_op.create_index('ix_player_name', ['name'], unique=False)
+        batch_op.create_index('ix_player_is_active_rating', ['is_active', 'rating'], unique=False)
+
+    for table in ('rating_snapshot', 'game', 'player'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_league_id_league', type_='foreignkey')
+            batch_op.drop_column('league_id')
+
+    op.drop_table('league')
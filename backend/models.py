@@ -0,0 +1,106 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+
+db = SQLAlchemy()
+
+# Routes without a /leagues/<id> prefix, and data from before leagues
+# existed, belong to this league
+DEFAULT_LEAGUE_ID = 1
+
+# A separate ladder: players only play others in their league, and every
+# ranking, stat and history is per league
+class League(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), nullable=False, unique=True)
+
+# Define models (Player, Game, etc.)
+class Player(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=False, default=DEFAULT_LEAGUE_ID)
+    name = db.Column(db.String(80), nullable=False)
+    rating = db.Column(db.Integer, default=1000)
+    is_active = db.Column(db.Boolean, default=True)
+
+    # Every player listing is within one league
+    __table_args__ = (
+        db.Index('ix_player_league_id_is_active_rating', 'league_id', 'is_active', 'rating'),
+        db.Index('ix_player_league_id_name', 'league_id', 'name'),
+    )
+
+class Game(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=False, default=DEFAULT_LEAGUE_ID)
+    player1_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
+    player2_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
+    player1_score = db.Column(db.Integer, nullable=False)
+    player2_score = db.Column(db.Integer, nullable=False)
+    result = db.Column(db.String(50), nullable=False)
+    timestamp = db.Column(db.DateTime, default = datetime.now, nullable=False)
+    prior_rating_player1 = db.Column(db.Integer, nullable=False, default = 1000)
+    prior_rating_player2 = db.Column(db.Integer, nullable=False, default = 1000)
+    rating_change_player1 = db.Column(db.Integer, nullable=False, default = 0)
+    rating_change_player2 = db.Column(db.Integer, nullable=False, default =0)
+
+    # Per-player history lookups filter on either side and sort by time
+    # (a player's games are all in their league); the feed and replays walk
+    # one league's games in (timestamp, id) order
+    __table_args__ = (
+        db.Index('ix_game_player1_id_timestamp', 'player1_id', 'timestamp'),
+        db.Index('ix_game_player2_id_timestamp', 'player2_id', 'timestamp'),
+        db.Index('ix_game_league_id_timestamp_id', 'league_id', 'timestamp', 'id'),
+    )
+
+# Running per-player totals, kept in step with the game table so stats
+# reads don't have to scan every game
+class PlayerAggregate(db.Model):
+    player_id = db.Column(db.Integer, db.ForeignKey('player.id'), primary_key=True)
+    games_played = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    draws = db.Column(db.Integer, nullable=False, default=0)
+    points_for = db.Column(db.Integer, nullable=False, default=0)
+    points_against = db.Column(db.Integer, nullable=False, default=0)
+    last_game_at = db.Column(db.DateTime, nullable=True)
+    current_streak_type = db.Column(db.String(1), nullable=True)
+    current_streak_length = db.Column(db.Integer, nullable=False, default=0)
+    longest_win_streak = db.Column(db.Integer, nullable=False, default=0)
+    biggest_win_game_id = db.Column(db.Integer, nullable=True)
+    biggest_win_margin = db.Column(db.Integer, nullable=True)
+    biggest_loss_game_id = db.Column(db.Integer, nullable=True)
+    biggest_loss_margin = db.Column(db.Integer, nullable=True)
+
+# Every player's rating in a league after a given game, saved every few
+# thousand games so historical leaderboards only replay the games since the
+# nearest one
+class RatingSnapshot(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=False, default=DEFAULT_LEAGUE_ID)
+    game_id = db.Column(db.Integer, nullable=False, unique=True)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    ratings = db.Column(db.JSON, nullable=False)  # {player_id: rating}
+
+    __table_args__ = (
+        db.Index('ix_rating_snapshot_league_id_timestamp_game_id', 'league_id', 'timestamp', 'game_id'),
+    )
+
+# Maintenance work too large for a request (cascading deletes, replays,
+# rebuilds, exports), queued by the API and run by `flask worker`
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=False, default=DEFAULT_LEAGUE_ID)
+    kind = db.Column(db.String(40), nullable=False)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Workers take the oldest queued job; status pages list a league's latest
+    __table_args__ = (
+        db.Index('ix_job_status_id', 'status', 'id'),
+        db.Index('ix_job_league_id_id', 'league_id', 'id'),
+    )
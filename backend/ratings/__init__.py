@@ -0,0 +1,11 @@
+from .base import GameArrays, RatingSystem, ReplayResult, evaluate, independent_chunks
+from .elo import Elo
+from .glicko2 import Glicko2
+from .trueskill import TrueSkill
+
+RATING_SYSTEMS = {system.name: system for system in (Elo, Glicko2, TrueSkill)}
+
+def get_rating_system(name, **params):
+    if name not in RATING_SYSTEMS:
+        raise ValueError(f"Unknown rating system: {name}")
+    return RATING_SYSTEMS[name](**params)
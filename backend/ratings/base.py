@@ -0,0 +1,137 @@
+import numpy as np
+
+# Split a game sequence into consecutive runs where no player appears twice.
+# Games inside a run don't depend on each other, so they can be rated together.
+def independent_chunks(player1, player2):
+    # Each game's most recent earlier game sharing a player (-1 if none)
+    n = len(player1)
+    players = np.concatenate([player1, player2])
+    games = np.tile(np.arange(n), 2)
+    order = np.lexsort((games, players))
+    previous = np.full(2 * n, -1)
+    same_player = players[order][1:] == players[order][:-1]
+    previous[order[1:][same_player]] = games[order][:-1][same_player]
+    previous = np.maximum(previous[:n], previous[n:])
+
+    chunks = []
+    start = 0
+    for index, earlier in enumerate(previous.tolist()):
+        if earlier >= start:
+            chunks.append((start, index))
+            start = index
+    if start < n:
+        chunks.append((start, n))
+    return chunks
+
+# Chronologically ordered games as parallel arrays, with players mapped to
+# dense indices 0..n_players-1
+class GameArrays:
+    def __init__(self, player1, player2, points1, points2, player_ids=None):
+        self.player1 = np.asarray(player1, dtype=np.intp)
+        self.player2 = np.asarray(player2, dtype=np.intp)
+        self.points1 = np.asarray(points1, dtype=float)
+        self.points2 = np.asarray(points2, dtype=float)
+        self.score1 = np.where(self.points1 > self.points2, 1.0,
+                               np.where(self.points1 < self.points2, 0.0, 0.5))
+        self.player_ids = player_ids if player_ids is not None else \
+            list(range(int(max(self.player1.max(initial=-1), self.player2.max(initial=-1))) + 1))
+        self._chunks = None
+
+    # Build from (player1_id, player2_id, player1_score, player2_score) rows
+    @classmethod
+    def from_rows(cls, rows):
+        index = {}
+        player1, player2, points1, points2 = [], [], [], []
+        for player1_id, player2_id, player1_score, player2_score in rows:
+            player1.append(index.setdefault(player1_id, len(index)))
+            player2.append(index.setdefault(player2_id, len(index)))
+            points1.append(player1_score)
+            points2.append(player2_score)
+        return cls(player1, player2, points1, points2, player_ids=list(index))
+
+    # Build from parallel sequences of player ids and scores
+    @classmethod
+    def from_columns(cls, player1_ids, player2_ids, player1_scores, player2_scores):
+        n = len(player1_ids)
+        player_ids, index = np.unique(
+            np.concatenate([np.asarray(player1_ids, dtype=np.int64), np.asarray(player2_ids, dtype=np.int64)]),
+            return_inverse=True)
+        return cls(index[:n], index[n:], player1_scores, player2_scores, player_ids=player_ids.tolist())
+
+    def __len__(self):
+        return len(self.player1)
+
+    @property
+    def n_players(self):
+        return len(self.player_ids)
+
+    def chunks(self):
+        if self._chunks is None:
+            self._chunks = independent_chunks(self.player1, self.player2)
+        return self._chunks
+
+class ReplayResult:
+    def __init__(self, params, ratings, expected):
+        self.params = params        # name -> (P,) parameter values
+        self.ratings = ratings      # (P, n_players) final ratings
+        self.expected = expected    # (P, n_games) pre-game expected score of player1
+
+    def __len__(self):
+        return self.ratings.shape[0]
+
+# Common interface for rating systems. Every parameter may be given as a
+# scalar or a sequence; sequences are evaluated side by side in one replay,
+# which is what makes parameter sweeps cheap.
+class RatingSystem:
+    name = None
+    defaults = {}
+
+    def __init__(self, **params):
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"Unknown {self.name} parameters: {', '.join(sorted(unknown))}")
+        self.params = {**self.defaults, **params}
+
+    # Broadcast parameters to (P, 1) columns so they line up with (P, chunk) arrays
+    def param_grid(self):
+        values = {name: np.atleast_1d(np.asarray(value, dtype=float)) for name, value in self.params.items()}
+        size = max(len(value) for value in values.values())
+        for name, value in values.items():
+            if len(value) not in (1, size):
+                raise ValueError(f"Parameter {name} has {len(value)} values, expected 1 or {size}")
+        return {name: np.broadcast_to(value, (size,)).reshape(size, 1) for name, value in values.items()}, size
+
+    def initial_state(self, params, size, n_players):
+        raise NotImplementedError
+
+    # Rate one chunk of independent games in place and return player1's
+    # pre-game expected score, shape (P, len(chunk))
+    def update(self, state, params, player1, player2, score1, points1, points2):
+        raise NotImplementedError
+
+    def ratings(self, state, params):
+        raise NotImplementedError
+
+    def replay(self, games):
+        params, size = self.param_grid()
+        state = self.initial_state(params, size, games.n_players)
+        expected = np.empty((size, len(games)))
+        for start, end in games.chunks():
+            expected[:, start:end] = self.update(
+                state, params,
+                games.player1[start:end], games.player2[start:end], games.score1[start:end],
+                games.points1[start:end], games.points2[start:end]
+            )
+        return ReplayResult({name: value[:, 0] for name, value in params.items()},
+                            self.ratings(state, params), expected)
+
+# Predictive quality of each parameter set: Brier score over all games
+# (lower is better) and how often the favourite won a decisive game
+def evaluate(result, games):
+    brier = np.mean((result.expected - games.score1) ** 2, axis=1) if len(games) else np.zeros(len(result))
+    decisive = games.score1 != 0.5
+    if decisive.any():
+        accuracy = np.mean((result.expected[:, decisive] > 0.5) == (games.score1[decisive] == 1.0), axis=1)
+    else:
+        accuracy = np.zeros(len(result))
+    return brier, accuracy
@@ -0,0 +1,86 @@
+import numpy as np
+from .base import RatingSystem
+
+# Elo with a margin-of-victory multiplier, as used for the live ladder
+class Elo(RatingSystem):
+    name = 'elo'
+    defaults = {
+        "k": 32,
+        "margin_divisor": 20,
+        "initial_rating": 1000
+    }
+
+    # Player1's expected score (win probability, draws counting half)
+    def expected_score(self, rating1, rating2):
+        return 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+
+    # Integer rating changes for a single game, matching the stored history
+    def rating_changes(self, rating1, rating2, player1_score, player2_score):
+        if player1_score > player2_score:
+            score1, score2 = 1, 0
+        elif player2_score > player1_score:
+            score1, score2 = 0, 1
+        else:
+            score1 = score2 = 0.5
+
+        expected_score1 = self.expected_score(rating1, rating2)
+        expected_score2 = 1 - expected_score1
+        margin_multiplier = (abs(player1_score - player2_score) + 1) / self.params["margin_divisor"]
+
+        k = self.params["k"]
+        return (
+            int(k * margin_multiplier * (score1 - expected_score1)),
+            int(k * margin_multiplier * (score2 - expected_score2))
+        )
+
+    def initial_state(self, params, size, n_players):
+        return {"rating": np.repeat(params["initial_rating"], n_players, axis=1)}
+
+    def update(self, state, params, player1, player2, score1, points1, points2):
+        ratings = state["rating"]
+        rating1 = ratings[:, player1]
+        rating2 = ratings[:, player2]
+
+        expected_score1 = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+        expected_score2 = 1 - expected_score1
+        margin_multiplier = (np.abs(points1 - points2) + 1) / params["margin_divisor"]
+
+        ratings[:, player1] = rating1 + np.trunc(params["k"] * margin_multiplier * (score1 - expected_score1))
+        ratings[:, player2] = rating2 + np.trunc(params["k"] * margin_multiplier * ((1 - score1) - expected_score2))
+        return expected_score1
+
+    def ratings(self, state, params):
+        return state["rating"]
+
+    # Replay games for a single parameter set from the given starting
+    # ratings (indexed like games.player_ids), recording what the live
+    # ladder stores per game. Returns (prior1, prior2, change1, change2,
+    # final ratings) as arrays. Same arithmetic as update(), on flat arrays,
+    # since a single set makes the per-chunk overhead what counts.
+    def rate_games(self, games, initial_ratings):
+        params, size = self.param_grid()
+        if size != 1:
+            raise ValueError("rate_games takes a single parameter set")
+        ratings = np.array(initial_ratings, dtype=float)
+        prior1 = np.empty(len(games))
+        prior2 = np.empty(len(games))
+        change1 = np.empty(len(games))
+        change2 = np.empty(len(games))
+        weight = params["k"][0, 0] * ((np.abs(games.points1 - games.points2) + 1) / params["margin_divisor"][0, 0])
+        score1 = games.score1
+        score2 = 1 - games.score1
+        for start, end in games.chunks():
+            player1, player2 = games.player1[start:end], games.player2[start:end]
+            rating1 = ratings[player1]
+            rating2 = ratings[player2]
+            expected_score1 = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+            chunk_weight = weight[start:end]
+            delta1 = np.trunc(chunk_weight * (score1[start:end] - expected_score1))
+            delta2 = np.trunc(chunk_weight * (score2[start:end] - (1 - expected_score1)))
+            ratings[player1] = rating1 + delta1
+            ratings[player2] = rating2 + delta2
+            prior1[start:end] = rating1
+            prior2[start:end] = rating2
+            change1[start:end] = delta1
+            change2[start:end] = delta2
+        return prior1, prior2, change1, change2, ratings
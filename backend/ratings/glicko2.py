@@ -0,0 +1,90 @@
+import numpy as np
+from .base import RatingSystem
+
+# Conversion between the Glicko-2 internal scale and display ratings
+SCALE = 173.7178
+
+def g(phi):
+    return 1 / np.sqrt(1 + 3 * phi ** 2 / np.pi ** 2)
+
+# Volatility update (step 5 of Glickman's paper) solved with the Illinois
+# method, element-wise over every (parameter set, game) pair at once
+def new_volatility(phi, sigma, v, delta, tau, tolerance=1e-6, max_iterations=100):
+    a = np.log(sigma ** 2)
+
+    def f(x):
+        ex = np.exp(x)
+        return ex * (delta ** 2 - phi ** 2 - v - ex) / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        large = delta ** 2 > phi ** 2 + v
+        B = np.where(large, np.log(np.where(large, delta ** 2 - phi ** 2 - v, 1)), a - tau)
+        for _ in range(max_iterations):
+            step = ~large & (f(B) < 0)
+            if not step.any():
+                break
+            B = np.where(step, B - tau, B)
+
+        A = a
+        fA = f(A)
+        fB = f(B)
+        for _ in range(max_iterations):
+            active = np.abs(B - A) > tolerance
+            if not active.any():
+                break
+            C = A + (A - B) * fA / (fB - fA)
+            fC = f(C)
+            swap = fC * fB <= 0
+            A = np.where(active, np.where(swap, B, A), A)
+            fA = np.where(active, np.where(swap, fB, fA / 2), fA)
+            B = np.where(active, C, B)
+            fB = np.where(active, fC, fB)
+    return np.exp(A / 2)
+
+# Glicko-2 with every game treated as its own rating period
+class Glicko2(RatingSystem):
+    name = 'glicko2'
+    defaults = {
+        "tau": 0.5,
+        "initial_rating": 1000,
+        "initial_rd": 350,
+        "initial_volatility": 0.06
+    }
+
+    def initial_state(self, params, size, n_players):
+        return {
+            "mu": np.zeros((size, n_players)),
+            "phi": np.repeat(params["initial_rd"] / SCALE, n_players, axis=1),
+            "sigma": np.repeat(params["initial_volatility"], n_players, axis=1)
+        }
+
+    def update_side(self, mu, phi, sigma, opponent_mu, opponent_phi, score, tau):
+        g_opponent = g(opponent_phi)
+        expected = 1 / (1 + np.exp(-g_opponent * (mu - opponent_mu)))
+        v = 1 / (g_opponent ** 2 * expected * (1 - expected))
+        delta = v * g_opponent * (score - expected)
+
+        new_sigma = new_volatility(phi, sigma, v, delta, tau)
+        phi_star = np.sqrt(phi ** 2 + new_sigma ** 2)
+        new_phi = 1 / np.sqrt(1 / phi_star ** 2 + 1 / v)
+        new_mu = mu + new_phi ** 2 * g_opponent * (score - expected)
+        return new_mu, new_phi, new_sigma
+
+    def update(self, state, params, player1, player2, score1, points1, points2):
+        mu, phi, sigma = state["mu"], state["phi"], state["sigma"]
+        mu1, phi1 = mu[:, player1], phi[:, player1]
+        mu2, phi2 = mu[:, player2], phi[:, player2]
+
+        expected_score1 = 1 / (1 + np.exp(-g(np.sqrt(phi1 ** 2 + phi2 ** 2)) * (mu1 - mu2)))
+
+        # Both sides of every game in one pass: player1s then player2s
+        players = np.concatenate((player1, player2))
+        opponents = np.concatenate((player2, player1))
+        scores = np.concatenate((score1, 1 - score1))
+        mu[:, players], phi[:, players], sigma[:, players] = self.update_side(
+            mu[:, players], phi[:, players], sigma[:, players],
+            mu[:, opponents], phi[:, opponents], scores, params["tau"])
+        return expected_score1
+
+    def ratings(self, state, params):
+        return params["initial_rating"] + SCALE * state["mu"]
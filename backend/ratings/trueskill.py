@@ -0,0 +1,83 @@
+from statistics import NormalDist
+import numpy as np
+from .base import RatingSystem
+
+def norm_pdf(x):
+    return np.exp(-x ** 2 / 2) / np.sqrt(2 * np.pi)
+
+# Abramowitz & Stegun 7.1.26; accurate to ~1e-7, which is plenty here
+def norm_cdf(x):
+    z = np.abs(x) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * z)
+    erf = 1 - (((((1.061405429 * t - 1.453152027) * t) + 1.421413741) * t - 0.284496736) * t
+                + 0.254829592) * t * np.exp(-z * z)
+    return 0.5 * (1 + np.sign(x) * erf)
+
+# Additive and multiplicative corrections for a decisive result
+def v_win(x):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = norm_pdf(x) / norm_cdf(x)
+    # Far in the tail use the asymptotic form of the inverse Mills ratio
+    return np.where(x < -5, -x / (1 - 1 / x ** 2 + 3 / x ** 4), ratio)
+
+# Corrections for a draw within margin `eps`
+def v_draw(x, eps):
+    denominator = np.maximum(norm_cdf(eps - x) - norm_cdf(-eps - x), 1e-12)
+    return (norm_pdf(-eps - x) - norm_pdf(eps - x)) / denominator
+
+def w_draw(x, eps):
+    denominator = np.maximum(norm_cdf(eps - x) - norm_cdf(-eps - x), 1e-12)
+    v = v_draw(x, eps)
+    return v ** 2 + ((eps - x) * norm_pdf(eps - x) + (eps + x) * norm_pdf(eps + x)) / denominator
+
+# Two-player TrueSkill (Gaussian skill, one factor per game), on an Elo-like scale
+class TrueSkill(RatingSystem):
+    name = 'trueskill'
+    defaults = {
+        "initial_rating": 1000,
+        "initial_sigma": 1000 / 3,
+        "beta": 1000 / 6,
+        "tau": 1000 / 300,
+        "draw_probability": 0.02
+    }
+
+    def initial_state(self, params, size, n_players):
+        draw_margin = np.array([
+            NormalDist().inv_cdf((p + 1) / 2) for p in params["draw_probability"][:, 0]
+        ])[:, None] * np.sqrt(2) * params["beta"]
+        return {
+            "mu": np.repeat(params["initial_rating"], n_players, axis=1),
+            "sigma": np.repeat(params["initial_sigma"], n_players, axis=1),
+            "draw_margin": draw_margin
+        }
+
+    def update(self, state, params, player1, player2, score1, points1, points2):
+        mu, sigma = state["mu"], state["sigma"]
+        mu1, mu2 = mu[:, player1], mu[:, player2]
+        variance1 = sigma[:, player1] ** 2 + params["tau"] ** 2
+        variance2 = sigma[:, player2] ** 2 + params["tau"] ** 2
+
+        beta = params["beta"]
+        c = np.sqrt(2 * beta ** 2 + variance1 + variance2)
+        eps = state["draw_margin"] / c
+
+        # Orient each game from the winner's side; draws keep player1's side
+        sign = np.where(score1 == 0.0, -1.0, 1.0)
+        x = sign * (mu1 - mu2) / c
+        v = v_win(x - eps)
+        w = v * (v + x - eps)
+        draw = score1 == 0.5
+        if draw.any():
+            v = np.where(draw, v_draw(x, eps), v)
+            w = np.where(draw, w_draw(x, eps), w)
+
+        expected_score1 = norm_cdf((mu1 - mu2) / c)
+
+        mu[:, player1] = mu1 + sign * variance1 / c * v
+        mu[:, player2] = mu2 - sign * variance2 / c * v
+        sigma[:, player1] = np.sqrt(variance1 * np.maximum(1 - variance1 / c ** 2 * w, 1e-6))
+        sigma[:, player2] = np.sqrt(variance2 * np.maximum(1 - variance2 / c ** 2 * w, 1e-6))
+        return expected_score1
+
+    def ratings(self, state, params):
+        return state["mu"]
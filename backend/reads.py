@@ -0,0 +1,269 @@
+from sqlalchemy import select, or_, and_
+from sqlalchemy.orm import aliased
+from models import League, Player, Game, DEFAULT_LEAGUE_ID
+from stats import empty_stats, rating_history, head_to_head
+from aggregates import load_player_stats
+from snapshots import ratings_as_of
+from history import RESOLUTIONS, bucket_history, lttb
+from serialization import PLAYER_FIELDS, GAME_FIELDS, player_json, game_json, response_format, formatted, parse_timestamp
+
+# Payloads for the read endpoints. Each takes a plain (sync) Session, so the
+# Flask routes pass db.session and the ASGI app runs the same code on an
+# AsyncSession through run_sync, and the league the request is scoped to.
+
+# Paging limits for the game feed
+DEFAULT_GAMES_LIMIT = 50
+MAX_GAMES_LIMIT = 500
+
+# Game feed rows: the game plus both players' names and current ratings
+GAME_PAGE_FIELDS = GAME_FIELDS + ("player1_name", "player2_name", "new_rating_player1", "new_rating_player2")
+
+# Point budget for rating history charts
+DEFAULT_HISTORY_POINTS = 200
+MIN_HISTORY_POINTS = 3
+MAX_HISTORY_POINTS = 2000
+
+# League ids known to exist. Leagues are never deleted, so the check costs a
+# query only the first time a worker sees each one.
+known_leagues = {DEFAULT_LEAGUE_ID}
+
+def league_exists(session, league_id):
+    if league_id not in known_leagues and session.get(League, league_id) is not None:
+        known_leagues.add(league_id)
+    return league_id in known_leagues
+
+def leagues_data(session):
+    return [{"id": league.id, "name": league.name} for league in session.scalars(select(League).order_by(League.id))]
+
+# A player by id if they are in the league, else None
+def league_player(session, league_id, player_id):
+    player = session.get(Player, player_id)
+    return player if player is not None and player.league_id == league_id else None
+
+# Keyset cursors are "<timestamp>_<id>" of the last row on the previous page
+def encode_cursor(timestamp, game_id):
+    return f"{timestamp.isoformat()}_{game_id}"
+
+def decode_cursor(cursor):
+    timestamp, _, game_id = cursor.rpartition('_')
+    return parse_timestamp(timestamp), int(game_id)
+
+# Game feed filters from query-string args; raises ValueError if malformed
+def games_page_args(args):
+    player_id = args.get('player_id')
+    start = args.get('start')
+    end = args.get('end')
+    cursor = args.get('cursor')
+    return {
+        "limit": min(int(args.get('limit', DEFAULT_GAMES_LIMIT)), MAX_GAMES_LIMIT),
+        "player_id": int(player_id) if player_id else None,
+        "start": parse_timestamp(start) if start else None,
+        "end": parse_timestamp(end) if end else None,
+        "cursor": decode_cursor(cursor) if cursor else None,
+        "format": response_format(args)
+    }
+
+def players_data(session, league_id, format='objects'):
+    players = session.scalars(select(Player).where(Player.league_id == league_id).order_by(Player.id))
+    return formatted([player_json(player) for player in players], format, PLAYER_FIELDS)
+
+# The current ladder, or the ladder as it stood at `as_of` (players who had
+# played by then, at their rating after their last game up to that moment)
+def rankings_data(session, league_id, as_of=None, format='objects'):
+    active = select(Player).where(Player.league_id == league_id, Player.is_active == True)
+    if as_of is None:
+        ladder = [
+            player_json(player)
+            # Sort by rating in descending order, ties by id
+            for player in session.scalars(active.order_by(Player.rating.desc(), Player.id))
+        ]
+    else:
+        ratings = ratings_as_of(as_of, league_id, session)
+        ladder = [
+            {**player_json(player), "rating": ratings[player.id]}
+            for player in session.scalars(active) if player.id in ratings
+        ]
+        ladder.sort(key=lambda entry: (-entry["rating"], entry["id"]))
+    return formatted(ladder, format, PLAYER_FIELDS)
+
+# A game feed row (GAME_PAGE_FIELDS)
+def game_row(game, player1_name, player1_rating, player2_name, player2_rating):
+    return {
+        **game_json(game),
+        "player1_name": player1_name,
+        "player2_name": player2_name,
+        "new_rating_player1": player1_rating,
+        "new_rating_player2": player2_rating
+    }
+
+# A page of a league's games, newest first, with player names joined in
+def games_page(session, league_id, limit=DEFAULT_GAMES_LIMIT, player_id=None, start=None, end=None, cursor=None,
+               format='objects'):
+    player1 = aliased(Player)
+    player2 = aliased(Player)
+    query = (
+        select(Game, player1.name, player1.rating, player2.name, player2.rating)
+        .join(player1, Game.player1_id == player1.id)
+        .join(player2, Game.player2_id == player2.id)
+        .where(Game.league_id == league_id)
+    )
+
+    if player_id is not None:
+        query = query.where(or_(Game.player1_id == player_id, Game.player2_id == player_id))
+    if start is not None:
+        query = query.where(Game.timestamp >= start)
+    if end is not None:
+        query = query.where(Game.timestamp < end)
+    if cursor is not None:
+        cursor_timestamp, cursor_id = cursor
+        # Range bound as well as the keyset OR, so the scan starts at the cursor
+        query = query.where(Game.timestamp <= cursor_timestamp, or_(
+            Game.timestamp < cursor_timestamp,
+            and_(Game.timestamp == cursor_timestamp, Game.id < cursor_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    rows = session.execute(query.order_by(Game.timestamp.desc(), Game.id.desc()).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    game_data = [game_row(*row) for row in rows]
+
+    return {
+        "games": formatted(game_data, format, GAME_PAGE_FIELDS),
+        "next_cursor": encode_cursor(rows[-1][0].timestamp, rows[-1][0].id) if has_more else None
+    }
+
+# Everything the home page needs for first paint: every player, the ladder
+# (active players by rating, as /rankings) and the first page of games (as
+# /games, plus the cursor after each row so shorter pages can be cut from
+# it). Two queries: the players, which also name the games' players, and
+# the games themselves.
+def bootstrap_data(session, league_id, limit=DEFAULT_GAMES_LIMIT, format='objects'):
+    players = session.scalars(select(Player).where(Player.league_id == league_id).order_by(Player.id)).all()
+    by_id = {player.id: player for player in players}
+    player_list = [player_json(player) for player in players]
+    ladder = sorted((player for player in player_list if player["is_active"]),
+                    key=lambda player: (-player["rating"], player["id"]))
+
+    games = session.scalars(
+        select(Game).where(Game.league_id == league_id)
+        .order_by(Game.timestamp.desc(), Game.id.desc()).limit(limit + 1)
+    ).all()
+    has_more = len(games) > limit
+    games = games[:limit]
+    game_data = [
+        game_row(game, by_id[game.player1_id].name, by_id[game.player1_id].rating,
+                 by_id[game.player2_id].name, by_id[game.player2_id].rating)
+        for game in games
+    ]
+
+    return {
+        "players": formatted(player_list, format, PLAYER_FIELDS),
+        "rankings": formatted(ladder, format, PLAYER_FIELDS),
+        "games": {
+            "games": formatted(game_data, format, GAME_PAGE_FIELDS),
+            "next_cursor": encode_cursor(games[-1].timestamp, games[-1].id) if has_more else None,
+            "cursors": [encode_cursor(game.timestamp, game.id) for game in games]
+        }
+    }
+
+# Player profile and stats, or None if there is no such player in the league
+def player_stats_data(session, league_id, player_id):
+    player = league_player(session, league_id, player_id)
+    if player is None:
+        return None
+    return {**player_json(player), **load_player_stats([player_id], session)[player_id]}
+
+# Rating history filters from query-string args; raises ValueError if malformed
+def rating_history_args(args):
+    start = args.get('start')
+    end = args.get('end')
+    resolution = args.get('resolution', 'game')
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {resolution!r}")
+    points = int(args.get('points', DEFAULT_HISTORY_POINTS))
+    if not MIN_HISTORY_POINTS <= points <= MAX_HISTORY_POINTS:
+        raise ValueError(f"points must be between {MIN_HISTORY_POINTS} and {MAX_HISTORY_POINTS}")
+    return {
+        "start": parse_timestamp(start) if start else None,
+        "end": parse_timestamp(end) if end else None,
+        "resolution": resolution,
+        "points": points
+    }
+
+# A player's rating over time for charting: bucketed to `resolution`, then
+# thinned to at most `points` points. None if there is no such player in
+# the league.
+def rating_history_data(session, league_id, player_id, start=None, end=None, resolution='game',
+                        points=DEFAULT_HISTORY_POINTS):
+    if league_player(session, league_id, player_id) is None:
+        return None
+    history = rating_history(player_id, session, start, end)
+    return {
+        "player_id": player_id,
+        "resolution": resolution,
+        "games": len(history),
+        "history": lttb(bucket_history(history, resolution), points)
+    }
+
+# Columns of the head-to-head matrix rows
+HEAD_TO_HEAD_FIELDS = ("player_a_id", "player_b_id", "games", "player_a_wins", "player_b_wins", "draws", "point_diff")
+
+# League-wide head-to-head records, one row per pair that has played, from
+# the lower id's side. Always in the compact format, as a large league has
+# tens of thousands of pairs.
+def head_to_head_data(session, league_id):
+    return {
+        "fields": HEAD_TO_HEAD_FIELDS,
+        "rows": [
+            (player_a_id, player_b_id, games, a_wins, b_wins, games - a_wins - b_wins, point_diff)
+            for player_a_id, player_b_id, games, a_wins, b_wins, point_diff, _
+            in head_to_head(session=session, league_id=league_id)
+        ]
+    }
+
+# One player's record against each opponent, most played first
+def player_head_to_head_data(session, league_id, player_id):
+    records = []
+    for player_a_id, player_b_id, games, a_wins, b_wins, point_diff, total_points in head_to_head(player_id, session):
+        if player_a_id != player_id:
+            # Flip to this player's side
+            player_b_id, a_wins, b_wins, point_diff = player_a_id, b_wins, a_wins, -point_diff
+        records.append({
+            "opponent_id": player_b_id,
+            "games": games,
+            "wins": a_wins,
+            "losses": b_wins,
+            "draws": games - a_wins - b_wins,
+            "points_for": (total_points + point_diff) // 2,
+            "points_against": (total_points - point_diff) // 2,
+            "point_diff": point_diff
+        })
+    names = dict(session.execute(
+        select(Player.id, Player.name).where(Player.id.in_([record["opponent_id"] for record in records]))
+    ).all())
+    for record in records:
+        record["opponent"] = names[record["opponent_id"]]
+    records.sort(key=lambda record: (-record["games"], record["opponent_id"]))
+    return records
+
+def all_stats_data(session, league_id, format='objects'):
+    all_stats = load_player_stats(session=session, league_id=league_id)
+    return formatted([
+        {**player_json(player), **all_stats.get(player.id, empty_stats())}
+        for player in session.scalars(select(Player).where(Player.league_id == league_id).order_by(Player.id))
+    ], format, PLAYER_FIELDS + tuple(empty_stats()))
+
+# Everything a player's profile needs in one response: stats, the default
+# rating history chart and head-to-head records. None if there is no such
+# player in the league.
+def player_bootstrap_data(session, league_id, player_id):
+    stats = player_stats_data(session, league_id, player_id)
+    if stats is None:
+        return None
+    return {
+        "stats": stats,
+        "rating_history": rating_history_data(session, league_id, player_id),
+        "head_to_head": player_head_to_head_data(session, league_id, player_id)
+    }
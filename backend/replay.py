@@ -0,0 +1,186 @@
+import numpy as np
+from sqlalchemy import select, update, func, case, bindparam
+from models import db, League, Player, Game
+from stats import player_perspective
+from snapshots import invalidate_snapshots, update_snapshots
+from ratings import Elo, GameArrays
+
+# The live ladder is rated with margin-weighted Elo
+rating_system = Elo()
+INITIAL_RATING = rating_system.params["initial_rating"]
+
+# Changed games written per batch, with a progress call after each
+PROGRESS_EVERY = 5000
+
+# game_result for arrays of scores, indexed by sign(player1 - player2) + 1
+GAME_RESULTS = np.array(['player2win', 'draw', 'player1win'], dtype=object)
+
+def game_result(player1_score, player2_score):
+    if player1_score > player2_score:
+        return 'player1win'
+    if player2_score > player1_score:
+        return 'player2win'
+    return 'draw'
+
+# Take row locks on the given players (or every player in a league, or
+# every player) in id order, so concurrent writers touching overlapping
+# players queue up instead of overwriting each other's ratings, and can't
+# deadlock on lock order. Returns the locked players.
+def lock_players(player_ids=None, league_id=None):
+    query = select(Player).order_by(Player.id).with_for_update()
+    if player_ids is not None:
+        query = query.where(Player.id.in_(player_ids))
+    if league_id is not None:
+        query = query.where(Player.league_id == league_id)
+    if db.session.get_bind().dialect.name == 'sqlite':
+        # No row locks (FOR UPDATE is dropped): a no-op write takes the
+        # database write lock instead, held until commit
+        db.session.execute(
+            update(Player).where(query.whereclause if query.whereclause is not None else True)
+            .values(rating=Player.rating).execution_options(synchronize_session=False)
+        )
+    return db.session.execute(query.execution_options(populate_existing=True)).scalars().all()
+
+# Each player's rating going into `since`: the rating after their last
+# earlier game, or the initial rating if they hadn't played yet
+def ratings_before(since, player_ids=None):
+    perspective = player_perspective(player_ids)
+    ranked = (
+        select(
+            perspective.c.player_id,
+            perspective.c.rating_after,
+            func.row_number().over(
+                partition_by=perspective.c.player_id,
+                order_by=(perspective.c.timestamp.desc(), perspective.c.game_id.desc())
+            ).label('rank')
+        )
+        .where(perspective.c.timestamp < since)
+        .subquery('ranked')
+    )
+    rows = db.session.execute(select(ranked.c.player_id, ranked.c.rating_after).where(ranked.c.rank == 1))
+    return dict(rows.all())
+
+# executemany straight through the driver, with the statement compiled
+# once: Core otherwise rebuilds every row's parameters, which is most of the
+# cost of rewriting a long history. `columns` maps each bind name to its
+# values, zipped into the driver's parameter style without per-row lookups.
+def execute_many(connection, statement, columns):
+    compiled = statement.compile(dialect=connection.dialect)
+    if compiled.positional:
+        rows = list(zip(*(columns[name] for name in compiled.positiontup)))
+    else:
+        rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    if rows:
+        connection.exec_driver_sql(compiled.string, rows)
+
+# A query's rows as the driver returns them, skipping SQLAlchemy's per-row
+# processing: for a long all-integer result that costs more than the query
+def fetch_all(connection, statement):
+    result = connection.execute(statement)
+    try:
+        return result.cursor.fetchall()
+    finally:
+        result.close()
+
+# Recompute prior ratings and rating changes for every game in a league
+# (every league when None) at or after `since` (the whole history when
+# None), in chronological order, then write back the games that changed and
+# every affected player's rating.
+# `player_ids` names players whose games were removed, so their rating is
+# refreshed even if they no longer appear after `since`. `progress`, if
+# given, is called with (games replayed, games to replay) as it goes.
+# Returns the number of games replayed.
+def replay_ratings(since=None, player_ids=(), league_id=None, progress=None):
+    db.session.flush()
+    if league_id is None:
+        # A league at a time (they share no players), so each league's
+        # snapshot chain is extended from the games just replayed
+        player_leagues = dict(db.session.execute(
+            select(Player.id, Player.league_id).where(Player.id.in_(player_ids))).all()) if player_ids else {}
+        return sum(
+            replay_ratings(since, [player_id for player_id in player_ids if player_leagues.get(player_id) == league],
+                           league, progress)
+            for league in db.session.scalars(select(League.id).order_by(League.id)).all()
+        )
+
+    # Any player in the league may be rated in the suffix, and new games
+    # must not land between our read and write-back
+    lock_players(league_id=league_id)
+
+    # Plain Core rows, all integers (whether the stored result is still
+    # right is worked out in SQL), straight into an array: no ORM identity
+    # map for what may be the whole history
+    games_table = Game.__table__
+    result = case(
+        (games_table.c.player1_score > games_table.c.player2_score, 'player1win'),
+        (games_table.c.player2_score > games_table.c.player1_score, 'player2win'),
+        else_='draw'
+    )
+    query = select(
+        games_table.c.id, games_table.c.player1_id, games_table.c.player2_id,
+        games_table.c.player1_score, games_table.c.player2_score,
+        games_table.c.prior_rating_player1, games_table.c.prior_rating_player2,
+        games_table.c.rating_change_player1, games_table.c.rating_change_player2,
+        games_table.c.result == result
+    ).where(games_table.c.league_id == league_id).order_by(games_table.c.timestamp, games_table.c.id)
+    if since is not None:
+        query = query.where(games_table.c.timestamp >= since)
+    rows = np.array(fetch_all(db.session.connection(), query), dtype=np.int64).reshape(-1, 10)
+    games = GameArrays.from_columns(rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4])
+
+    # Only players who appear in the replayed suffix can have moved
+    replayed_players = set(player_ids) | set(games.player_ids)
+    before = ratings_before(since, list(replayed_players)) if since is not None and replayed_players else {}
+    if progress is not None:
+        progress(0, len(rows))
+
+    # Rate the suffix in batches of independent games, then compare with
+    # what is stored
+    prior1, prior2, change1, change2, final = rating_system.rate_games(
+        games, [before.get(player_id, INITIAL_RATING) for player_id in games.player_ids])
+    ratings = {**before, **dict(zip(games.player_ids, final.astype(int).tolist()))}
+    new = np.stack([prior1, prior2, change1, change2], axis=1).astype(np.int64)
+    changed = np.flatnonzero((new != rows[:, 5:9]).any(axis=1) | (rows[:, 9] == 0))
+
+    update_game = update(games_table).where(games_table.c.id == bindparam('b_id')).values(
+        result=bindparam('b_result'),
+        prior_rating_player1=bindparam('b_prior1'), prior_rating_player2=bindparam('b_prior2'),
+        rating_change_player1=bindparam('b_change1'), rating_change_player2=bindparam('b_change2')
+    )
+    for offset in range(0, len(changed), PROGRESS_EVERY):
+        batch = changed[offset:offset + PROGRESS_EVERY]
+        execute_many(db.session.connection(), update_game, {
+            "b_id": rows[batch, 0].tolist(),
+            "b_result": GAME_RESULTS[np.sign(rows[batch, 3] - rows[batch, 4]) + 1].tolist(),
+            "b_prior1": new[batch, 0].tolist(), "b_prior2": new[batch, 1].tolist(),
+            "b_change1": new[batch, 2].tolist(), "b_change2": new[batch, 3].tolist()
+        })
+        # Writing takes most of the time, so progress through the games follows it
+        if progress is not None:
+            progress(len(rows) * (offset + len(batch)) // len(changed), len(rows))
+    if replayed_players:
+        players_table = Player.__table__
+        execute_many(
+            db.session.connection(),
+            update(players_table).where(players_table.c.id == bindparam('b_id')).values(rating=bindparam('b_rating')),
+            {"b_id": list(replayed_players),
+             "b_rating": [ratings.get(player_id, INITIAL_RATING) for player_id in replayed_players]}
+        )
+
+    # The snapshot chain picks up from the replayed games, already in memory
+    invalidate_snapshots(since, league_id)
+    after = new[:, 0:2] + new[:, 2:4]
+    update_snapshots(league_id, replayed=(since, list(zip(
+        rows[:, 0].tolist(), rows[:, 1].tolist(), rows[:, 2].tolist(), after[:, 0].tolist(), after[:, 1].tolist()))))
+    db.session.expire_all()
+    return len(rows)
+
+# The full history as arrays for batch replays and rating-system comparisons
+def load_game_arrays():
+    games_table = Game.__table__
+    rows = db.session.connection().execute(
+        select(games_table.c.player1_id, games_table.c.player2_id,
+               games_table.c.player1_score, games_table.c.player2_score)
+        .order_by(games_table.c.timestamp, games_table.c.id)
+    )
+    return GameArrays.from_rows(rows)
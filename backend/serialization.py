@@ -0,0 +1,158 @@
+import gzip
+from datetime import datetime, timezone
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# The JSON shape of each model, shared by every route that returns one
+
+PLAYER_FIELDS = ("id", "name", "rating", "is_active")
+
+GAME_FIELDS = (
+    "id", "player1_id", "player2_id", "player1_score", "player2_score", "result", "timestamp",
+    "prior_rating_player1", "prior_rating_player2", "rating_change_player1", "rating_change_player2"
+)
+
+JOB_FIELDS = (
+    "id", "kind", "params", "status", "progress", "total", "result", "error",
+    "created_at", "started_at", "finished_at"
+)
+
+def player_json(player):
+    return {field: getattr(player, field) for field in PLAYER_FIELDS}
+
+def game_json(game):
+    return {field: getattr(game, field) for field in GAME_FIELDS}
+
+def job_json(job):
+    return {field: getattr(job, field) for field in JOB_FIELDS}
+
+# Response formats for list endpoints: an array of objects, or "compact"
+# with the keys listed once and each record as an array in the same order
+RESPONSE_FORMATS = ('objects', 'compact')
+
+def response_format(args):
+    format = args.get('format', 'objects')
+    if format not in RESPONSE_FORMATS:
+        raise ValueError(f"Unknown format {format!r}")
+    return format
+
+def compact(records, fields):
+    return {"fields": fields, "rows": [[record[field] for field in fields] for record in records]}
+
+def formatted(records, format, fields):
+    return compact(records, fields) if format == 'compact' else records
+
+WEEKDAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+MONTH_NAMES = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# An ISO 8601 timestamp on the clock stored timestamps use: naive local time,
+# as datetime.now() gives. Ones with an offset are converted to it, since
+# comparing aware and naive datetimes fails. Raises ValueError if malformed.
+def parse_timestamp(value):
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
+# orjson-backed drop-in for Flask's JSON provider: same output (sorted keys,
+# HTTP dates), several times faster on large lists
+class OrjsonProvider(DefaultJSONProvider):
+    # Flask's HTTP date format (naive datetimes are UTC) without going
+    # through email.utils, which dominates on game lists
+    @staticmethod
+    def default(o):
+        if isinstance(o, datetime):
+            if o.tzinfo is not None:
+                o = o.astimezone(timezone.utc)
+            return (f"{WEEKDAY_NAMES[o.weekday()]}, {o.day:02d} {MONTH_NAMES[o.month - 1]} {o.year:04d} "
+                    f"{o.hour:02d}:{o.minute:02d}:{o.second:02d} GMT")
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def json_provider(app):
+    return OrjsonProvider(app) if orjson is not None else DefaultJSONProvider(app)
+
+# Bodies smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/csv', 'text/plain')
+
+# Fast settings: responses are compressed on the request path
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# The client's preferred encoding we can produce, or None for identity
+def negotiate_encoding(accept_encoding):
+    if not accept_encoding:
+        return None
+    return parse_accept_header(accept_encoding, Accept).best_match(supported_encodings())
+
+def compress(body, encoding):
+    if isinstance(body, str):
+        body = body.encode()
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+# ASGI counterpart of the Flask compress_response hook, for routes served
+# outside Flask. Buffers the body, so only for plain (non-streamed) responses.
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        accept_encoding = dict(scope['headers']).get(b'accept-encoding', b'').decode('latin-1')
+        start = None
+        chunks = []
+
+        async def compressing_send(message):
+            nonlocal start
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+            if message['type'] != 'http.response.body':
+                return await send(message)
+            chunks.append(message.get('body', b''))
+            if message.get('more_body'):
+                return
+            body = b''.join(chunks)
+            headers = [(name, value) for name, value in start['headers'] if name.lower() != b'content-length']
+            header_names = {name.lower() for name, _ in headers}
+            content_type = dict((name.lower(), value) for name, value in headers).get(b'content-type', b'')
+            if (start['status'] not in (204, 304) and b'content-encoding' not in header_names
+                    and content_type.split(b';')[0].decode('latin-1') in COMPRESSIBLE_MIMETYPES):
+                if not any(name.lower() == b'vary' and b'accept-encoding' in value.lower() for name, value in headers):
+                    headers.append((b'vary', b'Accept-Encoding'))
+                encoding = negotiate_encoding(accept_encoding)
+                if encoding is not None and len(body) >= COMPRESS_MIN_BYTES:
+                    body = compress(body, encoding)
+                    headers.append((b'content-encoding', encoding.encode()))
+            headers.append((b'content-length', str(len(body)).encode()))
+            await send({**start, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, compressing_send)
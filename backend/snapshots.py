@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, func, or_, and_
+from sqlalchemy.exc import IntegrityError
+from models import db, League, Game, RatingSnapshot
+
+# Games folded between consecutive snapshots
+SNAPSHOT_INTERVAL = 5000
+
+# Only games at least this old go into snapshots, so a transaction still in
+# flight can't commit a game behind one that has already been taken
+SNAPSHOT_SETTLE_TIME = timedelta(minutes=1)
+
+# A league's games after `snapshot` (from the start when None) up to
+# `until` inclusive (or `before` exclusive), in replay order, with each
+# side's rating after the game
+def games_after(league_id, snapshot=None, until=None, before=None):
+    games = Game.__table__
+    query = select(
+        games.c.id, games.c.player1_id, games.c.player2_id,
+        games.c.prior_rating_player1 + games.c.rating_change_player1,
+        games.c.prior_rating_player2 + games.c.rating_change_player2
+    ).where(games.c.league_id == league_id).order_by(games.c.timestamp, games.c.id)
+    if snapshot is not None:
+        # The plain bound keeps the index range tight; SQLite won't derive
+        # one from the OR once league_id leads the index
+        query = query.where(games.c.timestamp >= snapshot.timestamp, or_(
+            games.c.timestamp > snapshot.timestamp,
+            and_(games.c.timestamp == snapshot.timestamp, games.c.id > snapshot.game_id)
+        ))
+    if until is not None:
+        query = query.where(games.c.timestamp <= until)
+    if before is not None:
+        query = query.where(games.c.timestamp < before)
+    return query
+
+def latest_snapshot(session, league_id, as_of=None):
+    query = (
+        select(RatingSnapshot)
+        .where(RatingSnapshot.league_id == league_id)
+        .order_by(RatingSnapshot.timestamp.desc(), RatingSnapshot.game_id.desc())
+    )
+    if as_of is not None:
+        query = query.where(RatingSnapshot.timestamp <= as_of)
+    return session.scalars(query.limit(1)).first()
+
+def snapshot_ratings(snapshot):
+    # JSON object keys come back as strings
+    return {int(player_id): rating for player_id, rating in snapshot.ratings.items()} if snapshot else {}
+
+# Rating of everyone in a league who had played by `as_of` (inclusive): the
+# nearest earlier snapshot, then the games since
+def ratings_as_of(as_of, league_id, session=None):
+    session = session or db.session
+    snapshot = latest_snapshot(session, league_id, as_of)
+    ratings = snapshot_ratings(snapshot)
+    for _, player1_id, player2_id, rating1, rating2 in session.execute(games_after(league_id, snapshot, as_of)):
+        ratings[player1_id] = rating1
+        ratings[player2_id] = rating2
+    return ratings
+
+# Drop the snapshots taken at or after `since` (all of them when None) in
+# a league (every league when None), once the history from there on has
+# been rewritten
+def invalidate_snapshots(since=None, league_id=None):
+    query = delete(RatingSnapshot)
+    if since is not None:
+        query = query.where(RatingSnapshot.timestamp >= since)
+    if league_id is not None:
+        query = query.where(RatingSnapshot.league_id == league_id)
+    db.session.execute(query)
+
+# Extend a league's snapshot chain (every league's when None) over settled
+# games, saving one every SNAPSHOT_INTERVAL games. A replay passes
+# `replayed` as (since, games): every game of the league from `since` on
+# (from the start when None), as games_after rows with the ratings it just
+# wrote, so only the few games between the chain's end and `since` are
+# read back. Returns the number of snapshots taken.
+def update_snapshots(league_id=None, replayed=None):
+    db.session.flush()
+    if league_id is None:
+        return sum(update_snapshots(league_id) for league_id in db.session.scalars(select(League.id)).all())
+
+    settled = datetime.now() - SNAPSHOT_SETTLE_TIME
+    snapshot = latest_snapshot(db.session, league_id)
+
+    # Most writes don't complete an interval; count at most that many rows
+    pending = db.session.scalar(
+        select(func.count()).select_from(games_after(league_id, snapshot, settled).limit(SNAPSHOT_INTERVAL).subquery()))
+    if pending < SNAPSHOT_INTERVAL:
+        return 0
+
+    since, replayed_games = replayed if replayed is not None else (None, None)
+    if replayed_games is None or (since is not None and since > settled):
+        games = db.session.connection().execute(games_after(league_id, snapshot, settled)).fetchall()
+    else:
+        # Unsettled games all sort after `since`, so they are the tail
+        unsettled = db.session.scalar(
+            select(func.count()).where(Game.league_id == league_id, Game.timestamp > settled))
+        games = replayed_games[:len(replayed_games) - unsettled]
+        if since is not None:
+            games = db.session.connection().execute(games_after(league_id, snapshot, before=since)).fetchall() + games
+
+    ratings = snapshot_ratings(snapshot)
+    taken = []
+    for folded, (game_id, player1_id, player2_id, rating1, rating2) in enumerate(games, 1):
+        ratings[player1_id] = rating1
+        ratings[player2_id] = rating2
+        if folded % SNAPSHOT_INTERVAL == 0:
+            taken.append((game_id, dict(ratings)))
+
+    # Timestamps only for the games snapshotted, rather than parsing one per row
+    timestamps = dict(db.session.execute(
+        select(Game.id, Game.timestamp).where(Game.id.in_([game_id for game_id, _ in taken]))).all())
+    new_snapshots = [
+        RatingSnapshot(league_id=league_id, game_id=game_id, timestamp=timestamps[game_id], ratings=ratings)
+        for game_id, ratings in taken
+    ]
+
+    # Another worker may be saving the same snapshots; theirs are identical
+    try:
+        with db.session.begin_nested():
+            db.session.add_all(new_snapshots)
+    except IntegrityError:
+        return 0
+    return len(new_snapshots)
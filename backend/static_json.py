@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import os
+import shlex
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from reads import rankings_data, players_data, games_page, all_stats_data, encode_cursor, GAME_PAGE_FIELDS
+
+# Hashed files dropped from the manifest are kept this long for clients
+# still holding an earlier one
+STALE_FILE_SECONDS = 3600
+
+MANIFEST = 'manifest.json'
+
+# The read-only payloads the frontend needs without logging in, published
+# as static JSON so a static host can serve them instead of the backend.
+# Each league gets a directory (<directory>/leagues/<id>/) of files named by
+# a hash of their content, so they can be cached forever, and a
+# manifest.json naming the current ones with the cache version they were
+# built from. Publishing rewrites only files whose content changed.
+class StaticPublisher:
+    def __init__(self, directory, sync_command=None, dumps=json.dumps):
+        self.directory = directory
+        self.sync_command = sync_command
+        self.dumps = dumps
+
+    def league_dir(self, league_id):
+        return os.path.join(self.directory, 'leagues', str(league_id))
+
+    def manifest(self, league_id):
+        try:
+            with open(os.path.join(self.league_dir(league_id), MANIFEST)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    # Each payload by manifest name, in the same shape as the API response:
+    # /rankings, /players, the first page of /games?format=compact (with a
+    # cursor after every row, so shorter pages can be cut from it) and
+    # /players/<id>/stats
+    def payloads(self, session, league_id):
+        yield 'rankings', rankings_data(session, league_id)
+        yield 'players', players_data(session, league_id)
+        page = games_page(session, league_id, format='compact')
+        timestamp, game_id = GAME_PAGE_FIELDS.index('timestamp'), GAME_PAGE_FIELDS.index('id')
+        yield 'games', {**page, "cursors": [encode_cursor(row[timestamp], row[game_id]) for row in page["games"]["rows"]]}
+        for player_stats in all_stats_data(session, league_id):
+            yield f"stats/{player_stats['id']}", player_stats
+
+    # Publish a league's files as of cache `version` (read before the data,
+    # so a write landing meanwhile leaves the manifest behind and the next
+    # check publishes again). Returns the number of files written.
+    def publish(self, session, league_id, version):
+        league_dir = self.league_dir(league_id)
+        os.makedirs(league_dir, exist_ok=True)
+        published = self.manifest(league_id).get('files', {})
+        files = {}
+        written = 0
+        for name, data in self.payloads(session, league_id):
+            body = self.dumps(data)
+            body = body.encode('utf-8') if isinstance(body, str) else body
+            filename = f"{name.replace('/', '-')}.{hashlib.sha256(body).hexdigest()[:16]}.json"
+            if published.get(name) != filename or not os.path.exists(os.path.join(league_dir, filename)):
+                write_file(os.path.join(league_dir, filename), body)
+                written += 1
+                superseded(league_dir, published.get(name))
+            files[name] = filename
+
+        manifest = {"version": str(version), "published_at": datetime.now().isoformat(), "files": files}
+        write_file(os.path.join(league_dir, MANIFEST), json.dumps(manifest).encode('utf-8'))
+        self.remove_stale(league_dir, set(files.values()))
+        if written:
+            self.sync()
+        return written
+
+    # Publish the league if its data changed since the last publish
+    def refresh(self, session, league_id, version):
+        if self.manifest(league_id).get('version') == str(version):
+            return 0
+        return self.publish(session, league_id, version)
+
+    def remove_stale(self, league_dir, current):
+        cutoff = time.time() - STALE_FILE_SECONDS
+        for entry in os.scandir(league_dir):
+            if entry.name != MANIFEST and entry.name not in current and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+    # Push the directory to wherever it is served from (e.g. a script that
+    # commits it to the Pages branch or syncs a bucket)
+    def sync(self):
+        if not self.sync_command:
+            return
+        try:
+            subprocess.run(shlex.split(self.sync_command), cwd=self.directory, check=True, timeout=300)
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.error(f"Static JSON sync failed: {e}")
+
+# Restart a replaced file's clock, so it is kept for STALE_FILE_SECONDS
+# from now rather than from when it was written
+def superseded(league_dir, filename):
+    try:
+        if filename:
+            os.utime(os.path.join(league_dir, filename))
+    except FileNotFoundError:
+        pass
+
+# Write via a temp file so readers never see a partial file
+def write_file(path, body):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(body)
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
@@ -0,0 +1,184 @@
+from sqlalchemy import select, union_all, func, case, or_
+from models import db, Player, Game
+
+# One row per (game, participant) so each player's games can be grouped
+# without caring whether they were player1 or player2. Time bounds (start
+# inclusive, end exclusive) go on each side so they can use the
+# (player, timestamp) indexes.
+def player_perspective(player_ids=None, start=None, end=None):
+    side1 = select(
+        Game.id.label('game_id'),
+        Game.player1_id.label('player_id'),
+        Game.player2_id.label('opponent_id'),
+        Game.player1_score.label('points_for'),
+        Game.player2_score.label('points_against'),
+        (Game.prior_rating_player1 + Game.rating_change_player1).label('rating_after'),
+        Game.timestamp.label('timestamp')
+    )
+    side2 = select(
+        Game.id.label('game_id'),
+        Game.player2_id.label('player_id'),
+        Game.player1_id.label('opponent_id'),
+        Game.player2_score.label('points_for'),
+        Game.player1_score.label('points_against'),
+        (Game.prior_rating_player2 + Game.rating_change_player2).label('rating_after'),
+        Game.timestamp.label('timestamp')
+    )
+    if player_ids is not None:
+        side1 = side1.where(Game.player1_id.in_(player_ids))
+        side2 = side2.where(Game.player2_id.in_(player_ids))
+    if start is not None:
+        side1 = side1.where(Game.timestamp >= start)
+        side2 = side2.where(Game.timestamp >= start)
+    if end is not None:
+        side1 = side1.where(Game.timestamp < end)
+        side2 = side2.where(Game.timestamp < end)
+    return union_all(side1, side2).subquery('perspective')
+
+def empty_stats():
+    return {
+        "games_played": 0,
+        "wins": 0,
+        "losses": 0,
+        "draws": 0,
+        "points_for": 0,
+        "points_against": 0,
+        "last_game_at": None,
+        "avg_points_for": 0,
+        "avg_points_against": 0,
+        "biggest_win": None,
+        "biggest_loss": None,
+        "current_streak": None,
+        "longest_win_streak": 0
+    }
+
+# Largest margin game per player, resolved with a window function
+def biggest_margins(player_ids, won):
+    perspective = player_perspective(player_ids)
+    margin = (perspective.c.points_for - perspective.c.points_against) if won \
+        else (perspective.c.points_against - perspective.c.points_for)
+    ranked = (
+        select(
+            perspective.c.game_id,
+            perspective.c.player_id,
+            perspective.c.opponent_id,
+            perspective.c.points_for,
+            perspective.c.points_against,
+            margin.label('margin'),
+            func.row_number().over(
+                partition_by=perspective.c.player_id,
+                order_by=(margin.desc(), perspective.c.timestamp.desc(), perspective.c.game_id.desc())
+            ).label('rank')
+        )
+        .where(margin > 0)
+        .subquery('ranked')
+    )
+    rows = db.session.execute(
+        select(ranked, Player.name)
+        .join(Player, Player.id == ranked.c.opponent_id)
+        .where(ranked.c.rank == 1)
+    )
+    return {row.player_id: {
+        "game_id": row.game_id,
+        "margin": row.margin,
+        "player_score": row.points_for,
+        "opponent_score": row.points_against,
+        "opponent_id": row.opponent_id,
+        "opponent": row.name
+    } for row in rows}
+
+# Current and longest-win streaks need game order, so walk the outcomes once
+def streaks(player_ids):
+    perspective = player_perspective(player_ids)
+    rows = db.session.execute(
+        select(perspective.c.player_id, perspective.c.points_for, perspective.c.points_against)
+        .order_by(perspective.c.player_id, perspective.c.timestamp, perspective.c.game_id)
+    )
+    result = {}
+    for player_id, points_for, points_against in rows:
+        streak = result.setdefault(player_id, {"current_streak": None, "longest_win_streak": 0})
+        outcome = 'W' if points_for > points_against else 'L' if points_for < points_against else 'D'
+        current = streak["current_streak"]
+        if current and current["type"] == outcome:
+            current["length"] += 1
+        else:
+            current = streak["current_streak"] = {"type": outcome, "length": 1}
+        if outcome == 'W':
+            streak["longest_win_streak"] = max(streak["longest_win_streak"], current["length"])
+    return result
+
+# Stats for the given players (or everyone) keyed by player id
+def compute_player_stats(player_ids=None):
+    perspective = player_perspective(player_ids)
+    rows = db.session.execute(
+        select(
+            perspective.c.player_id,
+            func.count().label('games_played'),
+            func.sum(case((perspective.c.points_for > perspective.c.points_against, 1), else_=0)).label('wins'),
+            func.sum(case((perspective.c.points_for < perspective.c.points_against, 1), else_=0)).label('losses'),
+            func.sum(case((perspective.c.points_for == perspective.c.points_against, 1), else_=0)).label('draws'),
+            func.sum(perspective.c.points_for).label('points_for'),
+            func.sum(perspective.c.points_against).label('points_against'),
+            func.max(perspective.c.timestamp).label('last_game_at')
+        ).group_by(perspective.c.player_id)
+    )
+
+    stats = {player_id: empty_stats() for player_id in (player_ids or [])}
+    for row in rows:
+        stats[row.player_id] = {
+            **empty_stats(),
+            "games_played": row.games_played,
+            "wins": row.wins,
+            "losses": row.losses,
+            "draws": row.draws,
+            "points_for": row.points_for,
+            "points_against": row.points_against,
+            "last_game_at": row.last_game_at,
+            "avg_points_for": round(row.points_for / row.games_played, 2),
+            "avg_points_against": round(row.points_against / row.games_played, 2)
+        }
+
+    for player_id, biggest_win in biggest_margins(player_ids, won=True).items():
+        stats[player_id]["biggest_win"] = biggest_win
+    for player_id, biggest_loss in biggest_margins(player_ids, won=False).items():
+        stats[player_id]["biggest_loss"] = biggest_loss
+    for player_id, streak in streaks(player_ids).items():
+        stats[player_id].update(streak)
+    return stats
+
+# Rating after each of a player's games, oldest first
+def rating_history(player_id, session=None, start=None, end=None):
+    perspective = player_perspective([player_id], start, end)
+    rows = (session or db.session).execute(
+        select(perspective.c.timestamp, perspective.c.rating_after)
+        .order_by(perspective.c.timestamp, perspective.c.game_id)
+    )
+    return [{"date": timestamp, "rating": rating} for timestamp, rating in rows]
+
+# Record of every pair that has played in a league (or every pair involving
+# `player_id`, whose games are all in their own league), in one GROUP BY over
+# (lower id, higher id) so each pair is counted once whichever side each
+# player was on. Margins are from the lower id's side; its points are
+# (total_points + point_diff) / 2.
+def head_to_head(player_id=None, session=None, league_id=None):
+    lower_first = Game.player1_id < Game.player2_id
+    player_a = case((lower_first, Game.player1_id), else_=Game.player2_id)
+    player_b = case((lower_first, Game.player2_id), else_=Game.player1_id)
+    margin = case(
+        (lower_first, Game.player1_score - Game.player2_score),
+        else_=Game.player2_score - Game.player1_score
+    )
+    query = select(
+        player_a.label('player_a_id'),
+        player_b.label('player_b_id'),
+        func.count().label('games'),
+        func.sum(case((margin > 0, 1), else_=0)).label('player_a_wins'),
+        func.sum(case((margin < 0, 1), else_=0)).label('player_b_wins'),
+        func.sum(margin).label('point_diff'),
+        func.sum(Game.player1_score + Game.player2_score).label('total_points')
+    ).group_by(player_a, player_b).order_by(player_a, player_b)
+    if player_id is not None:
+        query = query.where(or_(Game.player1_id == player_id, Game.player2_id == player_id))
+    if league_id is not None:
+        query = query.where(Game.league_id == league_id)
+    return (session or db.session).execute(query).all()
@@ -1,5 +1,6 @@
 import React, { createContext, useState, useEffect } from 'react';
-import { api } from './services/api';
+import { getAuthStatus } from './services/api';
+import { restartEvents } from './services/events';
 
 interface AuthContextProps {
   authenticated: boolean;
@@ -20,9 +21,9 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
   const checkAuthStatus = async () => {
     try {
-      const response = await api.get('/auth_status');
-      setAuthenticated(response.data.authenticated);
-      localStorage.setItem('authenticated', response.data.authenticated.toString());
+      const status = await getAuthStatus();
+      setAuthenticated(status);
+      localStorage.setItem('authenticated', status.toString());
     } catch (error) {
       setAuthenticated(false);
       localStorage.removeItem('authenticated');
@@ -33,6 +34,11 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
     checkAuthStatus();
   }, []);
 
+  // Admins get live events and reads; visitors may be on static data
+  useEffect(() => {
+    restartEvents();
+  }, [authenticated]);
+
   return (
     <AuthContext.Provider value={{ authenticated, setAuthenticated, checkAuthStatus }}>
       {children}
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { getGameHistory } from '../services/api';
+import { useLiveEvents } from '../hooks/useLiveEvents';
 import { Table, Loader, Title, Text } from '@mantine/core';
 import { format } from 'date-fns';
 
@@ -13,6 +14,8 @@ interface Game {
   timestamp: string;
 }
 
+const RECENT_GAMES = 10;
+
 interface GameHistoryProps{
   refresh: boolean;
 }
@@ -21,12 +24,13 @@ const GameHistory: React.FC<GameHistoryProps> = ({ refresh }) => {
   const [games, setGames] = useState<Game[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
+  const [reload, setReload] = useState(false);
 
   useEffect(() => {
     const fetchGames = async () => {
       try {
-        const data = await getGameHistory();
-        setGames(data);
+        const page = await getGameHistory({ limit: RECENT_GAMES });
+        setGames(page.games);
       } catch (err) {
         setError('Failed to fetch game history');
       } finally {
@@ -35,7 +39,17 @@ const GameHistory: React.FC<GameHistoryProps> = ({ refresh }) => {
     };
 
     fetchGames();
-  }, [refresh]);
+  }, [refresh, reload]);
+
+  // New games go straight on top; anything else that could change the list
+  // refetches the few rows shown
+  useLiveEvents((event) => {
+    if (event.type === 'game_added') {
+      setGames((prev) => [event.game, ...prev.filter((game) => game.id !== event.game.id)].slice(0, RECENT_GAMES));
+    } else if (event.type === 'game_updated' || event.type === 'game_deleted' || event.type === 'player_deleted' || event.type === 'resync') {
+      setReload((prev) => !prev);
+    }
+  });
 
   if (loading) {
     return <Text ></Text>;
@@ -45,8 +59,6 @@ const GameHistory: React.FC<GameHistoryProps> = ({ refresh }) => {
     return <Text color="red">{error}</Text>;
   }
 
-  const recentGames = games.slice(0, 10);
-
   return (
     <div>
       <Title order={1}>Recent Game Results</Title>
@@ -63,7 +75,7 @@ const GameHistory: React.FC<GameHistoryProps> = ({ refresh }) => {
             </Table.Tr>
           </Table.Thead>
           <Table.Tbody>
-            {recentGames.map((game) => (
+            {games.map((game) => (
               <Table.Tr key={game.id}>
                 <Table.Td>{format(new Date(game.timestamp), "MMM d, yyyy")}</Table.Td>
                 <Table.Td>{format(new Date(game.timestamp), "p")}</Table.Td>
@@ -1,11 +1,10 @@
 import React from 'react';
 import { BarChart } from '@mantine/charts';
-import { Game, Player } from '../types';
+import { HeadToHeadRecord } from '../types';
 import { Paper, Group, Text } from '@mantine/core';
 
 interface WinRateChartProps {
-  player: Player;
-  games: Game[];
+  records: HeadToHeadRecord[];
 }
 
 interface ChartData {
@@ -35,40 +34,13 @@ const ChartTooltip: React.FC<ChartTooltipProps> = ({ label, payload }) => {
   );
 };
 
-const WinRateChart: React.FC<WinRateChartProps> = ({ player, games }) => {
-  // Calculate the win rates against each opponent
-  const opponentStats: { [opponent: string]: { wins: number; losses: number } } = {};
-
-  games.forEach((game) => {
-    if (game.player1_name === player.name || game.player2_name === player.name) {
-      const opponent = game.player1_name === player.name ? game.player2_name : game.player1_name;
-      const didWin = (game.player1_name === player.name && game.player1_score > game.player2_score) ||
-                     (game.player2_name === player.name && game.player2_score > game.player1_score);
-
-      if (!opponentStats[opponent]) {
-        opponentStats[opponent] = { wins: 0, losses: 0 };
-      }
-
-      if (didWin) {
-        opponentStats[opponent].wins += 1;
-      } else {
-        opponentStats[opponent].losses += 1;
-      }
-    }
-  });
-
-  console.log('Opponent Stats:', opponentStats);
-
-  // Prepare data for the bar chart
-  const data: ChartData[] = Object.entries(opponentStats)
-    .map(([opponent, stats]) => {
-      const totalGames = stats.wins + stats.losses;
-      const winRate = (stats.wins / totalGames) * 100;
-      return { opponent, winRate, totalGames };
-    })
-    .sort((a, b) => b.totalGames - a.totalGames); // Sort by total games played
-
-  console.log('Chart Data:', data);
+const WinRateChart: React.FC<WinRateChartProps> = ({ records }) => {
+  // Records come from the backend sorted by total games played
+  const data: ChartData[] = records.map(({ opponent, wins, games }) => ({
+    opponent,
+    winRate: (wins / games) * 100,
+    totalGames: games,
+  }));
 
   return (
     <Paper withBorder p="md" radius="md">
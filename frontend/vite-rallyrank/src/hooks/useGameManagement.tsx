@@ -1,13 +1,14 @@
-import { Dispatch, SetStateAction, useState, useEffect, useContext } from 'react';
+import { useState, useEffect, useContext } from 'react';
 import { AuthContext } from '@/AuthContext';
 import { getGameHistory, addGameResult, editGame, deleteGame } from '../services/api';
+import { applyGameRatingChanges } from '../services/events';
+import { useLiveEvents } from './useLiveEvents';
 import { showNotification } from '@mantine/notifications';
 import { Game } from '../types';
 
-export const useGameManagement = (
-  setPlayersRefresh: Dispatch<SetStateAction<boolean>>
-) => {
+export const useGameManagement = () => {
   const [games, setGames] = useState<Game[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
   const [refresh, setRefresh] = useState(false);
   const { setAuthenticated } = useContext(AuthContext);
@@ -16,8 +17,9 @@ export const useGameManagement = (
     const fetchGames = async () => {
       setLoading(true);
       try {
-        const gamesData = await getGameHistory();
-        setGames(gamesData);
+        const page = await getGameHistory();
+        setGames(page.games);
+        setNextCursor(page.next_cursor);
       } catch (error) {
         console.error('Error fetching game history:', error);
         showNotification({ message: 'Failed to fetch game history', color: 'red' });
@@ -28,6 +30,47 @@ export const useGameManagement = (
     fetchGames();
   }, [refresh]);
 
+  // Patch the loaded games from pushed changes (ours included) instead of
+  // refetching; refetch only when told to resync
+  useLiveEvents((event) => {
+    switch (event.type) {
+      case 'game_added':
+        setGames((prev) => [event.game, ...applyGameRatingChanges(prev.filter((game) => game.id !== event.game.id), event.ratings)]);
+        break;
+      case 'game_updated':
+        setGames((prev) => applyGameRatingChanges(prev, event.ratings).map((game) => (game.id === event.game.id ? event.game : game)));
+        break;
+      case 'game_deleted':
+        setGames((prev) => applyGameRatingChanges(prev.filter((game) => game.id !== event.game_id), event.ratings));
+        break;
+      case 'player_deleted':
+        setGames((prev) => applyGameRatingChanges(
+          prev.filter((game) => game.player1_id !== event.player_id && game.player2_id !== event.player_id),
+          event.ratings
+        ));
+        break;
+      case 'resync':
+        setRefresh((prev) => !prev);
+        break;
+    }
+  });
+
+  // Append the next page of older games to the loaded window
+  const loadMoreGames = async () => {
+    if (!nextCursor) return;
+    setLoading(true);
+    try {
+      const page = await getGameHistory({ cursor: nextCursor });
+      setGames((prev) => [...prev, ...page.games]);
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Error fetching game history:', error);
+      showNotification({ message: 'Failed to fetch game history', color: 'red' });
+    } finally {
+      setLoading(false);
+    }
+  };
+
   // Handle adding a game result
   const handleAddGameResult = async (gameForm: any, setGameModalOpened: (value: boolean) => void, resetForm: () => void) => {
     const { player1, player2, player1score, player2score } = gameForm.values;
@@ -46,9 +89,6 @@ export const useGameManagement = (
       showNotification({ message: 'Game added successfully!', color: 'green' });
       setGameModalOpened(false);
       resetForm();
-      setRefresh((prev) => !prev);  // Trigger refresh after adding game
-      setPlayersRefresh((prev) => !prev);
-      console.log('Triggering players refresh after game result...');
     } catch (error: any) {
       if (error.response && error.response.status === 401) {
         setAuthenticated(false);
@@ -67,10 +107,11 @@ export const useGameManagement = (
   const handleEditGame = async (gameId: number, updatedGame: any) => {
     setLoading(true);
     try {
-      await editGame(gameId, updatedGame);
-      showNotification({ message: 'Game updated successfully!', color: 'green' });
-      setRefresh((prev) => !prev);  // Trigger refresh after editing game
-      setPlayersRefresh((prev) => !prev);
+      const result = await editGame(gameId, updatedGame);
+      // Edits to old games replay the history after them in the background
+      showNotification(result?.job
+        ? { message: 'Updating game and recalculating ratings in the background...', color: 'blue' }
+        : { message: 'Game updated successfully!', color: 'green' });
     } catch (error: any) {
       if (error.response && error.response.status === 401) {
         setAuthenticated(false);
@@ -89,10 +130,10 @@ export const useGameManagement = (
   const handleDeleteGame = async (gameId: number) => {
     setLoading(true);
     try {
-      await deleteGame(gameId);
-      showNotification({ message: 'Game deleted successfully!', color: 'green' });
-      setRefresh((prev) => !prev);  // Trigger refresh after deleting game
-      setPlayersRefresh((prev) => !prev);
+      const result = await deleteGame(gameId);
+      showNotification(result?.job
+        ? { message: 'Deleting game and recalculating ratings in the background...', color: 'blue' }
+        : { message: 'Game deleted successfully!', color: 'green' });
     } catch (error: any) {
       if (error.response && error.response.status === 401) {
         setAuthenticated(false);
@@ -110,6 +151,8 @@ export const useGameManagement = (
   return {
     games,
     loading,
+    hasMoreGames: nextCursor !== null,
+    loadMoreGames,
     handleAddGameResult,
     handleEditGame,
     handleDeleteGame,
@@ -0,0 +1,12 @@
+import { useEffect, useRef } from 'react';
+import { subscribeToEvents } from '../services/events';
+import { LiveEvent } from '../types';
+
+// Call `listener` with each change event pushed by the backend while the
+// component is mounted
+export const useLiveEvents = (listener: (event: LiveEvent) => void) => {
+  const latest = useRef(listener);
+  latest.current = listener;
+
+  useEffect(() => subscribeToEvents((event) => latest.current(event)), []);
+};
@@ -1,6 +1,8 @@
 import { useState, useEffect, useContext } from 'react';
 import { AuthContext } from '@/AuthContext';
 import { addPlayer, removePlayer, reactivatePlayer, getPlayers, deletePlayer } from '../services/api';
+import { applyRatingChanges } from '../services/events';
+import { useLiveEvents } from './useLiveEvents';
 import { showNotification } from '@mantine/notifications';
 import { Player } from '../types';
 
@@ -23,6 +25,34 @@ export const usePlayerManagement = () => {
     fetchPlayers();
   }, [playersRefresh]);
 
+  // Patch the player lists from pushed changes (ours included) instead of
+  // refetching; refetch only when told to resync
+  useLiveEvents((event) => {
+    switch (event.type) {
+      case 'game_added':
+      case 'game_updated':
+      case 'game_deleted':
+        setPlayers((prev) => applyRatingChanges(prev, event.ratings));
+        setInactivePlayers((prev) => applyRatingChanges(prev, event.ratings));
+        break;
+      case 'player_added':
+      case 'player_updated': {
+        const { player } = event;
+        const others = (list: Player[]) => list.filter((p) => p.id !== player.id);
+        setPlayers((prev) => (player.is_active ? [...others(prev), player] : others(prev)));
+        setInactivePlayers((prev) => (player.is_active ? others(prev) : [...others(prev), player]));
+        break;
+      }
+      case 'player_deleted':
+        setPlayers((prev) => applyRatingChanges(prev.filter((p) => p.id !== event.player_id), event.ratings));
+        setInactivePlayers((prev) => applyRatingChanges(prev.filter((p) => p.id !== event.player_id), event.ratings));
+        break;
+      case 'resync':
+        setPlayersRefresh((prev) => !prev);
+        break;
+    }
+  });
+
   // Handle adding a player
   const handleAddPlayer = async (
     playerName: string,
@@ -51,7 +81,6 @@ export const usePlayerManagement = () => {
     } finally {
       setLoading(false);
     }
-    setPlayersRefresh((prev) => !prev);
   };  
 
   // Handle removing a player
@@ -73,7 +102,6 @@ export const usePlayerManagement = () => {
     } finally {
       setLoading(false);
     }
-    setPlayersRefresh((prev) => !prev);
   };
 
   // Handle permanently deleting a player and related games
@@ -82,10 +110,12 @@ export const usePlayerManagement = () => {
 
     setLoading(true);
     try {
-      await deletePlayer(playerId);
-      showNotification({ message: 'Player and related games deleted successfully!', color: 'green' });
+      const result = await deletePlayer(playerId);
+      // Large deletes run in the background; the change arrives as an event
+      showNotification(result?.job
+        ? { message: 'Deleting player and related games in the background...', color: 'blue' }
+        : { message: 'Player and related games deleted successfully!', color: 'green' });
       setDeleteModalOpened(false);
-      setPlayersRefresh((prev) => !prev);  // Refresh the player list
     } catch (error: any) {
       if (error.response && error.response.status === 401) {
         setAuthenticated(false);
@@ -97,7 +127,6 @@ export const usePlayerManagement = () => {
     } finally {
       setLoading(false);
     }
-    setPlayersRefresh((prev) => !prev);
   };
 
   // Handle reactivating a player
@@ -121,7 +150,6 @@ export const usePlayerManagement = () => {
       } finally {
         setLoading(false);
       }
-      setPlayersRefresh((prev) => !prev);
     }
   };
 
@@ -25,11 +25,6 @@ import { Game } from '../types';
 
 const GAMES_PER_PAGE = 25;
 
-interface FullGameHistoryPageProps {
-  setGamesRefresh: React.Dispatch<React.SetStateAction<boolean>>;
-  setPlayersRefresh: React.Dispatch<React.SetStateAction<boolean>>;
-}
-
 // Sorting table headers
 function Th({ children, reversed, sorted, onSort }: any) {
   const Icon = sorted ? (reversed ? IconChevronUp : IconChevronDown) : IconSelector;
@@ -77,8 +72,8 @@ function sortData(
   return filterData(sorted, search);
 }
 
-const FullGameHistoryPage: React.FC<FullGameHistoryPageProps> = ({ setGamesRefresh, setPlayersRefresh, }) => {
-  const { games, loading, handleDeleteGame, handleEditGame } = useGameManagement(setPlayersRefresh);
+const FullGameHistoryPage: React.FC = () => {
+  const { games, loading, hasMoreGames, loadMoreGames, handleDeleteGame, handleEditGame } = useGameManagement();
   const [selectedGame, setSelectedGame] = useState<Game | null>(null);
   const [editModalOpened, setEditModalOpened] = useState(false);
   const [gameForm, setGameForm] = useState({ player1: '', player2: '', player1score: 0, player2score: 0 });
@@ -129,7 +124,6 @@ const FullGameHistoryPage: React.FC<FullGameHistoryPageProps> = ({ setGamesRefre
         { player1_score: gameForm.player1score, player2_score: gameForm.player2score }
       );
       setEditModalOpened(false);
-      setGamesRefresh((prev) => !prev);
     }
   };
 
@@ -137,7 +131,6 @@ const FullGameHistoryPage: React.FC<FullGameHistoryPageProps> = ({ setGamesRefre
     if (selectedGame) {
       await handleDeleteGame(selectedGame.id);
       setEditModalOpened(false);
-      setGamesRefresh((prev) => !prev);
     }
   };
 
@@ -265,6 +258,11 @@ const FullGameHistoryPage: React.FC<FullGameHistoryPageProps> = ({ setGamesRefre
             siblings={1}
             boundaries={1}
           />
+          {hasMoreGames && (
+            <Button variant="light" onClick={loadMoreGames} loading={loading}>
+              Load Older Games
+            </Button>
+          )}
         </Group>
       </Stack>
 
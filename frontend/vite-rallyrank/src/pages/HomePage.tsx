@@ -54,12 +54,10 @@ export function HomePage() {
   } = usePlayerManagement();
 
   const {
-    games,
     loading: gamesLoading,
     handleAddGameResult,
     refresh: gamesRefresh,
-    setRefresh: setGamesRefresh,
-  } = useGameManagement(setPlayersRefresh);
+  } = useGameManagement();
 
   // Forms for game results and player management
   const gameForm = useForm({ initialValues: { player1: '', player2: '', player1score: 0, player2score: 0 } });
@@ -224,10 +222,7 @@ export function HomePage() {
               />
             </div>
             <div style={{ display: viewGameHistory ? 'block' : 'none'}}>
-              <FullGameHistoryPage 
-                setGamesRefresh={setGamesRefresh}
-                setPlayersRefresh={setPlayersRefresh}
-              />
+              <FullGameHistoryPage />
             </div>
             <div style={{ display: viewPlayerProfile ? 'block' : 'none' }}>
               {selectedPlayer && (
@@ -235,7 +230,7 @@ export function HomePage() {
                   player={selectedPlayer}
                   onBack={handleBack}
                   players={players}  // Pass the players array to calculate rank
-                  games={games}  // Pass the full list of games for calculating player stats
+                  refresh={gamesRefresh}  // Refetch the player's games after results change
                 />
                 )}  {/* Pass the onBack function */}
             </div>
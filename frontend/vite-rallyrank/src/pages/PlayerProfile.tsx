@@ -1,27 +1,51 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { Avatar, Badge, Title, Text, Group, Stack, CloseButton, SimpleGrid } from '@mantine/core';
-import { Player, Game } from '../types';
+import { Player, PlayerStats, RatingHistory, HeadToHeadRecord } from '../types';
 import { StatsGrid } from '@/components/StatsGrid';
 import WinLossChart from '@/components/WinLossChart';
 import RatingHistoryChart from '@/components/RatingHistoryChart';
 import WinRateChart from '@/components/WinRateChart';
-import { calculateWinLossRecord, calculateAverageGameScore, calculateBiggestWinLoss, getRatingHistory } from '@/utils/playerStatsUtils';
 import { format } from 'date-fns';
 import { getPlayerTitle } from '@/utils/titles';
+import { getPlayerProfile } from '@/services/api';
+import { useLiveEvents } from '@/hooks/useLiveEvents';
 
 interface PlayerProfileProps {
   player: Player;
   onBack: () => void;
   players: Player[];
-  games: Game[];
+  refresh: boolean;
 }
 
-const PlayerProfile: React.FC<PlayerProfileProps> = ({ player, onBack, players, games }) => {
-  // Calculate stats using the utility functions
-  const { wins, losses } = calculateWinLossRecord(games, player.name);
-  const { avgPlayerScore, avgOpponentScore } = calculateAverageGameScore(games, player.name);
-  const { biggestWin } = calculateBiggestWinLoss(games, player.name);
-  const ratingHistory = getRatingHistory(games, player.name);
+const PlayerProfile: React.FC<PlayerProfileProps> = ({ player, onBack, players, refresh }) => {
+  const [stats, setStats] = useState<PlayerStats | undefined>();
+  const [ratingHistory, setRatingHistory] = useState<RatingHistory | undefined>();
+  const [headToHead, setHeadToHead] = useState<HeadToHeadRecord[]>([]);
+  const [reload, setReload] = useState(false);
+
+  // Stats, the downsampled rating history and per-opponent records are all
+  // aggregated by the backend and fetched in one request
+  useEffect(() => {
+    const fetchPlayerData = async () => {
+      const profile = await getPlayerProfile(player.id);
+      setStats(profile.stats);
+      setRatingHistory(profile.rating_history);
+      setHeadToHead(profile.head_to_head);
+    };
+    fetchPlayerData();
+  }, [player.id, refresh, reload]);
+
+  // Refetch when a pushed change moved this player's rating
+  useLiveEvents((event) => {
+    if (event.type === 'resync' || ('ratings' in event && player.id in event.ratings)) {
+      setReload((prev) => !prev);
+    }
+  });
+
+  const wins = stats?.wins ?? 0;
+  const losses = stats?.losses ?? 0;
+  const biggestWin = stats?.biggest_win;
+  const historyPoints = ratingHistory?.history ?? [];
 
   // Calculate the player's actual rank by sorting players based on rating
   const sortedPlayers = [...players].sort((a, b) => b.rating - a.rating);
@@ -44,18 +68,18 @@ const PlayerProfile: React.FC<PlayerProfileProps> = ({ player, onBack, players,
       <StatsGrid
         rank={playerRank}  // Display the player's actual rank
         rating={player.rating}
-        avgGameScore={`${avgPlayerScore.toFixed(0)} - ${avgOpponentScore.toFixed(0)}`}
-        biggestWin={biggestWin ? `${biggestWin.playerScore}-${biggestWin.opponentScore} vs ${biggestWin.opponent}` : 'N/A'}
+        avgGameScore={`${(stats?.avg_points_for ?? 0).toFixed(0)} - ${(stats?.avg_points_against ?? 0).toFixed(0)}`}
+        biggestWin={biggestWin ? `${biggestWin.player_score}-${biggestWin.opponent_score} vs ${biggestWin.opponent}` : 'N/A'}
       />
 
       <SimpleGrid cols={{ base: 1, md: 2 }}>
         <WinLossChart wins={wins} losses={losses} />
         <RatingHistoryChart
-          ratings={ratingHistory.map(({ rating }) => rating)}
-          dates={ratingHistory.map(({ date }) => format(new Date(date), 'MMM d'))}
+          ratings={historyPoints.map(({ rating }) => rating)}
+          dates={historyPoints.map(({ date }) => format(new Date(date), 'MMM d'))}
         />
       </SimpleGrid>
-      <WinRateChart player={player} games={games} />
+      <WinRateChart records={headToHead} />
     </Stack>
   );
 };
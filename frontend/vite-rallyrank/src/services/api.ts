@@ -1,7 +1,8 @@
 import axios from 'axios';
+import { CompactRows, FirstGamePage, Game, GameHistoryParams, GamePage, HeadToHeadRecord, Player, PlayerProfileData, PlayerStats, RatingHistory, RatingHistoryParams } from '../types';
 
 // Determine base URL dynamically
-const API_BASE_URL = window.location.hostname === 'localhost'
+export const API_BASE_URL = window.location.hostname === 'localhost'
   ? 'http://localhost:5000'  // Use local backend for development
   : 'https://rallyrank.onrender.com';  // Use production backend when deployed
 
@@ -10,9 +11,113 @@ axios.defaults.withCredentials = true;
 
 export const api = axios.create();
 
+// Read-only data the backend publishes as static JSON (backend/static_json.py),
+// served from a static host. When VITE_STATIC_DATA_URL is set, visitors read
+// rankings, players, recent games and player stats from there; logged-in
+// admins, whose writes the files only catch up with after a publish, and
+// every other request use the live API.
+const STATIC_DATA_URL: string | undefined = import.meta.env.VITE_STATIC_DATA_URL;
+const STATIC_LEAGUE_ID = 1;  // The default league, served at the plain API paths
+const MANIFEST_MAX_AGE_MS = 30_000;
+
+interface StaticManifest {
+    version: string;
+    files: Record<string, string>;
+}
+
+let manifest: { fetchedAt: number; promise: Promise<StaticManifest> } | null = null;
+
+export const staticDataEnabled = () => Boolean(STATIC_DATA_URL) && localStorage.getItem('authenticated') !== 'true';
+
+const staticUrl = (file: string) => `${STATIC_DATA_URL}/leagues/${STATIC_LEAGUE_ID}/${file}`;
+
+// The manifest naming the current files, refetched once it is `maxAge` old
+export const getStaticManifest = (maxAge = MANIFEST_MAX_AGE_MS): Promise<StaticManifest> => {
+    if (!manifest || Date.now() - manifest.fetchedAt >= maxAge) {
+        const promise = fetch(staticUrl('manifest.json'), { cache: 'no-cache' }).then((response) => {
+            if (!response.ok) throw new Error(`manifest: ${response.status}`);
+            return response.json();
+        });
+        manifest = { fetchedAt: Date.now(), promise };
+        promise.catch(() => { manifest = null; });
+    }
+    return manifest.promise;
+};
+
+// A published payload, or undefined to fall back to the live API
+const getStatic = async <T>(name: string): Promise<T | undefined> => {
+    if (!staticDataEnabled()) return undefined;
+    try {
+        const { files } = await getStaticManifest();
+        if (!(name in files)) return undefined;
+        // Named by content hash, so any cached copy is current
+        const response = await fetch(staticUrl(files[name]));
+        if (!response.ok) throw new Error(`${name}: ${response.status}`);
+        return await response.json();
+    } catch (error) {
+        console.warn('Static data unavailable, using the live API:', error);
+        return undefined;
+    }
+};
+
+// Everything the page needs for first paint comes from one /bootstrap
+// request per page load: reads made while it loads (players, rankings, the
+// first page of games, auth status) are answered from it. Once data may
+// have moved on (any write, any change event, or after a few seconds) reads
+// go back to their own endpoints. Visitors on static data skip it.
+const BOOTSTRAP_MAX_AGE_MS = 10_000;
+
+interface Bootstrap {
+    authenticated: boolean;
+    players: Player[];
+    rankings: Player[];
+    games: FirstGamePage;
+}
+
+let bootstrap: { fetchedAt: number; promise: Promise<Bootstrap | undefined> } | null = null;
+let bootstrapExpired = false;
+
+export const expireBootstrap = () => { bootstrapExpired = true; };
+
+api.interceptors.request.use((config) => {
+    if (config.method !== 'get') expireBootstrap();
+    return config;
+});
+
+// The bootstrap response, or undefined to use the usual endpoint
+const getBootstrap = (): Promise<Bootstrap | undefined> => {
+    if (!bootstrapExpired && bootstrap && Date.now() - bootstrap.fetchedAt >= BOOTSTRAP_MAX_AGE_MS) expireBootstrap();
+    if (bootstrapExpired || staticDataEnabled()) return Promise.resolve(undefined);
+    if (!bootstrap) {
+        const promise = api.get('/bootstrap', { params: { format: 'compact' } })
+            .then(({ data }) => ({
+                authenticated: data.authenticated,
+                players: fromCompact<Player>(data.players),
+                rankings: fromCompact<Player>(data.rankings),
+                games: data.games,
+            }))
+            .catch((error) => {
+                console.warn('Bootstrap unavailable, using the usual endpoints:', error);
+                return undefined;
+            });
+        bootstrap = { fetchedAt: Date.now(), promise };
+    }
+    return bootstrap.promise;
+};
+
+// Fetch auth status
+export const getAuthStatus = async (): Promise<boolean> => {
+    const bootstrapped = await getBootstrap();
+    if (bootstrapped) return bootstrapped.authenticated;
+    const response = await api.get('/auth_status');
+    return response.data.authenticated;
+};
+
 // Fetch Rankings
 export const getRankings = async () => {
     try {
+      const published = await getStatic<Player[]>('rankings') ?? (await getBootstrap())?.rankings;
+      if (published) return published;
       const response = await api.get('/rankings');
       return response.data;
     } catch (error) {
@@ -23,6 +128,8 @@ export const getRankings = async () => {
 // Fetch Players
 export const getPlayers = async () => {
     try {
+        const published = await getStatic<Player[]>('players') ?? (await getBootstrap())?.players;
+        if (published) return published;
         const response = await api.get('/players');
         return response.data;
     } catch (error) {
@@ -30,13 +137,102 @@ export const getPlayers = async () => {
     }
 };
 
-// Fetch Game History
-export const getGameHistory = async () => {
+// Expand a compact list response back into objects
+export const fromCompact = <T>({ fields, rows }: CompactRows): T[] =>
+    rows.map((row) => Object.fromEntries(fields.map((field, i) => [field, row[i]])) as T);
+
+// The first page of games from static data or the bootstrap response, cut
+// down to `limit`; undefined when the request needs the live API (filters,
+// later pages or more rows)
+const getFirstGamePage = async ({ limit, ...filters }: GameHistoryParams): Promise<GamePage | undefined> => {
+    if (Object.values(filters).some((value) => value !== undefined)) return undefined;
+    const published = await getStatic<FirstGamePage>('games') ?? (await getBootstrap())?.games;
+    if (!published) return undefined;
+    const count = limit ?? published.cursors.length;
+    if (count > published.cursors.length && published.next_cursor) return undefined;
+    const games = fromCompact<Game>(published.games).slice(0, count);
+    return {
+        games,
+        next_cursor: count < published.cursors.length ? published.cursors[count - 1] : published.next_cursor,
+    };
+};
+
+// Fetch a page of Game History (newest first), sent in the compact format
+export const getGameHistory = async (params: GameHistoryParams = {}): Promise<GamePage> => {
     try {
-        const response = await api.get('/games');
-        return response.data;
+        const published = await getFirstGamePage(params);
+        if (published) return published;
+        const response = await api.get('/games', { params: { ...params, format: 'compact' } });
+        return { ...response.data, games: fromCompact<Game>(response.data.games) };
     } catch (error) {
         console.error('Error fetching games:', error);
+        return { games: [], next_cursor: null };
+    }
+};
+
+// Fetch every game matching the filters by following the page cursors
+export const getAllGames = async (params: GameHistoryParams = {}): Promise<Game[]> => {
+    const games: Game[] = [];
+    let cursor: string | null = null;
+    do {
+        const page: GamePage = await getGameHistory({ ...params, limit: 500, cursor: cursor ?? undefined });
+        games.push(...page.games);
+        cursor = page.next_cursor;
+    } while (cursor);
+    return games;
+};
+
+// Fetch aggregated stats for one player
+export const getPlayerStats = async (playerId: number): Promise<PlayerStats | undefined> => {
+    try {
+        const published = await getStatic<PlayerStats>(`stats/${playerId}`);
+        if (published) return published;
+        const response = await api.get(`/players/${playerId}/stats`);
+        return response.data;
+    } catch (error) {
+        console.error('Error fetching player stats:', error);
+    }
+};
+
+// Fetch a player's rating history, downsampled by the backend for charting
+export const getRatingHistory = async (playerId: number, params: RatingHistoryParams = {}): Promise<RatingHistory | undefined> => {
+    try {
+        const response = await api.get(`/players/${playerId}/rating-history`, { params });
+        return response.data;
+    } catch (error) {
+        console.error('Error fetching rating history:', error);
+    }
+};
+
+// Fetch a player's record against each opponent, most played first
+export const getHeadToHead = async (playerId: number): Promise<HeadToHeadRecord[]> => {
+    try {
+        const response = await api.get(`/players/${playerId}/head-to-head`);
+        return response.data;
+    } catch (error) {
+        console.error('Error fetching head-to-head records:', error);
+        return [];
+    }
+};
+
+// Fetch everything a player's profile shows: one /players/<id>/bootstrap
+// request, or for visitors on static data, the published stats alongside
+// the live history and head-to-head
+export const getPlayerProfile = async (playerId: number): Promise<PlayerProfileData> => {
+    if (staticDataEnabled()) {
+        const [stats, rating_history, head_to_head] = await Promise.all([
+            getPlayerStats(playerId),
+            getRatingHistory(playerId),
+            getHeadToHead(playerId),
+        ]);
+        return { stats, rating_history, head_to_head };
+    }
+    try {
+        const response = await api.get(`/players/${playerId}/bootstrap`);
+        return response.data;
+    } catch (error) {
+        console.error('Error fetching player profile:', error);
+        return { head_to_head: [] };
     }
 };
 
@@ -0,0 +1,129 @@
+import { API_BASE_URL, expireBootstrap, getStaticManifest, staticDataEnabled } from './api';
+import { Game, LiveEvent, Player, RatingChanges } from '../types';
+
+const EVENT_TYPES: LiveEvent['type'][] = [
+    'game_added', 'game_updated', 'game_deleted', 'player_added', 'player_updated', 'player_deleted', 'resync',
+];
+
+type Listener = (event: LiveEvent) => void;
+
+// Visitors reading static data watch its manifest instead of holding an
+// /events connection, and refetch when a new version is published
+const MANIFEST_POLL_MS = 30_000;
+
+// A busy server refuses new /events streams (503); until one is accepted,
+// refetch on this interval instead and retry the stream each time
+const STREAM_RETRY_MS = 30_000;
+
+// One /events connection (or manifest poll) per tab, shared by every
+// subscriber and closed when the last one leaves
+const listeners = new Set<Listener>();
+let source: EventSource | null = null;
+let poll: ReturnType<typeof setInterval> | null = null;
+let fallback: ReturnType<typeof setInterval> | null = null;
+
+const dispatch = (event: LiveEvent) => {
+    // Data has moved on from the first-paint bootstrap
+    expireBootstrap();
+    listeners.forEach((listener) => listener(event));
+};
+
+const stopFallback = () => {
+    if (fallback) clearInterval(fallback);
+    fallback = null;
+};
+
+const fallBackToPolling = () => {
+    if (fallback) return;
+    fallback = setInterval(() => {
+        dispatch({ type: 'resync' });
+        if (!source) connect();
+    }, STREAM_RETRY_MS);
+};
+
+const connect = () => {
+    const stream = new EventSource(`${API_BASE_URL}/events`, { withCredentials: true });
+    source = stream;
+    let dropped = false;
+    EVENT_TYPES.forEach((type) => {
+        stream.addEventListener(type, (message) => {
+            dispatch({ type, ...JSON.parse((message as MessageEvent).data) } as LiveEvent);
+        });
+    });
+    // EventSource reconnects on its own after a dropped connection, and
+    // anything sent in between is lost. It gives up (CLOSED) when the
+    // stream is refused, so poll until a later attempt is accepted.
+    stream.onerror = () => {
+        dropped = true;
+        if (stream.readyState !== EventSource.CLOSED) return;
+        stream.close();
+        if (source === stream) source = null;
+        fallBackToPolling();
+    };
+    stream.onopen = () => {
+        if (dropped || fallback) {
+            dropped = false;
+            stopFallback();
+            dispatch({ type: 'resync' });
+        }
+    };
+};
+
+const watchManifest = () => {
+    let version: string | null = null;
+    const check = async () => {
+        try {
+            const manifest = await getStaticManifest(0);
+            if (version !== null && manifest.version !== version) dispatch({ type: 'resync' });
+            version = manifest.version;
+        } catch {
+            // Try again on the next tick
+        }
+    };
+    check();
+    poll = setInterval(check, MANIFEST_POLL_MS);
+};
+
+const start = () => {
+    if (staticDataEnabled()) watchManifest();
+    else connect();
+};
+
+const stop = () => {
+    source?.close();
+    source = null;
+    stopFallback();
+    if (poll) clearInterval(poll);
+    poll = null;
+};
+
+// Receive every change event until the returned function is called
+export const subscribeToEvents = (listener: Listener) => {
+    listeners.add(listener);
+    if (!source && !poll && !fallback) start();
+    return () => {
+        listeners.delete(listener);
+        if (listeners.size === 0) stop();
+    };
+};
+
+// Switch between /events and the manifest poll when logging in or out,
+// since reads move between the live API and static data too
+export const restartEvents = () => {
+    if (listeners.size === 0 || Boolean(poll) === staticDataEnabled()) return;
+    stop();
+    start();
+    dispatch({ type: 'resync' });
+};
+
+// Update ratings in a list of players from a change event
+export const applyRatingChanges = (players: Player[], ratings: RatingChanges) =>
+    players.map((player) => (player.id in ratings ? { ...player, rating: ratings[player.id] } : player));
+
+// Same for the current ratings shown alongside games
+export const applyGameRatingChanges = (games: Game[], ratings: RatingChanges) =>
+    games.map((game) => ({
+        ...game,
+        new_rating_player1: ratings[game.player1_id] ?? game.new_rating_player1,
+        new_rating_player2: ratings[game.player2_id] ?? game.new_rating_player2,
+    }));
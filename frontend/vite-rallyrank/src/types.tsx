@@ -1,5 +1,7 @@
 export interface Game {
     id: number;
+    player1_id: number;
+    player2_id: number;
     player1_name: string;
     player2_name: string;
     player1_score: number;
@@ -19,4 +21,105 @@ export interface Game {
     name: string;
     rating: number;
     is_active: boolean;
-  }
\ No newline at end of file
+  }
+
+  // Compact list format (?format=compact): keys once, each record as an array
+  export interface CompactRows {
+    fields: string[];
+    rows: unknown[][];
+  }
+
+  export interface GamePage {
+    games: Game[];
+    next_cursor: string | null;
+  }
+
+  // The first page of games as published and bootstrapped: compact rows
+  // with the cursor after each, so shorter pages can be cut from it
+  export interface FirstGamePage {
+    games: CompactRows;
+    next_cursor: string | null;
+    cursors: string[];
+  }
+
+  export interface GameHistoryParams {
+    limit?: number;
+    cursor?: string;
+    player_id?: number;
+    start?: string;
+    end?: string;
+  }
+
+  export interface BiggestMargin {
+    margin: number;
+    player_score: number;
+    opponent_score: number;
+    opponent_id: number;
+    opponent: string;
+  }
+
+  export interface PlayerStats {
+    id: number;
+    name: string;
+    rating: number;
+    games_played: number;
+    wins: number;
+    losses: number;
+    draws: number;
+    points_for: number;
+    points_against: number;
+    avg_points_for: number;
+    avg_points_against: number;
+    biggest_win: BiggestMargin | null;
+    biggest_loss: BiggestMargin | null;
+    current_streak: { type: 'W' | 'L' | 'D'; length: number } | null;
+    longest_win_streak: number;
+  }
+
+  export interface HeadToHeadRecord {
+    opponent_id: number;
+    opponent: string;
+    games: number;
+    wins: number;
+    losses: number;
+    draws: number;
+    points_for: number;
+    points_against: number;
+    point_diff: number;
+  }
+
+  export type RatingHistoryResolution = 'game' | 'day' | 'week' | 'month';
+
+  export interface RatingHistoryParams {
+    start?: string;
+    end?: string;
+    resolution?: RatingHistoryResolution;
+    points?: number;
+  }
+
+  export interface RatingHistory {
+    player_id: number;
+    resolution: RatingHistoryResolution;
+    games: number;
+    history: { date: string; rating: number }[];
+  }
+
+  // A player's profile data from /players/<id>/bootstrap
+  export interface PlayerProfileData {
+    stats?: PlayerStats;
+    rating_history?: RatingHistory;
+    head_to_head: HeadToHeadRecord[];
+  }
+
+  // Ratings that changed with a write, by player id
+  export type RatingChanges = Record<string, number>;
+
+  // Change events pushed by the backend over /events
+  export type LiveEvent =
+    | { type: 'game_added'; game: Game; ratings: RatingChanges }
+    | { type: 'game_updated'; game: Game; ratings: RatingChanges }
+    | { type: 'game_deleted'; game_id: number; ratings: RatingChanges }
+    | { type: 'player_added'; player: Player }
+    | { type: 'player_updated'; player: Player }
+    | { type: 'player_deleted'; player_id: number; ratings: RatingChanges }
+    | { type: 'resync' };